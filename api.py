@@ -0,0 +1,361 @@
+"""
+Lokale JSON-API über dem Rechenkern (planner) für das geplante React-Frontend.
+
+Liefert Mitglieder, Komponentenbesetzung, Alerts, Headcount-/Kostenprognose und
+die monatliche Allocation-Matrix als JSON. Die Werte kommen aus demselben
+Abhängigkeitsgraphen wie in den Streamlit-Seiten (planner.dataflow), über einem
+eigenen DataStore, der aus einer JSON-Datei ({dataset: Wert}) oder einer
+synthetischen Organisation befüllt wird.
+
+Antworten werden pro Endpunkt und Versionsschlüssel der benötigten Knoten
+(Datenstände + Parameter wie Stichtag und Zeitraum) gecacht; der Schlüssel ist
+zugleich das ETag, sodass If-None-Match ohne Neuberechnung mit 304 beantwortet
+wird. Bei Accept-Encoding: gzip wird komprimiert ausgeliefert.
+
+    python api.py --data org.json --port 8502
+    python api.py --synthetic 10k
+    curl -H 'Accept-Encoding: gzip' --compressed 'localhost:8502/api/staffing?as_of=2026-01-01'
+
+Endpunkte (GET/HEAD; Datumsparameter als YYYY-MM-DD, Standard-Stichtag: heute):
+    /api/version                   Datenstände
+    /api/members                   Team-Frame (as_of)
+    /api/staffing                  Komponentenbesetzung (as_of)
+    /api/alerts                    Wissensübergabe-Alerts und kritische Austritte (as_of)
+    /api/events                    Anstehende Ereignisse (as_of, days)
+    /api/forecast/headcount        Teamprognose (as_of, start, end, granularity)
+    /api/forecast/costs            Kostenprognose (as_of, start, end, granularity)
+    /api/allocations/matrix        Monatliche Übersicht (start, end, resolution: month/week/day)
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from planner import clock
+from planner.dataflow import Context, default_graph
+from planner.finance import FORECAST_FREQ, default_budget_data
+from planner.forecast import GRANULARITIES
+from planner.org import default_org_units
+from planner.store import DataStore
+from planner.team import classify_team, critical_exits
+
+# Startwerte fehlender Datensätze, wie in app.py und den Seiten
+DEFAULTS = {
+    "team_data": list,
+    "org_units": default_org_units,
+    "components": list,
+    "project_allocations": list,
+    "budget_data": default_budget_data,
+    "employee_settings": dict,
+    "rate_history": list,
+    "scenarios": dict,
+}
+# API-Name der Granularität -> Anzeigename in GRANULARITIES / FORECAST_FREQ
+GRANULARITY_NAMES = {"month": "Monatlich", "quarter": "Quartalsweise", "year": "Jährlich"}
+RESOLUTION_FREQ = {"month": "MS", "week": "W-MON", "day": "D"}
+# Antworten unter dieser Größe werden nicht komprimiert
+GZIP_MIN_BYTES = 1024
+# Größere Bodies nicht gesendeter Methoden (405) werden nicht gelesen, die Verbindung wird geschlossen
+MAX_DISCARD_BYTES = 1024 * 1024
+
+
+class BadRequest(ValueError):
+    """Invalid query parameter."""
+
+
+class Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers=None, body=b""):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+
+def _date(query, name, default):
+    value = query.get(name)
+    if not value:
+        return default
+    try:
+        return pd.Timestamp(value).normalize()
+    except ValueError:
+        raise BadRequest(f"{name}: kein Datum: {value!r}") from None
+
+
+def _granularity(query):
+    value = query.get("granularity", "month")
+    if value not in GRANULARITY_NAMES:
+        raise BadRequest(f"granularity: erwartet {', '.join(GRANULARITY_NAMES)}")
+    return GRANULARITY_NAMES[value]
+
+
+def _range(query, as_of, years=2):
+    start = _date(query, "start", as_of)
+    end = _date(query, "end", as_of + pd.DateOffset(years=years))
+    if start >= end:
+        raise BadRequest("start muss vor end liegen")
+    return start, end
+
+
+def frame_json(df):
+    """Records JSON of a frame, dates as ISO strings."""
+    return df.to_json(orient="records", date_format="iso", force_ascii=False)
+
+
+# Endpunkt -> fn(query, as_of) -> (Parameter, Knoten, fn(Werte) -> {Feld: JSON-Text})
+def _members(query, as_of):
+    return {"today": as_of}, ["team_frame"], lambda df: {"members": frame_json(df)}
+
+
+def _staffing(query, as_of):
+    return {"today": as_of}, ["staffing"], lambda staffing: {"staffing": frame_json(staffing)}
+
+
+def _alerts(query, as_of):
+    def render(df, alerts):
+        exits = critical_exits(df)[['name', 'role', 'components', 'planned_exit', 'days_until_exit', 'priority']]
+        return {"transfer_alerts": frame_json(alerts), "critical_exits": frame_json(exits)}
+    return {"today": as_of}, ["team_frame", "transfer_alerts"], render
+
+
+def _events(query, as_of):
+    try:
+        days = int(query.get("days", 30))
+    except ValueError:
+        raise BadRequest("days: keine Zahl") from None
+    if not 1 <= days <= 3660:
+        raise BadRequest("days: erwartet 1 bis 3660")
+    return {"days": days}, ["event_index"], lambda events: {"events": frame_json(events.upcoming(as_of, days))}
+
+
+def _headcount(query, as_of):
+    start, end = _range(query, as_of)
+    freq, x_title, _ = GRANULARITIES[_granularity(query)]
+    params = {"today": as_of, "headcount_range": (start, end, freq, x_title)}
+    return params, ["headcount"], lambda forecast: {"forecast": frame_json(forecast)}
+
+
+def _costs(query, as_of):
+    granularity = _granularity(query)
+    start, end = _range(query, as_of, years=5 if granularity == "Jährlich" else 2)
+    cost_column = "yearly_cost" if granularity == "Jährlich" else "monthly_cost"
+    params = {"today": as_of, "cost_range": (start, end, FORECAST_FREQ[granularity], cost_column)}
+    return params, ["cost_forecast"], lambda forecast: {"forecast": frame_json(forecast)}
+
+
+def _allocation_matrix(query, as_of):
+    start, end = _range(query, as_of, years=1)
+    resolution = query.get("resolution", "month")
+    if resolution not in RESOLUTION_FREQ:
+        raise BadRequest(f"resolution: erwartet {', '.join(RESOLUTION_FREQ)}")
+    params = {"allocation_range": (start.date(), end.date(), RESOLUTION_FREQ[resolution])}
+    return params, ["allocation_matrix"], lambda matrix: {"months": frame_json(matrix)}
+
+
+ENDPOINTS = {
+    "/api/members": _members,
+    "/api/staffing": _staffing,
+    "/api/alerts": _alerts,
+    "/api/events": _events,
+    "/api/forecast/headcount": _headcount,
+    "/api/forecast/costs": _costs,
+    "/api/allocations/matrix": _allocation_matrix,
+}
+
+
+def _json_response(status, payload, headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return Response(status, {"Content-Type": "application/json; charset=utf-8", **(headers or {})}, body)
+
+
+def _accepts_gzip(headers):
+    encodings = headers.get("Accept-Encoding", "")
+    return any(part.split(";")[0].strip() == "gzip" for part in encodings.split(","))
+
+
+def _etag_matches(headers, etag):
+    candidates = headers.get("If-None-Match")
+    if not candidates:
+        return False
+    return candidates.strip() == "*" or etag in (c.strip() for c in candidates.split(","))
+
+
+class PlannerAPI:
+    """
+    Request handling without sockets: handle() maps (method, target, headers)
+    to a Response. Thread-safe; the dataflow deduplicates concurrent
+    computations of the same node.
+    """
+
+    def __init__(self, store, graph=None, cache_size=256):
+        self.store = store
+        self.graph = graph or default_graph()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0, "computed": 0}
+
+    def handle(self, method, target, headers):
+        with self._lock:
+            self.stats["requests"] += 1
+        if method not in ("GET", "HEAD"):
+            return _json_response(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Nur GET und HEAD"}, {"Allow": "GET, HEAD"})
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = dict(parse_qsl(url.query))
+        snapshot = self.store.snapshot()
+        if path == "/api/version":
+            return _json_response(HTTPStatus.OK, {"version": snapshot.version, "versions": snapshot.versions},
+                                  {"Cache-Control": "no-cache"})
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return _json_response(HTTPStatus.NOT_FOUND, {"error": f"Unbekannter Endpunkt: {path}",
+                                                         "endpoints": ["/api/version", *ENDPOINTS]})
+        try:
+            as_of = _date(query, "as_of", clock.today())
+            params, nodes, render = endpoint(query, as_of)
+        except BadRequest as exc:
+            return _json_response(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+
+        ctx = Context.from_snapshot(snapshot, **params)
+        version_key = repr((path, as_of, sorted(params.items()), tuple(self.graph.key(node, ctx) for node in nodes)))
+        # Schwaches ETag: gzip- und unkomprimierte Antwort sind gleichwertig
+        etag = 'W/"' + hashlib.sha1(version_key.encode("utf-8")).hexdigest()[:20] + '"'
+        headers_out = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if _etag_matches(headers, etag):
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return Response(HTTPStatus.NOT_MODIFIED, headers_out)
+
+        entry = self._cached(etag)
+        if entry is None:
+            fields = render(*(self.graph.get(node, ctx) for node in nodes))
+            envelope = {"as_of": f'"{as_of.date().isoformat()}"', "version": str(snapshot.version), **fields}
+            body = ("{" + ",".join(f'"{name}":{value}' for name, value in envelope.items()) + "}").encode("utf-8")
+            entry = (body, gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None)
+            self._remember(etag, entry)
+
+        body, compressed = entry
+        headers_out["Content-Type"] = "application/json; charset=utf-8"
+        if compressed is not None and _accepts_gzip(headers):
+            headers_out["Content-Encoding"] = "gzip"
+            body = compressed
+        return Response(HTTPStatus.OK, headers_out, body)
+
+    def _cached(self, etag):
+        with self._lock:
+            entry = self._cache.get(etag)
+            if entry is not None:
+                self._cache.move_to_end(etag)
+                self.stats["cache_hits"] += 1
+            return entry
+
+    def _remember(self, etag, entry):
+        with self._lock:
+            self.stats["computed"] += 1
+            self._cache[etag] = entry
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    api = None
+    quiet = True
+    protocol_version = "HTTP/1.1"
+
+    def _discard_body(self):
+        """Read an unused request body so it is not parsed as the next request (keep-alive)."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_DISCARD_BYTES or self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+            return
+        while length > 0:
+            chunk = self.rfile.read(min(length, 65536))
+            if not chunk:
+                self.close_connection = True
+                return
+            length -= len(chunk)
+
+    def _serve(self):
+        if self.command not in ("GET", "HEAD"):
+            self._discard_body()
+        response = self.api.handle(self.command, self.path, self.headers)
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if self.command != "HEAD" and response.body:
+            self.wfile.write(response.body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = _serve
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(api, host="127.0.0.1", port=8502, quiet=True):
+    """ThreadingHTTPServer serving `api`; port 0 picks a free port."""
+    handler = type("PlannerHandler", (_Handler,), {"api": api, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def load_store(data=None, synthetic=None):
+    """
+    DataStore seeded from a JSON file ({dataset: value}) or a synthetic
+    organisation (benchmarks/synthetic_org.py); missing datasets get the
+    defaults of the app. Tenure classification is applied as in app.py.
+    """
+    datasets = {}
+    if data:
+        with open(data, encoding="utf-8") as f:
+            datasets = json.load(f)
+    elif synthetic:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+        from synthetic_org import SIZES, generate_org
+        datasets = generate_org(SIZES.get(synthetic) or int(synthetic))
+    for key, factory in DEFAULTS.items():
+        if key not in datasets:
+            datasets[key] = factory()
+    datasets["team_data"] = classify_team(datasets["team_data"], clock.today())
+    return DataStore({key: datasets[key] for key in DEFAULTS})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokale JSON-API des Rechenkerns")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--data", help="JSON-Datei mit den Datensätzen ({dataset: Wert})")
+    source.add_argument("--synthetic", help="Synthetische Organisation (1k, 10k, 100k oder Anzahl)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--verbose", action="store_true", help="Jede Anfrage protokollieren")
+    args = parser.parse_args(argv)
+
+    server = make_server(PlannerAPI(load_store(args.data, args.synthetic)), args.host, args.port,
+                         quiet=not args.verbose)
+    print(f"API läuft auf http://{args.host}:{server.server_address[1]}/api/version")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
+from html import escape
 import plotly.graph_objects as go
 import numpy as np
 
+import instrumentation
+import planner
+import shared_state
+from planner import (
+    EMPLOYEE_TYPES,
+    TEAMS,
+    calculate_kt_status_from_tenure,
+    calculate_priority_from_tenure,
+    get_kt_status_mapping,
+    upsert_component,
+)
+
 # SEITENKONFIGURATION - MUSS DER ERSTE STREAMLIT-BEFEHL SEIN
 st.set_page_config(
     page_title="ADC TMS Ressourcendashboard",
@@ -13,6 +26,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Rerun-Instrumentierung (Section-Timer, Debug-Panel, Traces)
+perf = instrumentation.begin_rerun("app")
+perf.section("theme")
+
 # Initialize dark mode setting
 if 'dark_mode' not in st.session_state:
     st.session_state.dark_mode = False
@@ -240,9 +257,10 @@ def load_theme():
 
 load_theme()
 
-# Initialisiere Session-State für Datenpersistenz
-if 'team_data' not in st.session_state:
-    st.session_state.team_data = [
+perf.section("session_init")
+# Beispieldaten, mit denen das gemeinsame Datenmodell beim ersten Start befüllt wird
+def default_team_data():
+    return [
         {"name": "Alice Schmidt", "role": "Developer", "employee_type": "Intern", "components": "DOKU", 
          "start_date": "2020-01-01", "planned_exit": "2026-12-31", "knowledge_transfer_status": "Not Started", "priority": "High", "dob": "1994-05-15", "team": "CS1"},
         {"name": "Bob Weber", "role": "Tester", "employee_type": "Intern", "components": "Generell", 
@@ -260,70 +278,88 @@ if 'team_data' not in st.session_state:
         {"name": "Heike Zimmermann", "role": "Validierer", "employee_type": "Extern", "components": "Kundenprojekte", "start_date": "2017-03-14", "planned_exit": "2026-09-01", "knowledge_transfer_status": "Completed", "priority": "High", "dob": "1973-06-22", "team": "CS5"} 
     ]
 
+# Gemeinsames Datenmodell aller Sitzungen an den Session-State binden
+shared_state.attach({
+    "team_data": default_team_data,
+    "components": list,
+    "org_units": planner.default_org_units,
+})
+
 if 'editing_index' not in st.session_state:
     st.session_state.editing_index = None
 
-def get_kt_status_mapping():
-    """Returns mapping between German display names and English storage values"""
-    return {
-        "Nicht gestartet": "Not Started",
-        "In Bearbeitung": "In Progress",
-        "Abgeschlossen": "Completed",
-        "Not Started": "Nicht gestartet",
-        "In Progress": "In Bearbeitung",
-        "Completed": "Abgeschlossen"
-    }
+# Stichtag dieses Reruns, wird an alle Berechnungen übergeben
+as_of = shared_state.as_of_date()
+# (Durchläufe, Seed) der Austrittsrisiko-Simulation oder None
+simulation = shared_state.simulation_settings()
+# Komponenten-Registry (Tabelle, Verantwortliche, Produktindex) und Zuordnungen Mitglied–Komponente
+registry = shared_state.derived("component_registry")
+assignments = shared_state.derived("assignments")
+# Organisationsbaum (Abteilungen -> Gruppen -> Teams); Teamfelder der Mitglieder sind Knotennamen
+tree = shared_state.derived("org_tree")
 
-def calculate_priority_from_tenure(start_date_str):
-    """
-    Calculate priority based on tenure:
-    - Less than 6 months: High
-    - 6 months to 2 years: Medium
-    - Over 2 years: Low
-    """
-    start_date = pd.to_datetime(start_date_str)
-    tenure_days = (pd.Timestamp.today() - start_date).days
-    
-    if tenure_days < 180:  # Less than 6 months
-        return "High"
-    elif tenure_days < 730:  # Less than 2 years
-        return "Medium"
-    else:  # 2+ years
-        return "Low"
 
-def calculate_kt_status_from_tenure(start_date_str):
-    """
-    Calculate knowledge transfer status based on tenure:
-    - Less than 6 months: Not Started
-    - 6 months to 2 years: In Progress
-    - Over 2 years: Completed
-    """
-    start_date = pd.to_datetime(start_date_str)
-    tenure_days = (pd.Timestamp.today() - start_date).days
-    
-    if tenure_days < 180:  # Less than 6 months
-        return "Not Started"
-    elif tenure_days < 730:  # Less than 2 years
-        return "In Progress"
-    else:  # 2+ years
-        return "Completed"
+def team_options(current=None):
+    """Org nodes for the team select boxes; an unknown current team stays selectable."""
+    options = list(tree.order) or list(TEAMS)
+    if current and current not in options:
+        options.append(current)
+    return options
+
+
+def product_card_html(rows):
+    """One HTML block for the components and responsible persons of one product (product_overview rows)."""
+    parts = ['<div class="product-card">', f"<p><strong>Komponenten ({rows['component'].nunique()}):</strong></p>"]
+    component = section = None
+    for row in rows.itertuples(index=False):
+        if row.component != component:
+            if component is not None:
+                parts.append('</div>')
+            component, section = row.component, None
+            parts.append(f'<div class="component-item"><strong>📦 {escape(str(component))}</strong>'
+                         f'<br><small>👥 {row.assigned} zugeordnete Mitarbeiter</small>')
+        if pd.isna(row.name):
+            continue
+        name = escape(str(row.name))
+        if not row.critical:
+            if section is None:
+                parts.append("<p><strong>✅ Verantwortliche Mitarbeiter (ausreichend Zeit):</strong></p>")
+                section = "safe"
+            parts.append(f'<div class="responsible-item"><span class="responsible-name">👤 {name}</span>'
+                         f'<span class="safe-status">Sicher • Austritt: {row.days_until_exit} Tage</span></div>')
+        else:
+            if section != "critical":
+                parts.append("<p><strong>🔴 KRITISCH</strong></p>")
+                section = "critical"
+            days = abs(row.days_to_start_hiring)
+            days_msg = (f"START HIRING IN {days} DAYS!" if row.days_to_start_hiring >= 0
+                        else f"HIRE NOW - {days} DAYS OVERDUE!")
+            parts.append(f'<div class="critical-warning">👤 {name}<br>⏰ Austritt in {row.days_until_exit} Tagen<br>'
+                         f'📋 Wissensübergabe benötigt: {row.transfer_months} Monate<br>🚨 {days_msg}</div>')
+    if component is not None:
+        parts.append('</div>')
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def add_percentile_band(fig, band, name):
+    """Overlay the P10-P90 band and the P50 line of a simulation band frame on fig."""
+    fig.add_trace(go.Scatter(x=band['Datum'], y=band['P90'], mode='lines', line=dict(width=0),
+                             showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=band['Datum'], y=band['P10'], mode='lines', line=dict(width=0),
+                             fill='tonexty', fillcolor='rgba(99, 110, 250, 0.2)', name=f'{name} (P10–P90)'))
+    fig.add_trace(go.Scatter(x=band['Datum'], y=band['P50'], mode='lines', line=dict(dash='dash'),
+                             name=f'{name} (P50)'))
 
 def update_priorities_from_tenure():
     """Update all team members' priorities and knowledge transfer status based on their tenure.
     Only update if not manually overridden."""
-    for member in st.session_state.team_data:
-        # Check if this member has manually set values by checking if there's a manual override flag
-        # If not present, set to auto-calculated (backward compatibility)
-        if 'manual_override' not in member:
-            member['manual_override'] = False
-        
-        # Only update if not manually overridden
-        if not member.get('manual_override', False):
-            member['priority'] = calculate_priority_from_tenure(member['start_date'])
-            member['knowledge_transfer_status'] = calculate_kt_status_from_tenure(member['start_date'])
+    # Gespeicherte Klassifizierung folgt dem Systemdatum, nicht dem Stichtag der Ansicht
+    shared_state.refresh("team_data", lambda team: planner.classify_team(team, planner.clock.today()))
 
 def main():
     # Update priorities based on tenure at the start of each run
+    perf.section("tenure_update", rows=len(st.session_state.team_data))
     update_priorities_from_tenure()
     
     # DARK MODE TOGGLE IN SIDEBAR
@@ -344,35 +380,16 @@ def main():
     colors = get_colors()
     st.markdown(f'<p style="text-align: center; font-size: 1.2rem; color: {colors["text_secondary"]};">Automated Resource Analytics</p>', unsafe_allow_html=True)
 
-    
-    # Initialize component map
-    if 'component_map' not in st.session_state:
-        st.session_state.component_map = {}
-    # Anzahl benötigter Personen pro Komponente
-    if 'component_requirements' not in st.session_state:
-        st.session_state.component_requirements = {}
-
-    # Wissensübergabe Zeiten pro Komponente
-    if 'component_transfer_times' not in st.session_state:
-        st.session_state.component_transfer_times = {}
 
     
     # Convert to DataFrame
-    df = pd.DataFrame(st.session_state.team_data)
-    if not df.empty:
-        if 'team' not in df.columns:
-            df['team'] = "Unassigned"
-        df['planned_exit'] = pd.to_datetime(df['planned_exit'])
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        df['dob'] = pd.to_datetime(df['dob'])
-        df['age'] = pd.Timestamp.today().year - df['dob'].dt.year - ((pd.Timestamp.today().month < df['dob'].dt.month) | ((pd.Timestamp.today().month == df['dob'].dt.month) & (pd.Timestamp.today().day < df['dob'].dt.day)))
-        df['days_until_exit'] = (df['planned_exit'] - pd.Timestamp.today()).dt.days
-        df['tenure_days'] = (pd.Timestamp.today() - df['start_date']).dt.days
-    else:
-        # Create empty dataframe with expected columns if no data
-        df = pd.DataFrame(columns=['name', 'role', 'employee_type', 'components', 'start_date', 'planned_exit', 'knowledge_transfer_status', 'priority', 'team', 'dob'])
+    perf.section("prepare_frame", rows=len(st.session_state.team_data))
+    df = shared_state.derived("team_frame", today=as_of)
+    # Kennzahlen aus den laufend gepflegten Zählern, ohne Scan über df
+    kpis = shared_state.get_kpi_counters().team_kpis(as_of)
     
     # KEY METRICS ROW
+    perf.section("metrics", rows=len(df))
     colors = get_colors()
     st.markdown("---")
     st.markdown('<h3 class="section-header">📊 Leistungskennzahlen</h3>', unsafe_allow_html=True)
@@ -380,7 +397,7 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_members = len(df)
+        total_members = kpis['total']
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="margin:0; color: {colors['primary']};">👥</h3>
@@ -390,7 +407,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col2:
-        critical_cases = len(df[df['days_until_exit'] < 180]) if not df.empty else 0
+        critical_cases = kpis['critical']
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="margin:0; color: {colors['info']};">🚨</h3>
@@ -400,7 +417,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col3:
-        completed_kt = len(df[df['knowledge_transfer_status'] == "Completed"]) if not df.empty else 0
+        completed_kt = kpis['completed_kt']
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="margin:0; color: {colors['success']};">✅</h3>
@@ -410,7 +427,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col4:
-        avg_tenure = int(df['tenure_days'].mean() / 365) if not df.empty and 'tenure_days' in df.columns else 0
+        avg_tenure = kpis['avg_tenure_years']
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="margin:0; color: {colors['warning']};">📅</h3>
@@ -419,12 +436,49 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    # ORGANISATION: Kennzahlen eines Teilbaums aus den laufend gepflegten Knotensummen
+    perf.section("organisation", rows=len(tree))
+    st.markdown("---")
+    st.markdown('<h3 class="section-header">🏢 Organisation</h3>', unsafe_allow_html=True)
+    org_rollup = shared_state.get_org_rollup()
+    org_choice = st.selectbox("Organisationseinheit", ["Alle", *tree.order],
+                              format_func=lambda name: name if name == "Alle" else tree.label(name),
+                              help="Filtert Zeitplan, Teamprognose und Eintritte/Austritte auf den Teilbaum der Einheit.")
+    # None: ganze Organisation, sonst Name des Knotens
+    org_node = None if org_choice == "Alle" else org_choice
+    org_kpis = org_rollup.total(as_of) if org_node is None else org_rollup.rollup(org_node, as_of)
+    if org_kpis is not None:
+        org_cards = [
+            ("👥", org_kpis["total"], "Mitarbeiter", colors['primary']),
+            ("🚨", org_kpis["critical"], "Kritische Exits", colors['info']),
+            ("⚖️", f"{org_kpis['fte']:.1f}", "FTE", colors['success']),
+            ("💶", f"{org_kpis['monthly_cost']:,.0f} €", "Monatliche Kosten", colors['warning']),
+        ]
+        for column, (icon, value, caption, color) in zip(st.columns(len(org_cards)), org_cards):
+            with column:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <h3 style="margin:0; color: {color};">{icon}</h3>
+                    <h2 style="margin:0; color: {color};">{value}</h2>
+                    <p style="margin:0; color: {colors['text_secondary']};">{caption}</p>
+                </div>
+                """, unsafe_allow_html=True)
+        st.caption("Wissensübergabe: " + " • ".join(
+            f"{get_kt_status_mapping().get(status, status)}: {count}" for status, count in org_kpis["kt_status"].items()))
+    if org_rollup.unplaced:
+        st.warning(f"⚠️ {org_rollup.unplaced} Mitglieder gehören zu keiner Organisationseinheit.")
+    with st.expander("Alle Organisationseinheiten"):
+        st.dataframe(org_rollup.frame(as_of), use_container_width=True, hide_index=True)
+    # Mitglieder des gewählten Teilbaums für Zeitplan und Prognose
+    org_df = df if org_node is None else df[planner.in_subtree(df, tree, org_node)]
+
     # CRITICAL ALERTS SECTION  
+    perf.section("alerts", rows=len(df))
     st.markdown("---")
     st.markdown('<h3 class="section-header">🔷 Kritische Ressourcenwarnungen</h3>', unsafe_allow_html=True)
     
     if not df.empty:
-        critical_cases = df[df['days_until_exit'] < 180].sort_values('days_until_exit')
+        critical_cases = planner.critical_exits(df)
         
         if not critical_cases.empty:
             for _, person in critical_cases.iterrows():
@@ -468,57 +522,10 @@ def main():
         st.info("ℹ️ Keine Teamdaten verfügbar. Fügen Sie Teammitglieder hinzu, um kritische Warnungen zu sehen.")
     
     # COMPONENT-SPECIFIC CRITICAL ALERTS (Color-coded)
-    if 'component_map' in st.session_state and st.session_state.component_map:
+    perf.section("component_status", rows=len(df) * len(registry))
+    if not registry.empty:
         # Build component status table with required staffing vs active resources
-        component_rows = []
-        today = pd.Timestamp.today().normalize()
-        for component, responsible in st.session_state.component_map.items():
-            # Robust active count:
-            # - Count rows where member.components contains the component OR member.name is in responsible list
-            # normalize responsible to a list
-            responsible_list = responsible if isinstance(responsible, (list, tuple)) else [responsible]
-            # - Member is active when start_date <= today AND (planned_exit is NaT or planned_exit > today)
-            comp_key = component.strip().lower()
-            active_count = 0
-            for _, row in df.iterrows():
-                # normalize fields
-                name = str(row.get('name', '')).strip()
-                comps_field = row.get('components', '') or ''
-                comps = [c.strip().lower() for c in str(comps_field).split(',') if c.strip()]
-
-                # parse dates safely
-                try:
-                    sd = pd.to_datetime(row['start_date'])
-                except Exception:
-                    continue
-                pe = pd.to_datetime(row.get('planned_exit'))
-
-                started = sd <= today
-                not_left = pd.isna(pe) or (pe > today)
-
-                assigned = (comp_key in comps) or (name in responsible_list)
-                if assigned and started and not_left:
-                    active_count += 1
-
-            required = int(st.session_state.component_requirements.get(component, 1))
-
-            if active_count == 0:
-                status = "UNBESETZT"
-            elif active_count < required:
-                # Single resource available -> critical (red)
-                status = "UNTERBESETZT - SINGLE" if active_count == 1 else "UNTERBESETZT"
-            else:
-                status = "OK"
-
-            component_rows.append({
-                "Komponente": component,
-                "Verantwortlich": ", ".join(responsible_list),
-                "Aktive Ressourcen": active_count,
-                "Benötigt": required,
-                "Status": status
-            })
-
-        comp_df = pd.DataFrame(component_rows).sort_values(["Status", "Komponente"], ascending=[True, True])
+        comp_df = shared_state.materialized("staffing", today=as_of)
 
         def status_style(val):
             if val == "UNBESETZT":
@@ -538,10 +545,14 @@ def main():
         st.info("ℹ️ Keine Komponenten zugewiesen.")
 
     # EDIT/DELETE INTERFACE
+    perf.section("management_list", rows=len(st.session_state.team_data))
     st.markdown("---")
     st.markdown('<h3 class="section-header">✏️ Teammitglieder verwalten</h3>', unsafe_allow_html=True)
     
     if not df.empty:
+        # Components each member is responsible for, from the assignment table
+        responsible_by_member = (assignments[assignments['responsible']]
+                                 .groupby('member')['component'].agg(list).to_dict())
         # Display each team member with edit/delete options
         for i, member in enumerate(st.session_state.team_data):
             with st.expander(f"👤 {member['name']} - {member['role']}", expanded=False):
@@ -550,12 +561,7 @@ def main():
                 with col1:
                     st.write(f"**Components:** {member['components']}")
                     st.write(f"**Team:** {member.get('team', 'Unassigned')}")
-                    # derive components where this member is one of the responsibles
-                    assigned_components = []
-                    for comp, responsibles in st.session_state.component_map.items():
-                        resp_list = responsibles if isinstance(responsibles, (list, tuple)) else [responsibles]
-                        if member['name'] in resp_list:
-                            assigned_components.append(comp)
+                    assigned_components = responsible_by_member.get(i)
                     if assigned_components:
                         st.write(f"**Zugewiesene Komponenten:** {', '.join(assigned_components)}")
 
@@ -571,10 +577,12 @@ def main():
                             st.session_state.editing_index = i
                     with col_del:
                         if st.button("🗑️ Delete", key=f"delete_{i}", use_container_width=True):
-                            del st.session_state.team_data[i]
-                            st.rerun()
+                            remaining = st.session_state.team_data[:i] + st.session_state.team_data[i + 1:]
+                            if shared_state.commit({"team_data": remaining}):
+                                st.rerun()
     
     # EDIT FORM (appears when editing)
+    perf.section("edit_form")
     if st.session_state.editing_index is not None:
         st.markdown("---")
         st.markdown('<h3 class="section-header">📝 Teammitglied bearbeiten</h3>', unsafe_allow_html=True)
@@ -588,14 +596,14 @@ def main():
             with col1:
                 edit_name = st.text_input("Vollständiger Name", value=member['name'])
                 edit_role = st.text_input("Rolle/Position", value=member['role'])
-                edit_employee_type = st.selectbox("Mitarbeitertyp", ["Intern", "Lead Cost Employee (LCE)", "Extern"], index=["Intern", "Lead Cost Employee (LCE)", "Extern"].index(member.get('employee_type', 'Intern')))
+                edit_employee_type = st.selectbox("Mitarbeitertyp", EMPLOYEE_TYPES, index=EMPLOYEE_TYPES.index(member.get('employee_type', 'Intern')))
                 edit_components = st.text_area("Wichtige Komponenten/Verantwortlichkeiten", value=member['components'])
             
             with col2:
                 edit_start_date = st.date_input("Startdatum", value=datetime.strptime(member['start_date'], "%Y-%m-%d"))
                 edit_planned_exit = st.date_input("Geplantes Austrittsdatum", value=datetime.strptime(member['planned_exit'], "%Y-%m-%d"))
                 # Display and allow editing of knowledge transfer status
-                calculated_kt_status = calculate_kt_status_from_tenure(member['start_date'])
+                calculated_kt_status = calculate_kt_status_from_tenure(member['start_date'], as_of)
                 kt_mapping = get_kt_status_mapping()
                 kt_options = ["Nicht gestartet", "In Bearbeitung", "Abgeschlossen"]
                 current_kt_value = member.get('knowledge_transfer_status', calculated_kt_status)
@@ -603,14 +611,16 @@ def main():
                 edit_kt_status_display = st.selectbox("Status der Wissensübergabe", kt_options, index=kt_options.index(current_kt_display) if current_kt_display in kt_options else 0)
                 edit_kt_status = kt_mapping.get(edit_kt_status_display, edit_kt_status_display)
                 # Display and allow editing of priority
-                calculated_priority = calculate_priority_from_tenure(member['start_date'])
+                calculated_priority = calculate_priority_from_tenure(member['start_date'], as_of)
                 priority_options = ["Low", "Medium", "High", "Critical"]
                 edit_priority = st.selectbox("Prioritätsstufe", priority_options, index=priority_options.index(member.get('priority', calculated_priority)) if member.get('priority', calculated_priority) in priority_options else 0)
                 # Geburtsdatum hinzufügen / editieren
                 edit_dob = st.date_input("Geburtsdatum", value=datetime.strptime(member.get('dob', '1990-01-01'), "%Y-%m-%d"))
                 # Team auswählen
-                teams = ["CS1", "CS2", "CS3", "CS4", "CS5", "Unassigned"]
-                edit_team = st.selectbox("Team", teams, index=teams.index(member.get('team', 'Unassigned')))
+                current_team = member.get('team', planner.UNASSIGNED)
+                edit_team_options = team_options(current_team)
+                edit_team = st.selectbox("Team", edit_team_options, index=edit_team_options.index(current_team),
+                                         format_func=tree.label)
             
             col_save, col_cancel = st.columns(2)
             with col_save:
@@ -620,11 +630,12 @@ def main():
             
             if save_clicked:
                 # Use manually entered values for priority and knowledge transfer status
-                st.session_state.team_data[edit_index] = {
+                updated_team = list(st.session_state.team_data)
+                updated_team[edit_index] = {
                     "name": edit_name,
                     "role": edit_role,
                     "employee_type": edit_employee_type,
-                    "components": edit_components,
+                    "components": registry.canonical_components(edit_components),
                     "start_date": edit_start_date.strftime("%Y-%m-%d"),
                     "planned_exit": edit_planned_exit.strftime("%Y-%m-%d"),
                     "knowledge_transfer_status": edit_kt_status,
@@ -633,14 +644,16 @@ def main():
                     "team": edit_team,
                     "manual_override": True
                 }
-                st.session_state.editing_index = None
-                st.rerun()
+                if shared_state.commit({"team_data": updated_team}):
+                    st.session_state.editing_index = None
+                    st.rerun()
             
             if cancel_clicked:
                 st.session_state.editing_index = None
                 st.rerun()
     
     # VISUALIZATIONS ROW
+    perf.section("charts", rows=len(df))
     if not df.empty:
         st.markdown("---")
         st.markdown('<h3 class="section-header">📈 Strategische Übersicht</h3>', unsafe_allow_html=True)
@@ -654,7 +667,7 @@ def main():
             # Enhanced Timeline Gantt Chart
             y_axis = "name" if group_by == "Name" else "team"
             colors = get_colors()
-            fig_timeline = px.timeline(df, x_start="start_date", x_end="planned_exit", y=y_axis,
+            fig_timeline = px.timeline(org_df, x_start="start_date", x_end="planned_exit", y=y_axis,
                                      color="priority", 
                                      hover_data=["name", "role"] if y_axis == "team" else ["role"],
                                      title="Zeitplan der Teammitglieder (Farbe nach Priorität)",
@@ -675,13 +688,9 @@ def main():
             st.plotly_chart(fig_timeline, use_container_width=True)
 
             # Altersverteilung nach Gruppen (jetzt links)
-            if 'age' in df.columns and not df['age'].dropna().empty:
-                ages = df['age'].dropna().astype(int)
-                # Age groups up to 65 — remove the separate '65+' label
-                bins = [0, 24, 34, 44, 54, 64]
-                labels = ["<25", "25-34", "35-44", "45-54", "55-64"]
-                age_groups = pd.cut(ages, bins=bins, labels=labels, right=True, include_lowest=True)
-                age_counts = age_groups.value_counts().reindex(labels).fillna(0).astype(int)
+            age_counts = planner.age_distribution(df)
+            if not age_counts.empty:
+                # Age groups up to 65 — no separate '65+' label
                 fig_age = px.bar(
                     x=age_counts.index,
                     y=age_counts.values,
@@ -715,6 +724,7 @@ def main():
             st.plotly_chart(fig_donut, use_container_width=True)
             
     # Prognose: Forecast for next period with selectable granularity
+    perf.section("forecast", rows=len(df))
     st.markdown("---")
     st.markdown("#### 📈 Teamprognose")
     
@@ -727,31 +737,20 @@ def main():
     )
     
     # Set freq based on granularity
-    if granularity == "Monatlich":
-        freq = 'MS'
-        x_title = 'Monat'
-        title_suffix = 'pro Monat'
-    elif granularity == "Quartalsweise":
-        freq = 'QS'
-        x_title = 'Quartal'
-        title_suffix = 'pro Quartal'
-    else:  # Jährlich
-        freq = 'YS'
-        x_title = 'Jahr'
-        title_suffix = 'pro Jahr'
+    freq, x_title, title_suffix = planner.GRANULARITIES[granularity]
     
     # Time period selector with calendar
     col1, col2 = st.columns(2)
     with col1:
         start_date = st.date_input(
             "Startdatum:",
-            value=pd.Timestamp.today().normalize(),
+            value=as_of,
             help="Wählen Sie das Startdatum für die Prognose aus."
         )
     with col2:
         end_date = st.date_input(
             "Enddatum:",
-            value=pd.Timestamp.today().normalize() + pd.DateOffset(years=2),
+            value=as_of + pd.DateOffset(years=2),
             help="Wählen Sie das Enddatum für die Prognose aus."
         )
     
@@ -761,19 +760,12 @@ def main():
         st.stop()
     
     # Calculate periods based on granularity and date range
-    start_month = pd.Timestamp(start_date).replace(day=1)
-    date_range = pd.date_range(start=start_month, end=end_date, freq=freq)
-    periods = len(date_range)
-    
-    forecast_periods = date_range
-    forecast_df = pd.DataFrame({x_title: forecast_periods})
-
-    forecast_df['Aktive Mitglieder'] = forecast_df[x_title].apply(
-        lambda m: ((df['start_date'] <= m) & ((df['planned_exit'].isna()) | (df['planned_exit'] > m))).sum()
-    )
-    forecast_df['Geplante Austritte'] = forecast_df[x_title].apply(
-        lambda m: (df['planned_exit'].dt.to_period(freq[0].upper()) == m.to_period(freq[0].upper())).sum()
-    )
+    if org_node is None:
+        forecast_df = shared_state.materialized("headcount", latest=True, today=as_of, headcount_range=(start_date, end_date, freq, x_title))
+    else:
+        forecast_df = shared_state.derived("subtree_headcount", today=as_of, org_node=org_node,
+                                           headcount_range=(start_date, end_date, freq, x_title))
+    perf.rows(len(df) + len(forecast_df))
 
     fig_forecast = px.line(
         forecast_df,
@@ -783,20 +775,25 @@ def main():
         title=f'Teamprognose: Aktive Mitglieder und Austritte {title_suffix}'
     )
 
+    simulated = None
+    if simulation:
+        perf.section("attrition_simulation", rows=len(df) * simulation[0])
+        simulated = shared_state.derived("attrition_headcount", today=as_of,
+                                         headcount_range=(start_date, end_date, freq, x_title),
+                                         simulation=simulation)
+        add_percentile_band(fig_forecast, planner.band_frame(simulated, "headcount"), "Simulierte Mitglieder")
+
     # Add range slider for better navigation when many periods
     fig_forecast.update_xaxes(rangeslider_visible=True)
 
     st.plotly_chart(fig_forecast, use_container_width=True)
 
+    if simulated is not None and simulated["components"]:
+        st.markdown(f"##### 🎲 Besetzungsrisiko je Komponente ({simulated['runs']} Durchläufe)")
+        st.dataframe(planner.coverage_risk(simulated), use_container_width=True, hide_index=True)
+
     # Summary chart: Entries and Exits per Year
-    years = pd.date_range(start=start_date, end=end_date, freq='YS').year
-    summary_data = []
-    for year in years:
-        entries = ((df['start_date'].dt.year == year)).sum()
-        exits = ((df['planned_exit'].dt.year == year)).sum()
-        summary_data.append({'Jahr': year, 'Eintritte': entries, 'Austritte': exits})
-    
-    summary_df = pd.DataFrame(summary_data)
+    summary_df = planner.yearly_entries_exits(org_df, start_date, end_date)
     
     if not summary_df.empty:
         fig_summary = px.bar(
@@ -811,8 +808,8 @@ def main():
         st.plotly_chart(fig_summary, use_container_width=True)
 
     # Kritische Alerts Tabelle
-    critical_df = df[df['days_until_exit'] < 180][['name', 'role', 'components', 'days_until_exit', 'priority']]
-    critical_df = critical_df.sort_values('days_until_exit')
+    perf.section("critical_exits_birthdays", rows=len(df))
+    critical_df = planner.critical_exits(df)[['name', 'role', 'components', 'days_until_exit', 'priority']]
 
     st.markdown("#### 🚨 Kritische Austritte (< 180 Tage)")
     if not critical_df.empty:
@@ -820,10 +817,10 @@ def main():
     else:
         st.success("✅ Keine kritischen Austritte in den nächsten 6 Monaten.") # Langere Augenblick , weil Rekrutierunngsphase (ca.3 Monate) laenger braucht.
 
-    # Geburtstagsliste für den aktuellen Monat
-    current_month = pd.Timestamp.today().month
-    birthday_df = df[df['dob'].dt.month == current_month][['name', 'role', 'dob', 'age']]
-    birthday_df = birthday_df.sort_values('dob')
+    # Geburtstagsliste für den aktuellen Monat (aus dem Ereignisindex, Alter am Geburtstag)
+    events = shared_state.derived("event_index")
+    month_start = as_of.replace(day=1)
+    birthday_df = events.birthdays_between(month_start, month_start + pd.offsets.MonthBegin(1))[['name', 'role', 'dob', 'age']]
 
     st.markdown("#### 🎂 Geburtstage diesen Monat")
     if not birthday_df.empty:
@@ -831,45 +828,49 @@ def main():
     else:
         st.info("ℹ️ Keine Geburtstage in diesem Monat.")
 
+    # Anstehende Ereignisse: Eintritte, Austritte, Recruiting-Starts und Geburtstage der nächsten N Tage
+    perf.section("upcoming_events", rows=len(events))
+    st.markdown("#### 📅 Anstehende Ereignisse")
+    horizon_days = st.slider("Zeitraum (Tage ab Stichtag):", min_value=7, max_value=365, value=30, step=7,
+                             key="upcoming_events_days")
+    upcoming = events.upcoming(as_of, horizon_days)
+    perf.rows(len(upcoming))
+    if not upcoming.empty:
+        st.dataframe(
+            upcoming.rename(columns={"date": "Datum", "type": "Ereignis", "name": "Name", "component": "Komponente"})
+            [["Datum", "Ereignis", "Name", "Komponente"]],
+            use_container_width=True, hide_index=True,
+        )
+    else:
+        st.info(f"ℹ️ Keine Ereignisse in den nächsten {horizon_days} Tagen.")
+    st.download_button(
+        "📆 Als iCalendar exportieren",
+        data=lambda: planner.to_ical(upcoming),
+        file_name=f"ereignisse_{as_of:%Y%m%d}_{horizon_days}d.ics",
+        mime="text/calendar",
+        disabled=upcoming.empty,
+    )
+
     # DISPLAY COMPONENT RESPONSIBILITIES TABLE
-    if 'component_map' in st.session_state and st.session_state.component_map:
+    perf.section("transfer_alerts", rows=len(registry))
+    if not registry.empty:
         st.markdown("---")
         st.markdown("#### 🧪 Komponentenübersicht (Kurz)")
         # create a compact view: Komponente, Verantwortlich, Benötigt
-        comp_list = []
-        transfer_alerts = []
-        for comp, resp in st.session_state.component_map.items():
-            needed = int(st.session_state.component_requirements.get(comp, 1))
-            transfer_months = int(st.session_state.component_transfer_times.get(comp, 6))
-            resp_list = resp if isinstance(resp, (list, tuple)) else [resp]
-            comp_list.append({"Komponente": comp, "Verantwortlich": ", ".join(resp_list), "Benötigt": needed, "WU-Zeit (Monate)": transfer_months})
-            
-            # Check for transfer alerts
-            for person in resp_list:
-                person_data = df[df['name'] == person]
-                if not person_data.empty:
-                    days_left = person_data['days_until_exit'].iloc[0]
-                    if days_left < transfer_months * 30:
-                        transfer_alerts.append({
-                            "Komponente": comp,
-                            "Verantwortlich": person,
-                            "Tage bis Austritt": days_left,
-                            "Benötigte WU-Zeit (Tage)": transfer_months * 30
-                        })
-        
-        short_comp_df = pd.DataFrame(comp_list)
+        short_comp_df = planner.component_summary(registry)
         st.dataframe(short_comp_df, use_container_width=True)
         
         # Transfer Alerts
-        if transfer_alerts:
+        alert_df = shared_state.materialized("transfer_alerts", today=as_of)
+        if not alert_df.empty:
             st.markdown("#### 🚨 Wissensübergabe-Alerts")
-            alert_df = pd.DataFrame(transfer_alerts)
             st.dataframe(alert_df, use_container_width=True)
             st.warning("⚠️ Diese Personen verlassen das Unternehmen, bevor die Wissensübergabe abgeschlossen werden kann. Planen Sie Einstellungen oder Ersatz!")
     else:
         st.info("ℹ️ Noch keine Komponenten hinzugefügt.")
 
     # PRODUKTEN ÜBERSICHT SECTION - CATCHY AND ILLUSTRATED
+    perf.section("product_overview", rows=len(registry))
     st.markdown("---")
     st.markdown("""
     <style>
@@ -953,97 +954,21 @@ def main():
     </style>
     """, unsafe_allow_html=True)
     
-    if 'component_map' in st.session_state and st.session_state.component_map:
-        st.markdown('<div class="product-section">', unsafe_allow_html=True)
-        st.markdown('<div class="product-title">🎯 Produkten Übersicht 🚀</div>', unsafe_allow_html=True)
-        
-        # Group components by product
-        products = {}
-        for component, responsible in st.session_state.component_map.items():
-            product = st.session_state.component_products.get(component, "Unknown")
-            if product not in products:
-                products[product] = []
-            products[product].append((component, responsible))
-        
-        # Display each product
-        for product in sorted(products.keys()):
-            st.markdown('<div class="product-card">', unsafe_allow_html=True)
-            
-            # Product header with emoji
-            product_emojis = {"CG": "🔧", "iUZ": "⚙️", "iBS": "💼"}
-            emoji = product_emojis.get(product, "📦")
-            st.markdown(f'<div class="product-card-header">{emoji} Produkt: {product}</div>', unsafe_allow_html=True)
-            
-            # Components under this product
-            st.markdown(f"**Komponenten ({len(products[product])}):**")
-            for component, responsible in products[product]:
-                responsible_list = responsible if isinstance(responsible, (list, tuple)) else [responsible]
-                st.markdown(f'<div class="component-item"><strong>📦 {component}</strong>', unsafe_allow_html=True)
-                
-                # Get responsible persons data
-                transfer_time_months = int(st.session_state.component_transfer_times.get(component, 6))
-                transfer_time_days = transfer_time_months * 30
-                today = pd.Timestamp.today().normalize()
-                
-                # Check each responsible person
-                critical_people = []
-                safe_people = []
-                
-                for person_name in responsible_list:
-                    person_data = df[df['name'] == person_name]
-                    if not person_data.empty:
-                        days_until_exit = person_data['days_until_exit'].iloc[0]
-                        kt_status = person_data['knowledge_transfer_status'].iloc[0]
-                        
-                        # Calculate days to start hiring
-                        days_to_start_hiring = days_until_exit - transfer_time_days
-                        
-                        if days_until_exit < transfer_time_days:
-                            # Critical - not enough time for knowledge transfer
-                            critical_people.append({
-                                'name': person_name,
-                                'days_until_exit': days_until_exit,
-                                'days_to_start_hiring': days_to_start_hiring,
-                                'kt_status': kt_status
-                            })
-                        else:
-                            safe_people.append({
-                                'name': person_name,
-                                'days_until_exit': days_until_exit,
-                                'days_to_start_hiring': days_to_start_hiring,
-                                'kt_status': kt_status
-                            })
-                
-                # Display safe people first
-                if safe_people:
-                    st.markdown("**✅ Verantwortliche Mitarbeiter (ausreichend Zeit):**")
-                    for person in safe_people:
-                        st.markdown(f"""
-                        <div class="responsible-item">
-                            <span class="responsible-name">👤 {person['name']}</span>
-                            <span class="safe-status">Sicher • Austritt: {person['days_until_exit']} Tage</span>
-                        </div>
-                        """, unsafe_allow_html=True)
-                
-                # Display critical people in red
-                if critical_people:
-                    st.markdown("**🔴 KRITISCH**")
-                    for person in critical_people:
-                        days_msg = f"START HIRING IN {abs(person['days_to_start_hiring'])} DAYS!" if person['days_to_start_hiring'] >= 0 else f"HIRE NOW - {abs(person['days_to_start_hiring'])} DAYS OVERDUE!"
-                        st.markdown(f"""
-                        <div class="critical-warning">
-                            👤 {person['name']}<br>
-                            ⏰ Austritt in {person['days_until_exit']} Tagen<br>
-                            📋 Wissensübergabe benötigt: {transfer_time_months} Monate<br>
-                            🚨 {days_msg}
-                        </div>
-                        """, unsafe_allow_html=True)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+    if not registry.empty:
+        st.markdown('<div class="product-section"><div class="product-title">🎯 Produkten Übersicht 🚀</div></div>',
+                    unsafe_allow_html=True)
+
+        # Product -> component -> responsible person with exit status, joined once per data version
+        overview = shared_state.derived("product_overview", today=as_of)
+        product_emojis = {"CG": "🔧", "iUZ": "⚙️", "iBS": "💼"}
+        for product, rows in overview.groupby("product", sort=False):
+            n_critical = int(rows["critical"].sum())
+            label = (f"{product_emojis.get(product, '📦')} Produkt: {product} · {rows['component'].nunique()} Komponenten"
+                     + (f" · 🔴 {n_critical} kritisch" if n_critical else ""))
+            # Only expanded products are rendered
+            product_box = st.expander(label, key=f"product_overview_{product}", on_change="rerun")
+            if product_box.open:
+                product_box.markdown(product_card_html(rows), unsafe_allow_html=True)
     else:
         st.markdown("""
         <div class="product-section">
@@ -1052,7 +977,56 @@ def main():
         </div>
         """, unsafe_allow_html=True)
 
+    # EINSTELLUNGSPLAN: Recruiting-Starts aller gefährdeten Komponenten unter Monatskapazität
+    perf.section("hiring_plan", rows=len(df))
+    if not registry.empty:
+        st.markdown("---")
+        st.markdown("#### 🧑‍💼 Einstellungsplan")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            lead_days = st.number_input("Rekrutierungsdauer (Tage)", min_value=0, max_value=365,
+                                        value=planner.hiring.DEFAULT_LEAD_DAYS, step=15)
+        with col2:
+            hiring_capacity = st.number_input("Einstellungen pro Monat", min_value=1, max_value=50,
+                                              value=planner.hiring.DEFAULT_MONTHLY_CAPACITY)
+        with col3:
+            hiring_horizon = st.slider("Horizont (Monate)", 6, 60, planner.hiring.DEFAULT_HORIZON_MONTHS, 6)
+
+        hiring_df = shared_state.derived("hiring_plan", today=as_of,
+                                         hiring_params=(int(lead_days), int(hiring_capacity), int(hiring_horizon)))
+        perf.rows(len(df) + len(hiring_df))
+        if hiring_df.empty:
+            st.success("✅ Keine Komponente fällt im Horizont unter die benötigte Besetzung.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Requisitionen", len(hiring_df))
+            col2.metric("Überfällig", int((hiring_df['Status'] == "Überfällig").sum()))
+            col3.metric("Abgedeckte Komponenten", int(hiring_df['Anzahl Komponenten'].sum()))
+            st.dataframe(hiring_df, use_container_width=True, hide_index=True, column_config={
+                col: st.column_config.DateColumn(col, format="DD.MM.YYYY")
+                for col in ["Bedarf ab", "Spätester Recruiting-Start", "Geplanter Start"]
+            })
+
+            # Timeline: Recruiting und Wissensübergabe ab geplantem Start
+            timeline_df = hiring_df.dropna(subset=['Geplanter Start']).assign(
+                Task=lambda d: "#" + d['Requisition'].astype(str) + " " + d['Komponenten'],
+                Ende=lambda d: d['Geplanter Start'] + pd.to_timedelta(lead_days + d['WU-Zeit (Monate)'] * 30, unit='D'))
+            fig_hiring = px.timeline(
+                timeline_df,
+                x_start='Geplanter Start',
+                x_end='Ende',
+                y='Task',
+                color='Status',
+                color_discrete_map={"Geplant": "#52c41a", "Verspätet": "#faad14", "Überfällig": "#ff4d4f"},
+                hover_data=['Ersetzt', 'Bedarf ab', 'Spätester Recruiting-Start', 'Puffer (Tage)'],
+                title="Recruiting und Wissensübergabe je Requisition"
+            )
+            fig_hiring.update_yaxes(autorange="reversed", title=None)
+            fig_hiring.update_layout(height=max(300, 28 * len(timeline_df)))
+            st.plotly_chart(fig_hiring, use_container_width=True)
+
     # DATA TABLE WITH FILTERS
+    perf.section("filters", rows=len(df))
     if not df.empty:
         st.markdown("---")
         st.markdown('<h3 class="section-header">👥 Detaillierte Teamübersicht</h3>', unsafe_allow_html=True)
@@ -1077,18 +1051,12 @@ def main():
                                   max_value=int(df['days_until_exit'].max()) + 100 if not df.empty else 1000,
                                   value=(0, 1000))
         with col5:
-            team_options = sorted(df['team'].unique())
-            team_filter = st.multiselect("Team", options=team_options, default=team_options)
+            table_node = st.selectbox("Organisationseinheit", ["Alle", *tree.order], key="table_org_node",
+                                      format_func=lambda name: name if name == "Alle" else tree.label(name))
+            team_filter = df['team'].unique() if table_node == "Alle" else planner.subtree_teams(df, tree, table_node)
         
         # filters
-        filtered_df = df[
-            (df['knowledge_transfer_status'].isin(status_filter)) &
-            (df['priority'].isin(priority_filter)) &
-            (df['role'].isin(role_filter)) &
-            (df['days_until_exit'] >= days_filter[0]) &
-            (df['days_until_exit'] <= days_filter[1]) &
-            (df['team'].isin(team_filter))
-        ]
+        filtered_df = planner.filter_team(df, status_filter, priority_filter, role_filter, days_filter, team_filter)
         
         # Display filtered table
         display_df = filtered_df[['name', 'role', 'employee_type', 'team', 'components', 'priority', 'days_until_exit', 'knowledge_transfer_status']].copy()
@@ -1108,36 +1076,39 @@ def main():
         st.dataframe(styled_df, use_container_width=True)
     
     # ADD NEW MEMBER FORM IN SIDEBAR
+    perf.section("sidebar_forms")
     colors = get_colors()
     st.sidebar.markdown(f'<h3 style="color: {colors["primary"]};">➕ Teammitglied hinzufügen</h3>', unsafe_allow_html=True)
     
     with st.sidebar.form("add_member", clear_on_submit=True):
         name = st.text_input("Vollständiger Name")
         role = st.text_input("Rolle/Position")
-        employee_type = st.selectbox("Mitarbeitertyp", ["Intern", "Lead Cost Employee (LCE)", "Extern"])
+        employee_type = st.selectbox("Mitarbeitertyp", EMPLOYEE_TYPES)
         components = st.text_area("Wichtige Komponenten/Verantwortlichkeiten")
         dob = st.date_input("Geburtsdatum", value=datetime(1990, 1, 1))
         
         col1, col2 = st.columns(2)
         with col1:
-            start_date = st.date_input("Startdatum", value=datetime.now())
+            start_date = st.date_input("Startdatum", value=as_of)
         with col2:
-            planned_exit = st.date_input("Planned Exit", value=datetime.now() + timedelta(days=365))
+            planned_exit = st.date_input("Planned Exit", value=as_of + timedelta(days=365))
         
         col3, col4 = st.columns(2)
         with col3:
-            calculated_kt_status = calculate_kt_status_from_tenure(start_date.strftime("%Y-%m-%d"))
+            calculated_kt_status = calculate_kt_status_from_tenure(start_date.strftime("%Y-%m-%d"), as_of)
             kt_mapping = get_kt_status_mapping()
             kt_options = ["Nicht gestartet", "In Bearbeitung", "Abgeschlossen"]
             kt_status_display = kt_mapping.get(calculated_kt_status, calculated_kt_status)
             kt_status_display = st.selectbox("Status der Wissensübergabe", kt_options, index=kt_options.index(kt_status_display) if kt_status_display in kt_options else 0, key="add_kt_status")
             kt_status = kt_mapping.get(kt_status_display, kt_status_display)
         with col4:
-            calculated_priority = calculate_priority_from_tenure(start_date.strftime("%Y-%m-%d"))
+            calculated_priority = calculate_priority_from_tenure(start_date.strftime("%Y-%m-%d"), as_of)
             priority_options = ["Low", "Medium", "High", "Critical"]
             priority = st.selectbox("Prioritätsstufe", priority_options, index=priority_options.index(calculated_priority) if calculated_priority in priority_options else 0, key="add_priority")
         # Team Auswahl
-        team = st.selectbox("Team", ["CS1", "CS2", "CS3", "CS4", "CS5", "Unassigned"], index=5)
+        add_team_options = team_options(planner.UNASSIGNED)
+        team = st.selectbox("Team", add_team_options, index=add_team_options.index(planner.UNASSIGNED),
+                            format_func=tree.label)
         
         submitted = st.form_submit_button("💾 Teammitglied hinzufügen", use_container_width=True)
         if submitted:
@@ -1147,7 +1118,7 @@ def main():
                     "name": name,
                     "role": role,
                     "employee_type": employee_type,
-                    "components": components,
+                    "components": registry.canonical_components(components),
                     "start_date": start_date.strftime("%Y-%m-%d"),
                     "planned_exit": planned_exit.strftime("%Y-%m-%d"),
                     "knowledge_transfer_status": kt_status,
@@ -1156,18 +1127,11 @@ def main():
                     "team": team,
                     "manual_override": True
                 }
-                st.session_state.team_data.append(new_member)
-                st.rerun()
+                if shared_state.commit({"team_data": st.session_state.team_data + [new_member]}):
+                    st.rerun()
             else:
                 st.sidebar.error("Please fill at least Name and Rolle")
     # COMPONENT ASSIGNMENT FORM IN SIDEBAR
-    if 'component_map' not in st.session_state:
-        st.session_state.component_map = {}
-    
-    # Initialize product assignments for components
-    if 'component_products' not in st.session_state:
-        st.session_state.component_products = {}
-
     colors = get_colors()
     st.sidebar.markdown(f'#### 🧪 Neue Komponente hinzufügen')
     with st.sidebar.form("add_component_form", clear_on_submit=True):
@@ -1180,15 +1144,52 @@ def main():
 
         if component_submitted:
             if component_name and responsible_persons:
-                st.session_state.component_map[component_name] = responsible_persons
-                st.session_state.component_products[component_name] = product_name
-                st.session_state.component_requirements[component_name] = int(required_count)
-                st.session_state.component_transfer_times[component_name] = int(transfer_time)
-                st.sidebar.success(f"✅ '{component_name}' ({product_name}) wurde {', '.join(responsible_persons)} zugewiesen.")
+                saved = shared_state.commit({
+                    "components": upsert_component(st.session_state.components, component_name, product_name,
+                                                   responsible_persons, required_count, transfer_time)
+                })
+                if saved:
+                    st.sidebar.success(f"✅ '{component_name}' ({product_name}) wurde {', '.join(responsible_persons)} zugewiesen.")
             else:
                 st.sidebar.error("Bitte geben Sie einen Namen und wählen Sie eine verantwortliche Person aus.")
 
+    # ORG UNIT FORMS IN SIDEBAR
+    st.sidebar.markdown('#### 🏢 Organisationseinheit hinzufügen')
+    with st.sidebar.form("add_org_unit_form", clear_on_submit=True):
+        unit_name = st.text_input("Name der Einheit")
+        unit_kind = st.selectbox("Art", planner.KINDS, index=len(planner.KINDS) - 1)
+        unit_parent = st.selectbox("Übergeordnete Einheit", ["(keine)", *tree.order],
+                                   format_func=lambda name: name if name == "(keine)" else tree.label(name))
+        unit_submitted = st.form_submit_button("💾 Einheit speichern", use_container_width=True)
+
+        if unit_submitted:
+            unit_name = unit_name.strip()
+            if not unit_name:
+                st.sidebar.error("Bitte geben Sie einen Namen ein.")
+            elif unit_name in tree:
+                st.sidebar.error(f"Die Einheit '{unit_name}' existiert bereits.")
+            else:
+                new_unit = {"name": unit_name, "parent": None if unit_parent == "(keine)" else unit_parent,
+                            "kind": unit_kind}
+                if shared_state.commit({"org_units": st.session_state.org_units + [new_unit]}):
+                    st.rerun()
+
+    removable_units = [name for name in tree.order if tree.parent[name] is not None and name != planner.UNASSIGNED]
+    if removable_units:
+        with st.sidebar.form("remove_org_unit_form"):
+            removed_unit = st.selectbox("Einheit entfernen", removable_units, format_func=tree.label,
+                                        help="Untereinheiten und Mitglieder wandern zur übergeordneten Einheit.")
+            if st.form_submit_button("🗑️ Einheit entfernen", use_container_width=True):
+                new_parent = tree.parent[removed_unit]
+                units = [{**unit, "parent": new_parent} if unit.get("parent") == removed_unit else unit
+                         for unit in st.session_state.org_units if unit.get("name") != removed_unit]
+                members = [{**member, "team": new_parent} if member.get("team") == removed_unit else member
+                           for member in st.session_state.team_data]
+                if shared_state.commit({"org_units": units, "team_data": members}):
+                    st.rerun()
+
     # SIDEBAR ACTIONS
+    perf.section("sidebar_actions")
     st.sidebar.markdown("---")
     colors = get_colors()
     st.sidebar.markdown(f'<h3 style="color: {colors["primary"]};">🛠️ Aktionen</h3>', unsafe_allow_html=True) 
@@ -1202,21 +1203,23 @@ def main():
             st.sidebar.error("Keine Daten zum Exportieren")
     
     if st.sidebar.button("🗑️ Alle Daten löschen", use_container_width=True):
-        st.session_state.team_data = []
-        st.session_state.editing_index = None
-        st.rerun()
+        if shared_state.commit({"team_data": []}):
+            st.session_state.editing_index = None
+            st.rerun()
     
     # SIDEBAR STATS
+    perf.section("sidebar_stats", rows=len(df))
     st.sidebar.markdown("---")
     colors = get_colors()
     st.sidebar.markdown(f'<h3 style="color: {colors["primary"]};">📈 Schnellstatistiken</h3>', unsafe_allow_html=True)
     
     if not df.empty:
-        st.sidebar.metric("Gesamtes Team", len(df))
-        st.sidebar.metric("Gefährdet", len(df[df['days_until_exit'] < 180]))
-        st.sidebar.metric("Durchschnittliche Austrittstage", f"{int(df['days_until_exit'].mean())}d")
+        st.sidebar.metric("Gesamtes Team", kpis['total'])
+        st.sidebar.metric("Gefährdet", kpis['critical'])
+        st.sidebar.metric("Durchschnittliche Austrittstage", f"{kpis['avg_days_until_exit']}d")
     else:
         st.sidebar.write("Keine Daten verfügbar")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    instrumentation.end_rerun(perf)
\ No newline at end of file
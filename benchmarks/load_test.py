@@ -0,0 +1,129 @@
+"""
+Lasttest für die lokale JSON-API (api.py).
+
+Schickt mit mehreren parallelen Clients Anfragen an alle Endpunkte und misst
+Latenz (p50/p95/max) und Durchsatz, getrennt nach
+- kalt: erste Anfrage pro Endpunkt (Berechnung im Rechenkern),
+- voll: Antwort aus dem Antwort-Cache (gzip),
+- 304: bedingte Anfrage mit If-None-Match.
+Ohne --url wird eine Instanz mit synthetischer Organisation im selben Prozess
+auf einem freien Port gestartet.
+
+Beispiele:
+    python benchmarks/load_test.py --size 10k
+    python benchmarks/load_test.py --url http://127.0.0.1:8502 --requests 2000 --clients 16
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TARGETS = [
+    "/api/members",
+    "/api/staffing",
+    "/api/alerts",
+    "/api/events?days=90",
+    "/api/forecast/headcount",
+    "/api/forecast/headcount?granularity=quarter",
+    "/api/forecast/costs",
+    "/api/allocations/matrix",
+]
+
+
+def fetch(base_url, target, etag=None):
+    """(status, ETag, response bytes, seconds) of one GET."""
+    headers = {"Accept-Encoding": "gzip"}
+    if etag:
+        headers["If-None-Match"] = etag
+    request = urllib.request.Request(base_url + target, headers=headers)
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            body = response.read()
+            status, tag = response.status, response.headers.get("ETag")
+    except urllib.error.HTTPError as exc:
+        body, status, tag = exc.read(), exc.code, exc.headers.get("ETag")
+    return status, tag, len(body), time.perf_counter() - t0
+
+
+def _summary(mode, target, results, wall):
+    latencies = sorted(r[3] * 1000 for r in results)
+    statuses = sorted({r[0] for r in results})
+    return {
+        "mode": mode,
+        "target": target,
+        "requests": len(results),
+        "status": "/".join(map(str, statuses)),
+        "kb": round(statistics.mean(r[2] for r in results) / 1024, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        "max_ms": round(latencies[-1], 2),
+        "req_s": round(len(results) / wall, 1),
+    }
+
+
+def run(base_url, requests_per_target, clients, targets=TARGETS):
+    rows = []
+    etags = {}
+    for target in targets:
+        status, etag, size, seconds = fetch(base_url, target)
+        etags[target] = etag
+        rows.append(_summary("kalt", target, [(status, etag, size, seconds)], seconds))
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for mode in ("voll", "304"):
+            for target in targets:
+                etag = etags[target] if mode == "304" else None
+                t0 = time.perf_counter()
+                results = list(pool.map(lambda _: fetch(base_url, target, etag), range(requests_per_target)))
+                rows.append(_summary(mode, target, results, time.perf_counter() - t0))
+    return rows
+
+
+def _local_server(size):
+    import api
+    from synthetic_org import SIZES
+
+    store = api.load_store(synthetic=str(SIZES.get(size, size)))
+    server = api.make_server(api.PlannerAPI(store), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest der lokalen JSON-API")
+    parser.add_argument("--url", help="Laufende Instanz, z.B. http://127.0.0.1:8502 (sonst lokal gestartet)")
+    parser.add_argument("--size", default="1k", help="Größe der synthetischen Organisation der lokalen Instanz")
+    parser.add_argument("--requests", type=int, default=200, help="Anfragen pro Endpunkt und Modus")
+    parser.add_argument("--clients", type=int, default=8, help="Parallele Clients")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    server = None
+    base_url = args.url.rstrip("/") if args.url else None
+    if base_url is None:
+        server, base_url = _local_server(args.size)
+    try:
+        import pandas as pd
+        rows = run(base_url, args.requests, args.clients)
+        with pd.option_context("display.max_rows", None, "display.width", 160):
+            print(pd.DataFrame(rows).to_string(index=False))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
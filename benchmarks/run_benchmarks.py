@@ -0,0 +1,287 @@
+"""
+Headless Benchmark-Suite für app.py und die Seiten.
+
+Treibt jede Seite mit streamlit.testing (AppTest) über synthetische Organisationen
+(benchmarks/synthetic_org.py) und misst Rerun-Latenz (kalt/warm), Peak-Speicher
+(tracemalloc) und die Section-Zeiten aus instrumentation.py. Mit --compute werden
+zusätzlich die Funktionen des planner-Pakets direkt, ohne Streamlit, gemessen.
+Vor jedem Lauf prüft check_edge_cases() die Randfälle ohne Allokationslauf
+(keine, nur 0 % oder nur Teilmonate).
+
+Beispiele:
+    python benchmarks/run_benchmarks.py --sizes 1k
+    python benchmarks/run_benchmarks.py --sizes 1k 10k --save bench.json
+    python benchmarks/run_benchmarks.py --sizes 100k --pages --compute
+    python benchmarks/run_benchmarks.py --sizes 1k --baseline bench.json --tolerance 0.25
+
+Mit --baseline endet das Skript mit Exit-Code 1, wenn ein Ziel im warmen Median
+um mehr als die Toleranz langsamer geworden ist.
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_org import SIZES, generate_org  # noqa: E402
+
+PAGES = {
+    "app": "app.py",
+    "Finanzielle_Verwaltung": os.path.join("pages", "Finanzielle_Verwaltung.py"),
+    "Projekt_Allocation": os.path.join("pages", "Projekt_Allocation.py"),
+    "Szenarien": os.path.join("pages", "Szenarien.py"),
+}
+
+
+def _quiet():
+    # Deprecation- und ScriptRunContext-Hinweise würden die Ausgabe überfluten
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.WARNING)
+
+
+def _new_app(script, org, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=timeout)
+    for key, value in copy.deepcopy(org).items():
+        at.session_state[key] = value
+    return at
+
+
+def _reset_shared_store():
+    # Die Seiten teilen ein prozessweites Datenmodell; jede Seite startet leer
+    import shared_state
+
+    shared_state.reset()
+
+
+def _run_once(at):
+    t0 = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    sections = at.session_state["_perf_last"]["sections"] if "_perf_last" in at.session_state else []
+    return elapsed, sections
+
+
+def bench_page(page, org, reruns=3, timeout=600):
+    """Cold run, `reruns` warm reruns and one traced run for peak memory."""
+    at = _new_app(PAGES[page], org, timeout)
+    cold_ms, _ = _run_once(at)
+
+    warm = []
+    section_samples = {}
+    for _ in range(reruns):
+        elapsed, sections = _run_once(at)
+        warm.append(elapsed)
+        for section in sections:
+            section_samples.setdefault(section["name"], []).append(section["ms"])
+
+    tracemalloc.start()
+    _run_once(at)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "target": page,
+        "kind": "page",
+        "cold_ms": round(cold_ms, 1),
+        "warm_median_ms": round(statistics.median(warm), 1),
+        "warm_max_ms": round(max(warm), 1),
+        "peak_mib": round(peak / 1024 / 1024, 2),
+        "sections": {name: round(statistics.median(v), 2) for name, v in section_samples.items()},
+    }
+
+
+def _compute_targets(org):
+    """planner calls of the three pages on one organisation, keyed by target name."""
+    import pandas as pd
+
+    import planner
+
+    today = pd.Timestamp.today().normalize()
+    df = planner.build_team_frame(org["team_data"], today)
+    alloc_df = planner.allocation_frame(org["project_allocations"])
+    runs = planner.AllocationRuns(alloc_df)
+    costs = planner.employee_costs(df, org["budget_data"], org["employee_settings"])
+    registry = planner.ComponentRegistry(org["components"])
+    horizon = today + pd.DateOffset(years=3)
+    intervals = planner.cost_intervals(df, org["budget_data"], org["employee_settings"], org["rate_history"])
+    monthly_costs = planner.member_costs(df, costs, org["budget_data"], today, horizon, intervals=intervals)
+    rollup = planner.OrgRollup(org["org_units"], org["team_data"], org["budget_data"], org["employee_settings"],
+                               org["rate_history"])
+    return {
+        "build_team_frame": lambda: planner.build_team_frame(org["team_data"], today),
+        "component_staffing": lambda: planner.component_staffing(df, registry, today),
+        "transfer_alerts": lambda: planner.transfer_alerts(df, registry),
+        "headcount_forecast": lambda: planner.headcount_forecast(df, today, horizon),
+        "employee_costs": lambda: planner.employee_costs(df, org["budget_data"], org["employee_settings"]),
+        "cost_forecast": lambda: planner.cost_forecast(df, costs, org["budget_data"], today, horizon),
+        "cost_intervals": lambda: planner.cost_intervals(
+            df, org["budget_data"], org["employee_settings"], org["rate_history"]),
+        "cost_forecast_10y": lambda: planner.cost_forecast(
+            df, costs, org["budget_data"], today, today + pd.DateOffset(years=10), "M", intervals=intervals),
+        "member_costs": lambda: planner.member_costs(df, costs, org["budget_data"], today, horizon,
+                                                     intervals=intervals),
+        "project_costs": lambda: planner.project_costs(alloc_df, df, monthly_costs, today, horizon),
+        "cost_cube": lambda: planner.CostCube(df, costs, org["budget_data"], alloc_df, today, horizon,
+                                              intervals=intervals),
+        "cost_cube_roles": lambda: planner.CostCube(
+            df, costs, org["budget_data"], alloc_df, today, horizon, intervals=intervals,
+            dimensions=planner.DIMENSIONS + planner.cube.OPTIONAL_DIMENSIONS),
+        "org_rollup": lambda: planner.OrgRollup(org["org_units"], org["team_data"], org["budget_data"],
+                                                org["employee_settings"], org["rate_history"]),
+        "org_rollup_all_nodes": lambda: rollup.frame(today),
+        "subtree_headcount": lambda: planner.headcount_forecast(
+            df[planner.in_subtree(df, rollup.tree, rollup.tree.roots[0])], today, horizon),
+        "allocation_runs": lambda: planner.AllocationRuns(alloc_df),
+        "monthly_breakdown": lambda: planner.monthly_breakdown(runs, df["name"], today, horizon),
+        "daily_breakdown": lambda: planner.monthly_breakdown(runs, df["name"][:100], today, horizon, "D"),
+        "attrition_simulation": lambda: planner.simulate(
+            df, today, pd.date_range(today, horizon, freq="MS"), runs=1000, seed=0,
+            weights=costs["monthly_cost"], registry=registry),
+    }
+
+
+def check_edge_cases():
+    """Assertions for inputs without any allocation run: empty, only 0 % and within one month."""
+    import numpy as np
+    import pandas as pd
+
+    import planner
+
+    empty = planner.runs.Runs([], [], [], [], 3)
+    assert len(empty) == 0 and empty.integral([0, 31]).shape == (3, 2) and not empty.averages([0, 31]).any()
+    assert empty.first_above(0, 0, 31, 50) is None and empty.group(2).empty
+
+    base = {"employee": "A", "project": planner.PROJECTS[0], "id": 0, "granularity": "month"}
+    cases = {
+        "leer": [],
+        "0 %": [{**base, "start_date": "2024-01-01", "end_date": "2024-12-31", "percentage": 0}],
+        # Monatsgenau ohne vollen Monat: die Tage 15.-20.03. ergeben keinen Lauf
+        "Teilmonat": [{**base, "start_date": "2024-03-15", "end_date": "2024-03-20", "percentage": 50}],
+    }
+    for label, allocations in cases.items():
+        runs = planner.AllocationRuns(planner.allocation_frame(allocations))
+        assert len(runs.by_employee) == 0 and len(runs.by_project) == 0, label
+        assert planner.check_overallocation(runs, "A", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-06-30"),
+                                            60) is None, label
+        assert not any(planner.fte_months(runs, "2024-01-01", "2024-12-31").values()), label
+        assert not np.any(runs.employee_averages(["A", "B"], planner.allocation.period_bounds(
+            planner.allocation.month_starts("2024-01-01", "2024-12-31")))), label
+
+
+def bench_compute(org, reruns=3):
+    """Median wall time of each planner call, without Streamlit."""
+    results = []
+    for target, call in _compute_targets(org).items():
+        t0 = time.perf_counter()
+        call()
+        cold_ms = (time.perf_counter() - t0) * 1000
+        warm = []
+        for _ in range(reruns):
+            t0 = time.perf_counter()
+            call()
+            warm.append((time.perf_counter() - t0) * 1000)
+        results.append({
+            "target": target,
+            "kind": "compute",
+            "cold_ms": round(cold_ms, 2),
+            "warm_median_ms": round(statistics.median(warm), 2),
+            "warm_max_ms": round(max(warm), 2),
+        })
+    return results
+
+
+def run_suite(sizes, pages, reruns, timeout, seed, compute=False):
+    results = []
+    for label in sizes:
+        n_members = SIZES[label] if label in SIZES else int(label)
+        t0 = time.perf_counter()
+        org = generate_org(n_members, seed=seed)
+        print(f"[{label}] Organisation erzeugt in {time.perf_counter() - t0:.1f}s "
+              f"({len(org['team_data'])} Mitglieder, {len(org['project_allocations'])} Allokationen)")
+        for page in pages:
+            # Jede Seite startet mit leerem Datenmodell und übernimmt die Organisation selbst,
+            # wie beim direkten Aufruf einer Seite ohne vorherigen Besuch der Startseite
+            _reset_shared_store()
+            result = bench_page(page, org, reruns=reruns, timeout=timeout)
+            result["size"] = label
+            results.append(result)
+            print(f"  {page:<24} kalt {result['cold_ms']:>10.1f} ms | warm {result['warm_median_ms']:>10.1f} ms "
+                  f"| peak {result['peak_mib']:>8.2f} MiB")
+            top = sorted(result["sections"].items(), key=lambda kv: kv[1], reverse=True)[:5]
+            for name, ms in top:
+                print(f"      {name:<28} {ms:>10.2f} ms")
+        if compute:
+            for result in bench_compute(org, reruns=reruns):
+                result["size"] = label
+                results.append(result)
+                print(f"  {result['target']:<24} kalt {result['cold_ms']:>10.1f} ms | warm "
+                      f"{result['warm_median_ms']:>10.1f} ms (planner)")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the list of regressions against a saved baseline."""
+    base = {(r["target"], r["size"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        ref = base.get((r["target"], r["size"]))
+        if ref is None:
+            continue
+        limit = ref["warm_median_ms"] * (1 + tolerance)
+        if r["warm_median_ms"] > limit:
+            regressions.append(f"{r['target']} [{r['size']}]: {r['warm_median_ms']:.1f} ms "
+                               f"> {ref['warm_median_ms']:.1f} ms (+{tolerance:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Benchmarks für das Ressourcendashboard")
+    parser.add_argument("--sizes", nargs="+", default=["1k"], help="1k, 10k, 100k oder eine Mitgliederzahl")
+    parser.add_argument("--pages", nargs="*", default=list(PAGES), choices=list(PAGES))
+    parser.add_argument("--compute", action="store_true", help="planner-Funktionen direkt messen")
+    parser.add_argument("--reruns", type=int, default=3, help="Anzahl warmer Reruns pro Seite")
+    parser.add_argument("--timeout", type=float, default=600, help="AppTest-Timeout pro Rerun (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--baseline", help="Mit gespeicherten Ergebnissen vergleichen")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Erlaubte Verlangsamung (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+
+    _quiet()
+    check_edge_cases()
+    results = run_suite(args.sizes, args.pages, args.reruns, args.timeout, args.seed, compute=args.compute)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Ergebnisse gespeichert: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSIONEN:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("Keine Regressionen gegenüber der Baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
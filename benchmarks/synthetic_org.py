@@ -0,0 +1,310 @@
+"""
+Synthetische Organisationen für Benchmarks und Lasttests.
+
+generate_org(n_members) liefert denselben Session-State-Aufbau, den app.py und die
+Seiten verwenden (team_data, components, project_allocations, employee_settings,
+rate_history, budget_data, org_units, scenarios).
+Ab etwa 200 Mitgliedern verteilen sich die Mitglieder auf einen mehrstufigen
+Organisationsbaum (Abteilungen -> Gruppen -> Teams, rund 30 Mitglieder pro Team)
+und Rollen mit Senioritätsstufen, damit Teilbaum-Summen und Auswertungswürfel
+bei Hunderten Teams gemessen werden.
+Die Daten sind reproduzierbar (seed) und werden vektorisiert mit NumPy erzeugt,
+damit auch 100k Mitglieder in wenigen Sekunden entstehen.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from planner.org import default_org_units  # noqa: E402
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Erik", "Markus", "Sophie", "Julia", "Lars", "Heike",
+    "Jonas", "Lea", "Felix", "Mia", "Paul", "Emma", "Lukas", "Hannah", "Tim", "Laura",
+    "Niklas", "Anna", "Moritz", "Lena", "David", "Sarah", "Jan", "Katrin", "Stefan", "Petra"
+]
+LAST_NAMES = [
+    "Schmidt", "Weber", "Mueller", "Fischer", "Wagner", "Becker", "Krause", "Richter", "Zimmermann",
+    "Meyer", "Schulz", "Hoffmann", "Koch", "Bauer", "Klein", "Wolf", "Schroeder", "Neumann",
+    "Schwarz", "Braun", "Hofmann", "Hartmann", "Lange", "Werner", "Krueger", "Lehmann"
+]
+ROLES = [
+    "Developer", "Tester", "System Architect", "Requirements Engineer", "Scrum Master",
+    "Complaint Manager", "Test Automation", "Validierer", "Product Owner", "DevOps Engineer"
+]
+BASE_COMPONENTS = [
+    "DOKU", "Generell", "iBS", "TMS", "Kundenprojekte", "ZL", "Testing", "Reporting",
+    "Schnittstellen", "Datenbank", "Frontend", "Backend", "Security", "Build", "Release"
+]
+EMPLOYEE_TYPES = ["Intern", "Lead Cost Employee (LCE)", "Extern"]
+EMPLOYEE_TYPE_WEIGHTS = [0.6, 0.25, 0.15]
+TEAMS = ["CS1", "CS2", "CS3", "CS4", "CS5", "Unassigned"]
+TEAM_WEIGHTS = [0.2, 0.2, 0.2, 0.18, 0.17, 0.05]
+MEMBERS_PER_TEAM = 30
+TEAMS_PER_GROUP = 10
+GROUPS_PER_DEPARTMENT = 6
+ROLE_LEVELS = ["Junior", "Senior", "Lead"]
+PRODUCTS = ["CG", "iUZ", "iBS"]
+
+DEFAULT_BUDGET_DATA = {
+    "Intern": {"monthly_cost": 1500, "yearly_budget": 18000, "hourly_rate": 75, "weekly_hours": 35},
+    "Lead Cost Employee (LCE)": {"monthly_cost": 5000, "yearly_budget": 60000, "hourly_rate": 0, "weekly_hours": 0},
+    "Extern": {"monthly_cost": 7000, "yearly_budget": 84000, "hourly_rate": 0, "weekly_hours": 0}
+}
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+
+def _component_names(n_components):
+    """Base component names first, then numbered sub-components (e.g. 'TMS-Modul-002')."""
+    names = list(BASE_COMPONENTS[:n_components])
+    i = 0
+    while len(names) < n_components:
+        base = BASE_COMPONENTS[i % len(BASE_COMPONENTS)]
+        names.append(f"{base}-Modul-{i // len(BASE_COMPONENTS) + 1:03d}")
+        i += 1
+    return names
+
+
+def _spelling_variant(name, choice):
+    """Free-text variants as users type them into the components textarea."""
+    if choice == 0:
+        return name.lower()
+    if choice == 1:
+        return f" {name} "
+    return name
+
+
+def _org_tree(n_teams):
+    """org_units of a department -> group -> team tree with `n_teams` teams; Unassigned below the first department."""
+    n_groups = -(-n_teams // TEAMS_PER_GROUP)
+    n_departments = -(-n_groups // GROUPS_PER_DEPARTMENT)
+    units = [{"name": f"Abteilung {d + 1}", "parent": None, "kind": "Abteilung"} for d in range(n_departments)]
+    units += [{"name": f"Gruppe {g // GROUPS_PER_DEPARTMENT + 1}.{g % GROUPS_PER_DEPARTMENT + 1}",
+               "parent": f"Abteilung {g // GROUPS_PER_DEPARTMENT + 1}", "kind": "Gruppe"} for g in range(n_groups)]
+    teams = [f"Team {t // TEAMS_PER_GROUP + 1:03d}-{t % TEAMS_PER_GROUP + 1:02d}" for t in range(n_teams)]
+    units += [{"name": team, "parent": units[n_departments + t // TEAMS_PER_GROUP]["name"], "kind": "Team"}
+              for t, team in enumerate(teams)]
+    units.append({"name": "Unassigned", "parent": "Abteilung 1", "kind": "Team"})
+    return units, teams
+
+
+def _dates(days_offsets, today):
+    return (today + pd.to_timedelta(days_offsets, unit="D")).strftime("%Y-%m-%d").tolist()
+
+
+def _scenarios(rng, n_scenarios, names, component_names, project_allocations, today):
+    """What-if scenarios (planner.scenarios format) with about 1 % of the members touched each."""
+    n_members = len(names)
+    n_touched = max(1, n_members // 100)
+    scenarios = {}
+    for s in range(n_scenarios):
+        moved = rng.choice(n_members, n_touched, replace=False)
+        shifts = rng.integers(-365, 2 * 365, n_touched)
+        hire_starts = rng.integers(0, 365, n_touched)
+        hire_types = rng.choice(EMPLOYEE_TYPES, n_touched, p=EMPLOYEE_TYPE_WEIGHTS)
+        changed = rng.choice(len(component_names), min(len(component_names), n_touched), replace=False)
+        removed = rng.choice(len(project_allocations), min(len(project_allocations), n_touched), replace=False)
+        added = rng.choice(n_members, n_touched, replace=False)
+        name = f"Szenario {s + 1}"
+        scenarios[name] = {
+            "exit_changes": {names[i]: d for i, d in zip(moved, _dates(shifts + 365, today))},
+            "hires": [{"name": f"Neu {s + 1}-{k:05d}", "employee_type": str(t), "start_date": start,
+                       "planned_exit": None, "components": component_names[changed[k % len(changed)]]}
+                      for k, (t, start) in enumerate(zip(hire_types, _dates(hire_starts, today)))],
+            "component_changes": {component_names[c]: [names[i] for i in rng.choice(n_members, 2, replace=False)]
+                                  for c in changed},
+            "allocation_changes": {
+                "remove": [project_allocations[k]['id'] for k in removed],
+                "add": [{'employee': names[i], 'project': str(rng.choice(PRODUCTS)),
+                         'start_date': today.to_period("M").to_timestamp().date(),
+                         'end_date': (today.to_period("M") + 12).to_timestamp().date(),
+                         'percentage': 20, 'id': f"{name}-{k}"} for k, i in enumerate(added)],
+            },
+        }
+    return scenarios
+
+
+def generate_org(n_members, seed=42, today=None, members_per_component=20,
+                 allocation_share=0.6, intern_settings_share=0.3, rate_years=10, renewal_share=0.5,
+                 n_scenarios=3, n_teams=None):
+    """
+    Generate a synthetic organisation with `n_members` members.
+
+    Returns a dict with the session state keys used by app.py and the pages.
+    `n_teams` (default: one team per MEMBERS_PER_TEAM members) above the five
+    default teams switches to the generated org tree and role levels.
+    """
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+
+    # Mitglieder
+    first = rng.choice(FIRST_NAMES, n_members)
+    last = rng.choice(LAST_NAMES, n_members)
+    names = [f"{f} {l} {i:06d}" for i, (f, l) in enumerate(zip(first, last))]
+    roles = rng.choice(ROLES, n_members)
+    employee_types = rng.choice(EMPLOYEE_TYPES, n_members, p=EMPLOYEE_TYPE_WEIGHTS)
+    teams = rng.choice(TEAMS, n_members, p=TEAM_WEIGHTS)
+
+    # Eintritt zwischen vor 15 Jahren und in 1 Jahr, Austritt 6 Monate bis 12 Jahre später
+    start_offsets = rng.integers(-15 * 365, 365, n_members)
+    exit_offsets = np.maximum(start_offsets + rng.integers(180, 12 * 365, n_members),
+                              rng.integers(-30, 10 * 365, n_members))
+    dob_offsets = rng.integers(-65 * 365, -20 * 365, n_members)
+    start_dates = _dates(start_offsets, today)
+    exit_dates = _dates(exit_offsets, today)
+    dobs = _dates(dob_offsets, today)
+
+    # Komponenten
+    n_components = max(len(PRODUCTS), n_members // members_per_component)
+    component_names = _component_names(n_components)
+    comp_count = rng.choice([1, 2, 3], n_members, p=[0.55, 0.3, 0.15])
+    comp_idx = rng.integers(0, n_components, (n_members, 3))
+    variants = rng.integers(0, 4, (n_members, 3))
+
+    members_by_component = [[] for _ in range(n_components)]
+    team_data = []
+    for i in range(n_members):
+        member_components = []
+        for j, c in enumerate(dict.fromkeys(comp_idx[i, :comp_count[i]])):
+            member_components.append(_spelling_variant(component_names[c], variants[i, j]))
+            members_by_component[c].append(names[i])
+        team_data.append({
+            "name": names[i],
+            "role": str(roles[i]),
+            "employee_type": str(employee_types[i]),
+            "components": ", ".join(member_components),
+            "start_date": start_dates[i],
+            "planned_exit": exit_dates[i],
+            "knowledge_transfer_status": "Not Started",
+            "priority": "Medium",
+            "dob": dobs[i],
+            "team": str(teams[i]),
+            "manual_override": False
+        })
+
+    components = []
+    for c, component in enumerate(component_names):
+        candidates = members_by_component[c] or [names[rng.integers(0, n_members)]]
+        n_resp = min(len(candidates), int(rng.integers(1, 4)))
+        responsibles = [str(n) for n in rng.choice(candidates, n_resp, replace=False)]
+        product = PRODUCTS[c % len(PRODUCTS)] if c < len(PRODUCTS) else str(rng.choice(PRODUCTS))
+        components.append({
+            "id": c,
+            "name": component,
+            "product": product,
+            "required_count": int(rng.integers(1, 5)),
+            "transfer_months": int(rng.integers(1, 13)),
+            "responsibles": responsibles,
+        })
+
+    # Projekt-Allokationen: 1-3 Projekte pro Person, Summe <= 100 %
+    allocated = np.flatnonzero(rng.random(n_members) < allocation_share)
+    n_projects = rng.integers(1, 4, len(allocated))
+    group_first = np.cumsum(n_projects) - n_projects
+    owner = np.repeat(allocated, n_projects)
+    slot = np.arange(len(owner)) - np.repeat(group_first, n_projects)
+    project_perm = np.argsort(rng.random((len(allocated), len(PRODUCTS))), axis=1)
+    alloc_project = np.asarray(PRODUCTS)[project_perm[np.repeat(np.arange(len(allocated)), n_projects), slot]]
+    # Gewichte >= 0.5 halten jeden Anteil über 5 %, Abrunden hält die Summe <= Gesamtanteil
+    weights = rng.random(len(owner)) + 0.5
+    weight_sum = np.add.reduceat(weights, group_first) if len(owner) else weights
+    totals = rng.choice([50, 80, 100], len(allocated))
+    shares = weights / np.repeat(weight_sum, n_projects) * np.repeat(totals, n_projects)
+    percentages = (shares // 5 * 5).astype(int)
+
+    start_month = rng.integers(-12, 12, len(owner))
+    end_month = start_month + rng.integers(1, 36, len(owner))
+    base_period = today.to_period("M")
+    month_lookup = {int(m): (base_period + int(m)).to_timestamp().date()
+                    for m in np.union1d(start_month, end_month)}
+    project_allocations = [
+        {
+            'employee': names[o],
+            'project': str(p),
+            'start_date': month_lookup[s],
+            'end_date': month_lookup[e],
+            'percentage': int(pct),
+            'id': k
+        }
+        for k, (o, p, s, e, pct) in enumerate(zip(owner, alloc_project, start_month, end_month, percentages))
+    ]
+
+    # Individuelle Stundenmodelle für einen Teil der internen Mitarbeiter
+    employee_settings = {}
+    intern_idx = np.flatnonzero((employee_types == "Intern") & (rng.random(n_members) < intern_settings_share))
+    for i in intern_idx:
+        employee_settings[names[i]] = {
+            'hourly_rate': float(rng.choice([60.0, 67.5, 75.0, 82.5, 90.0])),
+            'weekly_hours': int(rng.choice([20, 25, 30, 35, 40]))
+        }
+
+    # Tarifhistorie: jährliche Erhöhungen pro Typ, Vertragsverlängerungen Externer, Stundenänderungen
+    rate_history = []
+    for year in range(1, rate_years + 1):
+        valid_from = f"{today.year + year}-01-01"
+        for emp_type, values in DEFAULT_BUDGET_DATA.items():
+            factor = 1.03 ** year
+            change = {"scope": "type", "key": emp_type, "valid_from": valid_from}
+            if values["hourly_rate"]:
+                change["hourly_rate"] = round(values["hourly_rate"] * factor, 2)
+            change["monthly_cost"] = round(values["monthly_cost"] * factor)
+            change["yearly_budget"] = round(values["yearly_budget"] * factor)
+            rate_history.append(change)
+    extern_idx = np.flatnonzero((employee_types == "Extern") & (rng.random(n_members) < renewal_share))
+    renewal_offsets = rng.integers(30, rate_years * 365, len(extern_idx))
+    renewal_costs = rng.choice([7000, 7500, 8000, 8500], len(extern_idx))
+    for i, valid_from, cost in zip(extern_idx, _dates(renewal_offsets, today), renewal_costs):
+        rate_history.append({"scope": "employee", "key": names[i], "valid_from": valid_from,
+                             "monthly_cost": int(cost), "yearly_budget": int(cost) * 12})
+    hours_offsets = rng.integers(30, rate_years * 365, len(intern_idx))
+    hours = rng.choice([20, 25, 30, 35, 40], len(intern_idx))
+    for i, valid_from, weekly_hours in zip(intern_idx, _dates(hours_offsets, today), hours):
+        rate_history.append({"scope": "employee", "key": names[i], "valid_from": valid_from,
+                             "weekly_hours": int(weekly_hours)})
+    for k, change in enumerate(rate_history):
+        change["id"] = k + 1
+
+    # Großer Organisationsbaum und Rollenstufen aus einem eigenen Zufallsstrom (Unassigned bleibt)
+    n_teams = n_members // MEMBERS_PER_TEAM if n_teams is None else n_teams
+    if n_teams > len(TEAMS) - 1:
+        org_units, tree_teams = _org_tree(n_teams)
+        tree_rng = np.random.default_rng([seed, 2])
+        team_weights = tree_rng.gamma(2.0, size=n_teams)
+        member_teams = tree_rng.choice(tree_teams, n_members, p=team_weights / team_weights.sum())
+        levels = tree_rng.choice(ROLE_LEVELS, n_members)
+        for member, team, level in zip(team_data, member_teams, levels):
+            if member["team"] != "Unassigned":
+                member["team"] = str(team)
+            member["role"] = f"{member['role']} ({level})"
+    else:
+        org_units = default_org_units(TEAMS)
+
+    # Szenarien aus einem eigenen Zufallsstrom, damit die übrigen Daten pro Seed gleich bleiben
+    scenarios = _scenarios(np.random.default_rng([seed, 1]), n_scenarios, names, component_names,
+                           project_allocations, today)
+
+    return {
+        "team_data": team_data,
+        "components": components,
+        "project_allocations": project_allocations,
+        "employee_settings": employee_settings,
+        "rate_history": rate_history,
+        "budget_data": {k: dict(v) for k, v in DEFAULT_BUDGET_DATA.items()},
+        "scenarios": scenarios,
+        "org_units": org_units,
+    }
+
+
+if __name__ == "__main__":
+    for label, size in SIZES.items():
+        org = generate_org(size)
+        print(f"{label}: {len(org['team_data'])} Mitglieder, {len(org['components'])} Komponenten, "
+              f"{len(org['project_allocations'])} Allokationen, {len(org['employee_settings'])} Stundenmodelle, "
+              f"{len(org['rate_history'])} Tarifänderungen, {len(org['scenarios'])} Szenarien, "
+              f"{sum(unit['kind'] == 'Team' for unit in org['org_units'])} Teams")
@@ -0,0 +1,276 @@
+"""
+Rerun-Instrumentierung für alle Seiten.
+
+Jede Seite startet pro Rerun einen RerunRecorder und markiert ihre Blöcke mit
+perf.section("name", rows=...). Eine Section läuft bis zur nächsten Markierung
+(Rundenzeit-Prinzip), so dass bestehende Blöcke nicht eingerückt werden müssen.
+Am Ende des Skripts schreibt end_rerun() die Messung in die JSONL-Trace-Datei
+(falls AURA_TRACE_FILE gesetzt ist) und zeigt optional das Debug-Panel in der Sidebar.
+
+Aggregation über Sessions hinweg:
+    python instrumentation.py traces.jsonl
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# Pfad der JSONL-Trace-Datei; ohne Angabe wird nichts geschrieben
+TRACE_FILE = os.environ.get("AURA_TRACE_FILE")
+# Zielverzeichnis für cProfile/tracemalloc-Mitschnitte
+PROFILE_DIR = os.environ.get("AURA_PROFILE_DIR", "profiles")
+
+_trace_lock = threading.Lock()
+
+
+class RerunRecorder:
+    """Collects wall time and processed rows per section for a single rerun."""
+
+    def __init__(self, page, session_id, profile=False):
+        self.page = page
+        self.session_id = session_id
+        self.started_at = datetime.now()
+        self.sections = []
+        # (node, 'hit'|'computed', ms) of derived artifacts (shared_state.derived)
+        self.dataflow = []
+        self.finished = False
+        self._t0 = time.perf_counter()
+        self._current = None
+        self._profiler = None
+        if profile:
+            self._profiler = cProfile.Profile()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._profiler.enable()
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def section(self, name, rows=None):
+        """Close the running section and start a new one."""
+        self._close_current()
+        self._current = {"name": name, "rows": rows, "t0": time.perf_counter()}
+
+    def rows(self, count):
+        """Set the number of processed rows for the running section."""
+        if self._current is not None:
+            self._current["rows"] = int(count)
+
+    @contextmanager
+    def timed(self, name, rows=None):
+        """Time a nested block without interrupting the running section."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append({
+                "name": name,
+                "ms": (time.perf_counter() - t0) * 1000,
+                "rows": rows
+            })
+
+    def _close_current(self):
+        if self._current is not None:
+            self.sections.append({
+                "name": self._current["name"],
+                "ms": (time.perf_counter() - self._current["t0"]) * 1000,
+                "rows": self._current["rows"]
+            })
+            self._current = None
+
+    def close(self, interrupted=False):
+        """Finish the rerun and return its trace record."""
+        self._close_current()
+        self.finished = True
+        return {
+            "ts": self.started_at.isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "session": self.session_id,
+            "total_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "interrupted": interrupted,
+            "sections": [
+                {"name": s["name"], "ms": round(s["ms"], 3), "rows": s["rows"]}
+                for s in self.sections
+            ],
+            "dataflow": [
+                {"node": node, "status": status, "ms": round(ms, 3)}
+                for node, status, ms in self.dataflow
+            ]
+        }
+
+    def stop_profiler(self):
+        """Stop cProfile/tracemalloc and write both captures to PROFILE_DIR."""
+        if self._profiler is None:
+            return []
+        self._profiler.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{self.page}_{self.started_at.strftime('%Y%m%d_%H%M%S')}")
+        prof_path = f"{stem}.prof"
+        self._profiler.dump_stats(prof_path)
+
+        mem_path = f"{stem}_memory.txt"
+        with open(mem_path, "w", encoding="utf-8") as fh:
+            fh.write(f"Peak traced memory: {peak / 1024 / 1024:.2f} MiB\n\n")
+            for stat in snapshot.statistics("lineno")[:30]:
+                fh.write(f"{stat}\n")
+            fh.write("\n")
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(30)
+            fh.write(out.getvalue())
+        self._profiler = None
+        return [prof_path, mem_path]
+
+
+def write_trace(record, path=None):
+    """Append one rerun record to the JSONL trace file (thread safe)."""
+    path = path or TRACE_FILE
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False)
+    with _trace_lock:
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+def begin_rerun(page):
+    """Start instrumentation for the current rerun of `page`.
+
+    A recorder left open by st.stop()/st.rerun() in the previous run is
+    flushed first and marked as interrupted.
+    """
+    if '_perf_session_id' not in st.session_state:
+        st.session_state._perf_session_id = uuid.uuid4().hex[:12]
+
+    pending = st.session_state.get('_perf_recorder')
+    if pending is not None and not pending.finished:
+        pending.stop_profiler()
+        write_trace(pending.close(interrupted=True))
+
+    profile = st.session_state.pop('perf_profile_next', False)
+    recorder = RerunRecorder(page, st.session_state._perf_session_id, profile=profile)
+    st.session_state._perf_recorder = recorder
+    return recorder
+
+
+def end_rerun(recorder):
+    """Finish the rerun, write traces/profiles and render the debug panel."""
+    profile_files = recorder.stop_profiler()
+    record = recorder.close()
+    write_trace(record)
+    st.session_state._perf_last = record
+    render_debug_panel(record, profile_files)
+
+
+def render_debug_panel(record, profile_files=None):
+    """Toggleable sidebar panel with per-section wall time and rows."""
+    st.sidebar.markdown("---")
+    show = st.sidebar.checkbox("⏱️ Performance-Debug", key="perf_debug")
+    if not show:
+        return
+
+    st.sidebar.caption(f"Rerun {record['page']}: {record['total_ms']:.1f} ms gesamt")
+    if record['sections']:
+        sections_df = pd.DataFrame(record['sections']).rename(columns={
+            'name': 'Section',
+            'ms': 'Zeit (ms)',
+            'rows': 'Zeilen'
+        })
+        st.sidebar.dataframe(sections_df, use_container_width=True, hide_index=True)
+    if record.get('dataflow'):
+        computed = [n['node'] for n in record['dataflow'] if n['status'] == "computed"]
+        stale = [n['node'] for n in record['dataflow'] if n['status'] in ("stale", "pending")]
+        views = [n['node'] for n in record['dataflow'] if n['status'] == "view"]
+        st.sidebar.caption(f"Abgeleitete Daten: {len(computed)} neu berechnet "
+                           f"({', '.join(computed) or '–'}), "
+                           f"{len(record['dataflow']) - len(computed) - len(stale) - len(views)} aus dem Cache"
+                           + (f", {len(views)} aus gespeicherten Sichten ({', '.join(views)})" if views else "")
+                           + (f", {len(stale)} veraltet ({', '.join(stale)}) – Aktualisierung im Hintergrund"
+                              if stale else ""))
+
+    for path in profile_files or []:
+        st.sidebar.success(f"✅ Profil gespeichert: {path}")
+
+    if st.sidebar.button("🔬 Nächsten Rerun profilieren", use_container_width=True):
+        st.session_state.perf_profile_next = True
+        st.rerun()
+    if not TRACE_FILE:
+        st.sidebar.caption("JSONL-Trace inaktiv (AURA_TRACE_FILE nicht gesetzt)")
+
+
+def load_traces(path):
+    """Read a JSONL trace file into one row per (rerun, section)."""
+    rows = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            rows.append({
+                "page": record["page"],
+                "section": "__total__",
+                "ms": record["total_ms"],
+                "rows": None,
+                "interrupted": bool(record.get("interrupted", False))
+            })
+            for section in record["sections"]:
+                rows.append({
+                    "page": record["page"],
+                    "section": section["name"],
+                    "ms": section["ms"],
+                    "rows": section["rows"],
+                    "interrupted": bool(record.get("interrupted", False))
+                })
+    return pd.DataFrame(rows, columns=["page", "section", "ms", "rows", "interrupted"])
+
+
+def aggregate_traces(path):
+    """
+    Per page and section: count, mean, p50, p95 and max wall time, sorted by p95.
+
+    Reruns ended by st.stop()/st.rerun() are only closed by the next rerun, so
+    their last section and total contain the user's idle time; they are left
+    out of the statistics and counted separately (`interrupted`).
+    """
+    columns = ["page", "section", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms", "interrupted"]
+    traces = load_traces(path)
+    if traces.empty:
+        return pd.DataFrame(columns=columns)
+    interrupted = traces[traces["interrupted"]].groupby(["page", "section"]).size().rename("interrupted")
+    grouped = traces[~traces["interrupted"]].groupby(["page", "section"])["ms"]
+    summary = pd.DataFrame({
+        "count": grouped.size(),
+        "mean_ms": grouped.mean(),
+        "p50_ms": grouped.quantile(0.50),
+        "p95_ms": grouped.quantile(0.95),
+        "max_ms": grouped.max()
+    }).join(interrupted, how="outer")
+    summary["count"] = summary["count"].fillna(0).astype(int)
+    summary["interrupted"] = summary["interrupted"].fillna(0).astype(int)
+    summary = summary.reset_index()[columns]
+    return summary.sort_values("p95_ms", ascending=False, na_position="last").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python instrumentation.py <traces.jsonl>")
+        sys.exit(1)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(aggregate_traces(sys.argv[1]).round(2).to_string(index=False))
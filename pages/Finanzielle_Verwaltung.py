@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime
 
+import instrumentation
+import planner
+import shared_state
+
 # Page config
 st.set_page_config(
     page_title="Finanzielle Verwaltung",
@@ -10,51 +15,30 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize financial data
-if 'budget_data' not in st.session_state:
-    st.session_state.budget_data = {
-        "Intern": {"monthly_cost": 1500, "yearly_budget": 18000, "hourly_rate": 75, "weekly_hours": 35},
-        "Lead Cost Employee (LCE)": {"monthly_cost": 5000, "yearly_budget": 60000, "hourly_rate": 0, "weekly_hours": 0},
-        "Extern": {"monthly_cost": 7000, "yearly_budget": 84000, "hourly_rate": 0, "weekly_hours": 0}
-    }
+# Rerun-Instrumentierung (Section-Timer, Debug-Panel, Traces)
+perf = instrumentation.begin_rerun("Finanzielle_Verwaltung")
+perf.section("session_init")
+
+# Budget, individuelle Stundenmodelle, geplante Tarifänderungen und Allocations liegen im gemeinsamen Datenmodell
+snapshot = shared_state.attach({
+    # Teamdaten legt die Startseite an; hier nur übernehmen, falls schon im Session-State
+    "team_data": None,
+    "budget_data": planner.default_budget_data,
+    "employee_settings": dict,
+    "rate_history": list,
+    "project_allocations": list,
+})
 
-# Initialize individual employee settings if not exists
-if 'employee_settings' not in st.session_state:
-    st.session_state.employee_settings = {}
+# Stichtag dieses Reruns, wird an alle Berechnungen übergeben
+as_of = shared_state.as_of_date()
+# (Durchläufe, Seed) der Austrittsrisiko-Simulation oder None
+simulation = shared_state.simulation_settings()
 
-# Check if team_data exists
-if 'team_data' not in st.session_state:
+# Check if team_data exists (im gemeinsamen Datenmodell, nicht nur im Session-State)
+if snapshot.get("team_data") is None:
     st.error("Teamdaten nicht gefunden. Bitte zuerst die Organisationsseite besuchen.")
     st.stop()
 
-# Helper function to calculate employee costs
-def calculate_employee_cost(emp_name, emp_type, budget_data, employee_settings):
-    """Calculate monthly and yearly costs for an employee."""
-    if emp_type == "Intern" and emp_name in employee_settings:
-        settings = employee_settings[emp_name]
-        hr = settings.get('hourly_rate', budget_data[emp_type]['hourly_rate'])
-        wh = settings.get('weekly_hours', budget_data[emp_type]['weekly_hours'])
-        monthly = (wh * hr * 52) / 12
-        yearly = wh * hr * 52
-    else:
-        monthly = budget_data.get(emp_type, {}).get('monthly_cost', 0)
-        yearly = budget_data.get(emp_type, {}).get('yearly_budget', 0)
-    return monthly, yearly
-
-# Helper function to calculate FTE
-def calculate_employee_fte(emp_name, emp_type, budget_data, employee_settings):
-    """Calculate FTE (Full-Time Equivalent) for an employee."""
-    if emp_type == "Intern":
-        if emp_name in employee_settings:
-            wh = employee_settings[emp_name].get('weekly_hours', budget_data[emp_type]['weekly_hours'])
-        else:
-            wh = budget_data[emp_type]['weekly_hours']
-        # Assuming 35 hours/week is full-time
-        return wh / 35 if wh > 0 else 0
-    else:
-        # Assuming other types are full-time
-        return 1.0
-
 st.title("💰 Finanzielle Verwaltung")
 st.markdown("Budgetverfolgung und -berechnung für die Abteilung")
 
@@ -63,21 +47,14 @@ st.markdown("---")
 st.markdown("### 📊 Budgetübersicht")
 
 # Calculate current costs
-df = pd.DataFrame(st.session_state.team_data)
+perf.section("metrics", rows=len(st.session_state.team_data))
+df = shared_state.derived("team_frame", today=as_of)
+costs = shared_state.derived("costs", today=as_of)
 if not df.empty:
-    employee_counts = df['employee_type'].value_counts()
-    total_monthly_cost = 0
-    total_yearly_budget = 0
-    total_fte = 0
-    
-    for idx, row in df.iterrows():
-        emp_name = row['name']
-        emp_type = row['employee_type']
-        monthly_cost, yearly_budget = calculate_employee_cost(emp_name, emp_type, st.session_state.budget_data, st.session_state.employee_settings)
-        fte = calculate_employee_fte(emp_name, emp_type, st.session_state.budget_data, st.session_state.employee_settings)
-        total_monthly_cost += monthly_cost
-        total_yearly_budget += yearly_budget
-        total_fte += fte
+    totals = planner.cost_totals(costs)
+    total_monthly_cost = totals['monthly']
+    total_yearly_budget = totals['yearly']
+    total_fte = totals['fte']
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -90,47 +67,14 @@ if not df.empty:
         st.metric("Gesamt FTE", f"{total_fte:.2f}")
 
 # Budget per employee type
+perf.section("cost_per_type", rows=len(df))
 st.markdown("---")
 st.markdown("### 💼 Kosten pro Mitarbeitertyp")
 
-budget_df = pd.DataFrame.from_dict(st.session_state.budget_data, orient='index')
-budget_df['Anzahl'] = budget_df.index.map(employee_counts) if not df.empty else 0
-
-# Calculate total FTE per type
-fte_per_type = {}
-for emp_type in budget_df.index:
-    type_employees = df[df['employee_type'] == emp_type] if not df.empty else pd.DataFrame()
-    if not type_employees.empty:
-        total_fte = type_employees.apply(lambda row: calculate_employee_fte(row['name'], row['employee_type'], st.session_state.budget_data, st.session_state.employee_settings), axis=1).sum()
-    else:
-        total_fte = 0
-    fte_per_type[emp_type] = total_fte
-
-budget_df['Gesamt FTE'] = budget_df.index.map(fte_per_type)
-
-# Calculate actual costs considering custom employee settings
-actual_costs = {}
-for emp_type in budget_df.index:
-    if emp_type == "Intern":
-        # Calculate for internal employees with possible custom settings
-        intern_employees = df[df['employee_type'] == 'Intern']
-        type_monthly_cost = 0
-        type_yearly_cost = 0
-        for idx, row in intern_employees.iterrows():
-            emp_name = row['name']
-            monthly, yearly = calculate_employee_cost(emp_name, emp_type, st.session_state.budget_data, st.session_state.employee_settings)
-            type_monthly_cost += monthly
-            type_yearly_cost += yearly
-        actual_costs[emp_type] = {'monthly': type_monthly_cost, 'yearly': type_yearly_cost}
-    else:
-        count = budget_df.loc[emp_type, 'Anzahl']
-        actual_costs[emp_type] = {
-            'monthly': st.session_state.budget_data[emp_type]["monthly_cost"] * count,
-            'yearly': st.session_state.budget_data[emp_type]["yearly_budget"] * count
-        }
-
-budget_df['Gesamtkosten (Monat)'] = budget_df.index.map(lambda x: actual_costs[x]['monthly'])
-budget_df['Gesamtkosten (Jahr)'] = budget_df.index.map(lambda x: actual_costs[x]['yearly'])
+# Kategorien-Kosten mit den am Stichtag gültigen Tarifen
+effective_budget, _ = planner.rates_at(st.session_state.budget_data, st.session_state.employee_settings,
+                                       st.session_state.rate_history, as_of)
+budget_df = planner.cost_by_type(costs, effective_budget)
 
 st.dataframe(budget_df[['Anzahl', 'Gesamt FTE', 'monthly_cost', 'Gesamtkosten (Monat)', 'yearly_budget', 'Gesamtkosten (Jahr)']].rename(columns={
     'monthly_cost': 'Monatliche Kosten pro Person (€)',
@@ -138,28 +82,19 @@ st.dataframe(budget_df[['Anzahl', 'Gesamt FTE', 'monthly_cost', 'Gesamtkosten (M
 }))
 
 # Employee cost breakdown
+perf.section("employee_costs", rows=len(df))
 st.markdown("---")
 st.markdown("### 👥 Mitarbeiterkosten-Übersicht")
 
 if not df.empty:
-    # Add cost columns to the dataframe
-    def get_employee_cost(row):
-        monthly, _ = calculate_employee_cost(row['name'], row['employee_type'], st.session_state.budget_data, st.session_state.employee_settings)
-        return monthly
-    
-    def get_employee_yearly(row):
-        _, yearly = calculate_employee_cost(row['name'], row['employee_type'], st.session_state.budget_data, st.session_state.employee_settings)
-        return yearly
-    
-    def get_employee_fte(row):
-        return calculate_employee_fte(row['name'], row['employee_type'], st.session_state.budget_data, st.session_state.employee_settings)
-    
-    df['Monatliche Kosten'] = df.apply(get_employee_cost, axis=1)
-    df['Jährliche Kosten'] = df.apply(get_employee_yearly, axis=1)
-    df['FTE'] = df.apply(get_employee_fte, axis=1)
+    # Add cost columns (df is shared, so on a new frame)
+    cost_df = df[['name', 'role', 'employee_type']].assign(**{
+        'FTE': costs['fte'],
+        'Monatliche Kosten': costs['monthly_cost'],
+        'Jährliche Kosten': costs['yearly_cost']
+    })
     
     # Display employee list with costs
-    cost_df = df[['name', 'role', 'employee_type', 'FTE', 'Monatliche Kosten', 'Jährliche Kosten']].copy()
     cost_df.columns = ['Name', 'Rolle', 'Typ', 'FTE', 'Monatliche Kosten (€)', 'Jährliche Kosten (€)']
     
     # Format currency
@@ -171,19 +106,16 @@ if not df.empty:
     # Summary by employee type
     st.markdown("#### Zusammenfassung nach Mitarbeitertyp")
     
-    # Use pre-calculated costs from actual_costs
+    # Use pre-calculated costs per type
     summary_data = []
-    for emp_type in st.session_state.budget_data.keys():
-        type_employees = df[df['employee_type'] == emp_type]
-        if not type_employees.empty:
-            total_fte = type_employees.apply(lambda row: calculate_employee_fte(row['name'], row['employee_type'], st.session_state.budget_data, st.session_state.employee_settings), axis=1).sum()
-            summary_data.append({
-                'Typ': emp_type,
-                'Anzahl': len(type_employees),
-                'Gesamt FTE': f"{total_fte:.2f}",
-                'Monatliche Kosten (€)': f"€{actual_costs[emp_type]['monthly']:,.2f}",
-                'Jährliche Kosten (€)': f"€{actual_costs[emp_type]['yearly']:,.2f}"
-            })
+    for emp_type, row in budget_df[budget_df['Anzahl'] > 0].iterrows():
+        summary_data.append({
+            'Typ': emp_type,
+            'Anzahl': row['Anzahl'],
+            'Gesamt FTE': f"{row['Gesamt FTE']:.2f}",
+            'Monatliche Kosten (€)': f"€{row['Gesamtkosten (Monat)']:,.2f}",
+            'Jährliche Kosten (€)': f"€{row['Gesamtkosten (Jahr)']:,.2f}"
+        })
     
     summary_df = pd.DataFrame(summary_data)
     st.dataframe(summary_df, use_container_width=True)
@@ -191,6 +123,7 @@ else:
     st.info("Keine Mitarbeiterdaten verfügbar.")
 
 # Budget adjustment form
+perf.section("sidebar_forms")
 st.sidebar.markdown("### ⚙️ Budget anpassen")
 
 with st.sidebar.form("adjust_budget"):
@@ -201,9 +134,12 @@ with st.sidebar.form("adjust_budget"):
     
     adjust_submitted = st.form_submit_button("💾 Aktualisieren")
     if adjust_submitted:
-        st.session_state.budget_data[emp_type]["monthly_cost"] = new_monthly
-        st.session_state.budget_data[emp_type]["yearly_budget"] = new_yearly
-        st.rerun()
+        budget_data = {
+            **st.session_state.budget_data,
+            emp_type: {**st.session_state.budget_data[emp_type], "monthly_cost": new_monthly, "yearly_budget": new_yearly}
+        }
+        if shared_state.commit({"budget_data": budget_data}):
+            st.rerun()
 
 # Individual Employee Settings for Interns
 st.sidebar.markdown("---")
@@ -253,15 +189,97 @@ if not df.empty:
             
             emp_settings_submitted = st.form_submit_button("💾 Speichern")
             if emp_settings_submitted:
-                st.session_state.employee_settings[selected_intern] = {
-                    'hourly_rate': emp_hourly_rate,
-                    'weekly_hours': emp_weekly_hours
+                employee_settings = {
+                    **st.session_state.employee_settings,
+                    selected_intern: {
+                        'hourly_rate': emp_hourly_rate,
+                        'weekly_hours': emp_weekly_hours
+                    }
                 }
-                st.rerun()
+                if shared_state.commit({"employee_settings": employee_settings}):
+                    st.rerun()
     else:
         st.sidebar.info("Keine internen Mitarbeiter vorhanden")
 
+# Effective-dated changes (raises, contract renewals, hour changes)
+st.sidebar.markdown("---")
+st.sidebar.markdown("### 📜 Tarifänderung planen")
+
+# Außerhalb des Formulars, damit die passende Auswahl sofort erscheint
+rate_scope = st.sidebar.radio("Gilt für", ["Mitarbeitertyp", "Mitarbeiter"], horizontal=True, key="rate_scope")
+with st.sidebar.form("rate_change_form"):
+    if rate_scope == "Mitarbeitertyp":
+        rate_key = st.selectbox("Mitarbeitertyp", list(st.session_state.budget_data.keys()), key="rate_type")
+    else:
+        rate_key = st.selectbox("Mitarbeiter", sorted(df['name'].astype(str).unique()) if not df.empty else [],
+                                key="rate_employee")
+    valid_from = st.date_input("Gültig ab", value=as_of + pd.DateOffset(months=1))
+    st.caption("Leere Felder behalten den bisherigen Wert.")
+    rate_values = {
+        "monthly_cost": st.number_input("Monatliche Kosten (€)", value=None, min_value=0.0, step=100.0),
+        "yearly_budget": st.number_input("Jährliche Kosten (€)", value=None, min_value=0.0, step=1000.0),
+        "hourly_rate": st.number_input("Stundensatz (€/h)", value=None, min_value=0.0, step=0.5),
+        "weekly_hours": st.number_input("Wöchentliche Stunden", value=None, min_value=0, step=1),
+    }
+
+    rate_submitted = st.form_submit_button("📜 Änderung speichern")
+    if rate_submitted:
+        rate_values = {field: value for field, value in rate_values.items() if value is not None}
+        if not rate_key:
+            st.error("Bitte einen Mitarbeiter wählen.")
+        elif not rate_values:
+            st.error("Bitte mindestens einen Wert angeben.")
+        else:
+            change = {
+                "id": max((row.get("id", 0) for row in st.session_state.rate_history), default=0) + 1,
+                "scope": planner.TYPE_SCOPE if rate_scope == "Mitarbeitertyp" else planner.EMPLOYEE_SCOPE,
+                "key": rate_key,
+                "valid_from": pd.Timestamp(valid_from).strftime('%Y-%m-%d'),
+                **rate_values,
+            }
+            if shared_state.commit({"rate_history": [*st.session_state.rate_history, change]}):
+                st.rerun()
+
+# Planned rate changes
+perf.section("rate_history", rows=len(st.session_state.rate_history))
+st.markdown("---")
+st.markdown("### 📜 Tarifhistorie")
+
+if st.session_state.rate_history:
+    history_df = pd.DataFrame(st.session_state.rate_history)
+    history_df = history_df.reindex(columns=['id', 'valid_from', 'scope', 'key', *planner.RATE_FIELDS])
+    history_df['scope'] = history_df['scope'].map({planner.TYPE_SCOPE: "Mitarbeitertyp",
+                                                   planner.EMPLOYEE_SCOPE: "Mitarbeiter"})
+    history_df = history_df.sort_values('valid_from', kind='stable')
+    st.dataframe(history_df.rename(columns={
+        'valid_from': 'Gültig ab',
+        'scope': 'Gilt für',
+        'key': 'Typ / Mitarbeiter',
+        'monthly_cost': 'Monatliche Kosten (€)',
+        'yearly_budget': 'Jährliche Kosten (€)',
+        'hourly_rate': 'Stundensatz (€/h)',
+        'weekly_hours': 'Wöchentliche Stunden',
+    }), use_container_width=True, hide_index=True)
+
+    rate_options = {
+        f"{row.get('valid_from')} – {row.get('key')} (#{row.get('id')})": row.get('id')
+        for row in st.session_state.rate_history
+    }
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        rate_to_delete = st.selectbox("Tarifänderung löschen", list(rate_options))
+    with col2:
+        st.write("")
+        if st.button("🗑️ Löschen", key="delete_rate_change"):
+            rate_history = [row for row in st.session_state.rate_history
+                            if row.get('id') != rate_options[rate_to_delete]]
+            if shared_state.commit({"rate_history": rate_history}):
+                st.rerun()
+else:
+    st.info("Keine Tarifänderungen geplant. Es gelten Budget und Stundenmodelle.")
+
 # Additional financial features can be added here
+perf.section("forecast", rows=len(df))
 st.markdown("---")
 st.markdown("### 📈 Personal- und Kostenprognose")
 
@@ -279,17 +297,17 @@ if not df.empty:
     with col2:
         start_date = st.date_input(
             "Startdatum",
-            value=pd.Timestamp.today()
+            value=as_of
         )
     
     with col3:
         # Set default end date based on granularity
         if granularity == "Monatlich":
-            default_end = pd.Timestamp.today() + pd.DateOffset(years=3)
+            default_end = as_of + pd.DateOffset(years=3)
         elif granularity == "Quartalsweise":
-            default_end = pd.Timestamp.today() + pd.DateOffset(years=3)
+            default_end = as_of + pd.DateOffset(years=3)
         else:  # Jährlich
-            default_end = pd.Timestamp.today() + pd.DateOffset(years=5)
+            default_end = as_of + pd.DateOffset(years=5)
         
         end_date = st.date_input(
             "Enddatum",
@@ -305,58 +323,15 @@ if not df.empty:
         st.stop()
     
     # Set frequency based on granularity
-    if granularity == "Monatlich":
-        freq = 'M'
-    elif granularity == "Quartalsweise":
-        freq = 'Q'
-    else:  # Jährlich
-        freq = 'Y'
-    
-    # Create forecast period with custom date range
-    date_range = pd.date_range(start=start_date, end=end_date, freq=freq)
-    
-    # Initialize forecast data
-    forecast_data = []
-    
-    for date in date_range:
-        # Count active employees at this date
-        active_employees = df[
-            (pd.to_datetime(df['start_date']) <= date) & 
-            (pd.to_datetime(df['planned_exit']) >= date)
-        ]
-        
-        # Count by employee type
-        type_counts = active_employees['employee_type'].value_counts()
-        
-        # Calculate costs with consideration for individual settings
-        monthly_cost = 0
-        yearly_cost = 0
-        
-        for emp_type in st.session_state.budget_data.keys():
-            if emp_type == "Intern":
-                # Calculate for internal employees considering individual settings
-                intern_at_date = active_employees[active_employees['employee_type'] == 'Intern']
-                for idx, row in intern_at_date.iterrows():
-                    emp_name = row['name']
-                    monthly, yearly = calculate_employee_cost(emp_name, emp_type, st.session_state.budget_data, st.session_state.employee_settings)
-                    monthly_cost += monthly
-                    yearly_cost += yearly
-            else:
-                count = type_counts.get(emp_type, 0)
-                monthly_cost += st.session_state.budget_data[emp_type]["monthly_cost"] * count
-                yearly_cost += st.session_state.budget_data[emp_type]["yearly_budget"] * count
-        
-        forecast_data.append({
-            'Datum': date,
-            'Gesamt_Mitarbeiter': len(active_employees),
-            'Intern': type_counts.get('Intern', 0),
-            'Lead Cost Employee (LCE)': type_counts.get('Lead Cost Employee (LCE)', 0),
-            'Extern': type_counts.get('Extern', 0),
-            'Monatliche_Kosten': monthly_cost,
-            'Jährliche_Kosten': yearly_cost
-        })
+    freq = planner.FORECAST_FREQ[granularity]
     
-    forecast_df = pd.DataFrame(forecast_data)
+    # Active employees and costs per period end
+    cost_column = "yearly_cost" if granularity == "Jährlich" else "monthly_cost"
+    forecast_df = shared_state.materialized("cost_forecast", latest=True, today=as_of,
+                                              cost_range=(start_date, end_date, freq, cost_column))
+    perf.rows(len(df) + len(forecast_df))
+
+    perf.section("charts", rows=len(forecast_df))
     
     # Employee Count Chart
     st.markdown("#### 👥 Mitarbeiterentwicklung")
@@ -376,13 +351,12 @@ if not df.empty:
     
     # Cost Chart
     st.markdown("#### 💰 Kostenentwicklung")
+    # Monthly/quarterly: cost of the whole period, including rate changes within it
     if granularity == "Monatlich":
-        cost_col = 'Monatliche_Kosten'
+        cost_col = 'Periodenkosten'
         cost_title = "Monatliche Kosten"
     elif granularity == "Quartalsweise":
-        # For quarterly, show quarterly costs (3 months)
-        forecast_df['Quartalskosten'] = forecast_df['Monatliche_Kosten'] * 3
-        cost_col = 'Quartalskosten'
+        cost_col = 'Periodenkosten'
         cost_title = "Quartalskosten"
     else:  # Jährlich
         cost_col = 'Jährliche_Kosten'
@@ -399,6 +373,20 @@ if not df.empty:
         xaxis_title="Zeitraum",
         yaxis_title=f"{cost_title} (€)"
     )
+    if simulation:
+        perf.section("attrition_simulation", rows=len(df) * simulation[0])
+        cost_scale = 3 if granularity == "Quartalsweise" else 1
+        simulated = shared_state.derived("attrition_costs", today=as_of,
+                                         cost_range=(start_date, end_date, freq, cost_column),
+                                         simulation=simulation)
+        band = planner.band_frame(simulated, "cost", cost_scale)
+        fig_costs.add_trace(go.Scatter(x=band['Datum'], y=band['P90'], mode='lines', line=dict(width=0),
+                                       showlegend=False, hoverinfo='skip'))
+        fig_costs.add_trace(go.Scatter(x=band['Datum'], y=band['P10'], mode='lines', line=dict(width=0),
+                                       fill='tonexty', fillcolor='rgba(99, 110, 250, 0.2)',
+                                       name=f'Simuliert (P10–P90, {simulation[0]} Durchläufe)'))
+        fig_costs.add_trace(go.Scatter(x=band['Datum'], y=band['P50'], mode='lines', line=dict(dash='dash'),
+                                       name='Simuliert (P50)'))
     # Format y-axis as currency
     fig_costs.update_yaxes(tickformat=",.0f")
     st.plotly_chart(fig_costs, use_container_width=True)
@@ -412,4 +400,135 @@ if not df.empty:
     st.dataframe(display_df, use_container_width=True)
     
 else:
-    st.info("Keine Daten für Prognose verfügbar.")
\ No newline at end of file
+    st.info("Keine Daten für Prognose verfügbar.")
+
+# Project costs: allocation shares x employee cost per month
+perf.section("project_costs", rows=len(st.session_state.project_allocations))
+st.markdown("---")
+st.markdown("### 🧾 Projektkosten")
+
+if not df.empty:
+    col1, col2 = st.columns(2)
+    with col1:
+        project_start = st.date_input("Von", value=as_of.replace(day=1), key="project_cost_start")
+    with col2:
+        project_end = st.date_input("Bis", value=as_of + pd.DateOffset(months=11), key="project_cost_end")
+    project_start, project_end = pd.Timestamp(project_start), pd.Timestamp(project_end)
+
+    if project_start > project_end:
+        st.error("⚠️ Enddatum muss nach dem Startdatum liegen!")
+    else:
+        project_cost_df = shared_state.derived("project_costs", today=as_of,
+                                               project_cost_range=(project_start, project_end))
+        cost_columns = [*planner.PROJECTS, planner.OVERHEAD]
+        total_cost = project_cost_df[planner.TOTAL].sum()
+        metric_columns = st.columns(len(cost_columns))
+        for column, name in zip(metric_columns, cost_columns):
+            with column:
+                share = project_cost_df[name].sum() / total_cost if total_cost else 0
+                st.metric(name, f"€{project_cost_df[name].sum():,.0f}", f"{share:.0%}", delta_color="off")
+
+        fig_projects = px.bar(
+            project_cost_df,
+            x='Monat',
+            y=cost_columns,
+            title="Kosten pro Projekt und Monat",
+            labels={'value': 'Kosten (€)', 'variable': 'Projekt'}
+        )
+        fig_projects.update_layout(xaxis_title="Monat", yaxis_title="Kosten (€)", legend_title="Projekt")
+        fig_projects.update_yaxes(tickformat=",.0f")
+        st.plotly_chart(fig_projects, use_container_width=True)
+        st.caption("Kosten werden nach den Allocation-Anteilen des Monats auf die Projekte verteilt; "
+                   "nicht verplante Anteile erscheinen als Overhead.")
+        project_display = project_cost_df.copy()
+        for name in [*cost_columns, planner.TOTAL]:
+            project_display[name] = project_display[name].apply(lambda x: f"€{x:,.0f}")
+        st.dataframe(project_display, use_container_width=True, hide_index=True)
+else:
+    st.info("Keine Mitarbeiterdaten verfügbar.")
+
+# Slice and dice: headcount/FTE/cost/budget cube, built once per data version
+perf.section("cost_cube", rows=len(df))
+st.markdown("---")
+st.markdown("### 🧊 Auswertung nach Typ, Team, Rolle und Projekt")
+
+CUBE_DIMENSIONS = {"Mitarbeitertyp": "employee_type", "Team": "team", "Rolle": "role", "Projekt": "project"}
+CUBE_MEASURES = {label: measure for measure, label in planner.cube.MEASURES.items()}
+
+if not df.empty:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        cube_start = st.date_input("Von", value=as_of.replace(day=1), key="cube_start")
+    with col2:
+        cube_end = st.date_input("Bis", value=as_of + pd.DateOffset(months=11), key="cube_end")
+    with col3:
+        # Rolle nur auf Wunsch: vervielfacht die Zellen des Würfels
+        cube_roles = st.checkbox("Nach Rolle auswerten", key="cube_roles")
+    cube_dimensions = {label: dimension for label, dimension in CUBE_DIMENSIONS.items()
+                       if cube_roles or dimension not in planner.cube.OPTIONAL_DIMENSIONS}
+    cube_start, cube_end = pd.Timestamp(cube_start), pd.Timestamp(cube_end)
+
+    if cube_start > cube_end:
+        st.error("⚠️ Enddatum muss nach dem Startdatum liegen!")
+    else:
+        cube = shared_state.derived("cost_cube", today=as_of,
+                                    cube_range=(cube_start, cube_end, tuple(cube_dimensions.values())))
+
+        # Empty selection = all labels (rollup)
+        filter_columns = st.columns(len(cube_dimensions))
+        selection = {}
+        for column, (label, dimension) in zip(filter_columns, cube_dimensions.items()):
+            with column:
+                selection[dimension] = st.multiselect(label, cube.labels[dimension], key=f"cube_{dimension}",
+                                                      placeholder="Alle")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            group_label = st.selectbox("Aufteilen nach", ["—", *cube_dimensions], key="cube_group")
+        with col2:
+            measure_label = st.selectbox("Kennzahl", list(CUBE_MEASURES), index=2, key="cube_measure")
+        with col3:
+            period_label = st.radio("Zeitraster", list(planner.PERIODS), horizontal=True, key="cube_period")
+        period = planner.PERIODS[period_label]
+
+        cube_df = cube.frame(period, **selection)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Kosten", f"€{cube_df['Kosten'].sum():,.0f}")
+        with col2:
+            st.metric("Budget", f"€{cube_df['Budget'].sum():,.0f}")
+        with col3:
+            st.metric("Abweichung", f"€{cube_df['Abweichung'].sum():,.0f}",
+                      f"{(cube_df['Über Budget']).sum()} von {len(cube_df)} Zeiträumen über Budget",
+                      delta_color="off")
+
+        if group_label == "—":
+            fig_cube = px.bar(cube_df, x='Zeitraum', y=measure_label, title=f"{measure_label} pro {period_label}")
+            if measure_label == "Kosten":
+                fig_cube.add_trace(go.Scatter(x=cube_df['Zeitraum'], y=cube_df['Budget'], mode='lines+markers',
+                                              name='Budget', line=dict(dash='dash')))
+        else:
+            breakdown = cube.breakdown(CUBE_DIMENSIONS[group_label], CUBE_MEASURES[measure_label], period, **selection)
+            fig_cube = px.bar(breakdown, x='Zeitraum', y=[c for c in breakdown.columns if c != 'Zeitraum'],
+                              title=f"{measure_label} pro {period_label} nach {group_label}",
+                              labels={'value': measure_label, 'variable': group_label})
+        fig_cube.update_layout(xaxis_title=period_label, yaxis_title=measure_label)
+        fig_cube.update_yaxes(tickformat=",.0f")
+        st.plotly_chart(fig_cube, use_container_width=True)
+        st.dataframe(cube_df.round(2), use_container_width=True, hide_index=True)
+
+        # Export of the current slice
+        export_name = f"auswertung_{cube_start:%Y%m}_{cube_end:%Y%m}"
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("⬇️ CSV", planner.export_bytes(cube_df, "csv"), f"{export_name}.csv", "text/csv")
+        with col2:
+            if planner.PARQUET:
+                st.download_button("⬇️ Parquet", planner.export_bytes(cube_df, "parquet"), f"{export_name}.parquet",
+                                   "application/octet-stream")
+            else:
+                st.caption("Parquet-Export benötigt pyarrow.")
+else:
+    st.info("Keine Mitarbeiterdaten verfügbar.")
+
+instrumentation.end_rerun(perf)
@@ -5,6 +5,11 @@ import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import numpy as np
 
+import instrumentation
+import planner
+import shared_state
+from planner import PROJECTS
+
 # Page config
 st.set_page_config(
     page_title="Projekt-Allocation",
@@ -12,20 +17,34 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize project allocation data
-if 'project_allocations' not in st.session_state:
-    st.session_state.project_allocations = []
+# Rerun-Instrumentierung (Section-Timer, Debug-Panel, Traces)
+perf = instrumentation.begin_rerun("Projekt_Allocation")
+perf.section("session_init")
+
+# Projekt-Allocations liegen im gemeinsamen Datenmodell; Kosten, Stundenmodelle und
+# Komponenten braucht der Allocation-Optimierer
+snapshot = shared_state.attach({
+    # Teamdaten legt die Startseite an; hier nur übernehmen, falls schon im Session-State
+    "team_data": None,
+    "project_allocations": list,
+    "budget_data": planner.default_budget_data,
+    "employee_settings": dict,
+    "rate_history": list,
+    "components": list,
+})
+
+# Stichtag dieses Reruns, wird an alle Berechnungen übergeben
+as_of = shared_state.as_of_date()
 
 # Projects
-PROJECTS = ["CG", "iUZ", "iBS"]
 PROJECT_COLORS = {
     "CG": "#FF6B6B",
     "iUZ": "#4ECDC4",
     "iBS": "#45B7D1"
 }
 
-# Check if team_data exists
-if 'team_data' not in st.session_state:
+# Check if team_data exists (im gemeinsamen Datenmodell, nicht nur im Session-State)
+if snapshot.get("team_data") is None:
     st.error("Teamdaten nicht gefunden. Bitte zuerst die Organisationsseite besuchen.")
     st.stop()
 
@@ -36,6 +55,7 @@ st.markdown("Verfolgung der Mitarbeiter-Allokation auf Projekte über Zeit")
 df_team = pd.DataFrame(st.session_state.team_data)
 
 # Sidebar for allocation management
+perf.section("sidebar_forms", rows=len(st.session_state.project_allocations))
 st.sidebar.markdown("### ➕ Neue Allocation hinzufügen")
 
 with st.sidebar.form("add_allocation"):
@@ -46,12 +66,14 @@ with st.sidebar.form("add_allocation"):
     # Project selection
     selected_project = st.selectbox("Projekt", PROJECTS)
 
-    # Month range selection
+    # Granularity and date range: whole months, whole weeks or exact days
+    granularity_label = st.radio("Auflösung", list(planner.ALLOCATION_GRANULARITIES), horizontal=True,
+                                 help="Monat: ganze Monate von Start bis Ende, Woche: ganze Wochen (Mo–So), Tag: genau von Start bis Ende")
     col1, col2 = st.columns(2)
     with col1:
-        start_month = st.date_input("Start Monat", value=datetime.now().replace(day=1))
+        start_month = st.date_input("Start", value=as_of.replace(day=1))
     with col2:
-        end_month = st.date_input("End Monat", value=(datetime.now() + timedelta(days=365)).replace(day=1))
+        end_month = st.date_input("Ende", value=(as_of + timedelta(days=365)).replace(day=1))
 
     # Allocation percentage
     allocation_percentage = st.slider("Allokationsprozentsatz (%)", 0, 100, 50)
@@ -63,47 +85,32 @@ with st.sidebar.form("add_allocation"):
         if end_month < start_month:
             st.error("Enddatum muss nach Startdatum liegen!")
         else:
-            # Check for overallocation (total allocation > 100% for any month)
-            overallocated = False
-            over_allocation_month = None
-
-            # Generate months for this allocation
-            check_date = start_month.replace(day=1)
-            while check_date <= end_month:
-                total_allocation = allocation_percentage
-                # Add existing allocations for this employee in this month
-                for alloc in st.session_state.project_allocations:
-                    if (alloc['employee'] == selected_employee and
-                        alloc['start_date'] <= check_date <= alloc['end_date']):
-                        total_allocation += alloc['percentage']
-
-                if total_allocation > 100:
-                    overallocated = True
-                    over_allocation_month = check_date.strftime('%Y-%m')
-                    break
-
-                # Move to next month
-                if check_date.month == 12:
-                    check_date = check_date.replace(year=check_date.year + 1, month=1)
-                else:
-                    check_date = check_date.replace(month=check_date.month + 1)
-
-            if overallocated:
-                st.error(f"Overallokation in {over_allocation_month}! Gesamtallokation würde {total_allocation}% übersteigen (max. 100%).")
+            # Check for overallocation (total allocation > 100% on any day)
+            granularity = planner.ALLOCATION_GRANULARITIES[granularity_label]
+            overallocation = planner.check_overallocation(
+                shared_state.derived("allocation_runs"),
+                selected_employee, start_month, end_month, allocation_percentage, granularity
+            )
+            if overallocation is not None:
+                over_allocation_day, total_allocation = overallocation
+                st.error(f"Overallokation ab {over_allocation_day}! Gesamtallokation würde {total_allocation:.0f}% übersteigen (max. 100%).")
             else:
-                # Add allocation
+                # Add allocation; ids stay unique after deletions (Szenarien entfernen Allocations per id)
+                allocations = st.session_state.project_allocations
                 allocation = {
                     'employee': selected_employee,
                     'project': selected_project,
                     'start_date': start_month,
                     'end_date': end_month,
                     'percentage': allocation_percentage,
-                    'id': len(st.session_state.project_allocations)
+                    'id': max((a['id'] for a in allocations if isinstance(a['id'], int)), default=-1) + 1,
+                    'granularity': granularity
                 }
-                st.session_state.project_allocations.append(allocation)
-                st.success(f"✅ Allocation für {selected_employee} auf {selected_project} ({allocation_percentage}%) gespeichert!")
+                if shared_state.commit({"project_allocations": allocations + [allocation]}):
+                    st.success(f"✅ Allocation für {selected_employee} auf {selected_project} ({allocation_percentage}%) gespeichert!")
 
 # Display current allocations
+perf.section("allocation_list", rows=len(st.session_state.project_allocations))
 st.markdown("---")
 st.markdown("### 📋 Aktuelle Projekt-Allocations")
 
@@ -111,43 +118,79 @@ if st.session_state.project_allocations:
     # Convert to DataFrame for display
     df_allocations = pd.DataFrame(st.session_state.project_allocations)
 
-    # Format dates
-    df_allocations['start_date'] = pd.to_datetime(df_allocations['start_date']).dt.strftime('%Y-%m')
-    df_allocations['end_date'] = pd.to_datetime(df_allocations['end_date']).dt.strftime('%Y-%m')
+    # Format dates: months as YYYY-MM, week and day allocations with the day
+    granularities = df_allocations.reindex(columns=['granularity'])['granularity'].fillna('month')
+    by_month = (granularities == 'month').to_numpy()
+    for column in ['start_date', 'end_date']:
+        dates = pd.to_datetime(df_allocations[column])
+        df_allocations[column] = np.where(by_month, dates.dt.strftime('%Y-%m'), dates.dt.strftime('%Y-%m-%d'))
+    granularity_labels = {value: label for label, value in planner.ALLOCATION_GRANULARITIES.items()}
+    df_allocations['granularity'] = granularities.map(granularity_labels)
 
     # Display table
-    st.dataframe(df_allocations[['employee', 'project', 'start_date', 'end_date', 'percentage']].rename(columns={
+    st.dataframe(df_allocations[['employee', 'project', 'start_date', 'end_date', 'granularity', 'percentage']].rename(columns={
         'employee': 'Mitarbeiter',
         'project': 'Projekt',
         'start_date': 'Start',
         'end_date': 'Ende',
+        'granularity': 'Auflösung',
         'percentage': 'Prozent (%)'
     }), use_container_width=True)
 
     # Delete allocation option
     st.markdown("#### 🗑️ Allocation löschen")
-    allocation_options = [f"{alloc['employee']} - {alloc['project']} ({alloc['percentage']}%) - {pd.to_datetime(alloc['start_date']).strftime('%Y-%m')} bis {pd.to_datetime(alloc['end_date']).strftime('%Y-%m')}"
-                         for alloc in st.session_state.project_allocations]
+    allocation_options = [f"{alloc['employee']} - {alloc['project']} ({alloc['percentage']}%) - {start} bis {end}"
+                          for alloc, start, end in zip(st.session_state.project_allocations,
+                                                       df_allocations['start_date'], df_allocations['end_date'])]
 
     if allocation_options:
         selected_to_delete = st.selectbox("Zu löschende Allocation auswählen", allocation_options)
         if st.button("🗑️ Löschen", type="secondary"):
             # Find and remove the allocation
-            for i, alloc in enumerate(st.session_state.project_allocations):
-                alloc_str = f"{alloc['employee']} - {alloc['project']} ({alloc['percentage']}%) - {pd.to_datetime(alloc['start_date']).strftime('%Y-%m')} bis {pd.to_datetime(alloc['end_date']).strftime('%Y-%m')}"
+            for i, alloc_str in enumerate(allocation_options):
                 if alloc_str == selected_to_delete:
-                    del st.session_state.project_allocations[i]
-                    st.success("✅ Allocation gelöscht!")
-                    st.rerun()
+                    remaining = st.session_state.project_allocations[:i] + st.session_state.project_allocations[i + 1:]
+                    if shared_state.commit({"project_allocations": remaining}):
+                        st.success("✅ Allocation gelöscht!")
+                        st.rerun()
                     break
 else:
     st.info("Keine Projekt-Allocations vorhanden. Fügen Sie eine neue Allocation hinzu.")
 
+# Conflicts of all allocations (overallocation, outside employment, unknown employee)
+perf.section("conflicts", rows=len(st.session_state.project_allocations))
+st.markdown("---")
+st.markdown("### ⚠️ Allocation-Konflikte")
+
+conflicts = shared_state.get_conflicts().report()
+if conflicts.empty:
+    st.success("✅ Keine Konflikte: keine Überbelegung und keine Allocations außerhalb der Beschäftigungszeit.")
+else:
+    reason_counts = conflicts['reason'].value_counts()
+    reason_cols = st.columns(len(reason_counts))
+    for col, (reason, count) in zip(reason_cols, reason_counts.items()):
+        col.metric(reason, int(count))
+
+    selected_reasons = st.multiselect("Konfliktart", list(reason_counts.index), default=list(reason_counts.index),
+                                      key="conflict_reasons")
+    shown = conflicts[conflicts['reason'].isin(selected_reasons)]
+    st.dataframe(shown.drop(columns=['allocation_ids']).rename(columns={
+        'employee': 'Mitarbeiter',
+        'reason': 'Konflikt',
+        'start_date': 'Von',
+        'end_date': 'Bis',
+        'days': 'Tage',
+        'total': 'Gesamt (%)',
+        'projects': 'Projekte'
+    }), use_container_width=True, hide_index=True)
+    st.caption("Geprüft wird tageweise: Monats-Allocations gelten für ganze Monate, Wochen-Allocations für ganze Wochen (Mo–So).")
+
 # Initialize date range variables
 gantt_start_date = None
 gantt_end_date = None
 
 # Gantt Chart Visualization
+perf.section("filters", rows=len(st.session_state.project_allocations))
 st.markdown("---")
 st.markdown("### 📊 Gantt-Chart: Projekt-Allocations")
 
@@ -155,30 +198,12 @@ st.markdown("### 📊 Gantt-Chart: Projekt-Allocations")
 st.markdown("#### 📅 Zeitraum-Filter")
 
 if st.session_state.project_allocations:
-    # Get date range from allocations (ensure date objects)
-    all_dates = []
-    for alloc in st.session_state.project_allocations:
-        start_date = alloc['start_date']
-        end_date = alloc['end_date']
-        if isinstance(start_date, datetime):
-            start_date = start_date.date()
-        if isinstance(end_date, datetime):
-            end_date = end_date.date()
-
-        # write back normalized dates
-        alloc['start_date'] = start_date
-        alloc['end_date'] = end_date
-
-        all_dates.extend([start_date, end_date])
-
-    if all_dates:
-        min_date = min(all_dates)
-        max_date = max(all_dates)
-
-        # Default to showing last 12 months if current date is within range
-        today = datetime.now().date()
-        default_start = max(min_date, today - timedelta(days=365))
-        default_end = min(max_date, today + timedelta(days=180))  # 6 months ahead
+    # Date range of all allocations; default: last 12 to next 6 months (as in the materialized view)
+    today = as_of.date()
+    gantt = planner.gantt_defaults(st.session_state.project_allocations, today)
+
+    if gantt is not None:
+        min_date, max_date, default_start, default_end = gantt
 
         # Quick preset options
         st.markdown("**Schnellauswahl:**")
@@ -234,44 +259,17 @@ if st.session_state.project_allocations:
             gantt_end_date = gantt_start_date + timedelta(days=30)  # Default to 1 month
 
         # Filter allocations for the selected period
-        filtered_allocations = []
-        for alloc in st.session_state.project_allocations:
-            # Include allocation if it overlaps with the selected period
-            if not (alloc['end_date'] < gantt_start_date or alloc['start_date'] > gantt_end_date):
-                filtered_allocations.append(alloc)
+        alloc_df = shared_state.derived("allocations")
+        filtered_allocations = planner.filter_allocations(alloc_df, gantt_start_date, gantt_end_date)
 
         st.info(f"📊 Zeige {len(filtered_allocations)} von {len(st.session_state.project_allocations)} Allokationen im Zeitraum {gantt_start_date.strftime('%Y-%m')} bis {gantt_end_date.strftime('%Y-%m')}")
 
-        if filtered_allocations:
+        perf.section("charts", rows=len(filtered_allocations))
+        if not filtered_allocations.empty:
             # Create Gantt chart data with filtered allocations
-            gantt_data = []
-
-            for alloc in filtered_allocations:
-                # Get employee info
-                employee_info = df_team[df_team['name'] == alloc['employee']].iloc[0] if not df_team[df_team['name'] == alloc['employee']].empty else None
-
-                if employee_info is not None:
-                    # Calculate FTE based on allocation percentage
-                    fte_value = alloc['percentage'] / 100.0
-
-                    gantt_data.append({
-                        'Task': f"{alloc['employee']} ({alloc['project']})",
-                        'Start': alloc['start_date'],
-                        'Finish': alloc['end_date'],
-                        'Resource': alloc['project'],
-                        'Percentage': alloc['percentage'],
-                        'FTE': fte_value,
-                        'Employee_Type': employee_info['employee_type'],
-                        'Role': employee_info['role']
-                    })
-
-            if gantt_data:
-                df_gantt = pd.DataFrame(gantt_data)
-
-                # Make sure date types are accepted by plotly (datetime64)
-                df_gantt['Start'] = pd.to_datetime(df_gantt['Start'])
-                df_gantt['Finish'] = pd.to_datetime(df_gantt['Finish'])
+            df_gantt = planner.gantt_frame(filtered_allocations, df_team)
 
+            if not df_gantt.empty:
                 # Create Gantt chart with plotly.express timeline for reliable bars
                 fig = px.timeline(
                     df_gantt,
@@ -318,24 +316,13 @@ if st.session_state.project_allocations:
 
                 col1, col2, col3 = st.columns(3)
 
+                # Only allocations of known team members, as in the Gantt chart
+                known_allocations = filtered_allocations[filtered_allocations['employee'].isin(df_team['name'])]
+                project_fte_months = planner.fte_months(planner.AllocationRuns(known_allocations),
+                                                        gantt_start_date, gantt_end_date)
                 for i, project in enumerate(PROJECTS):
-                    project_allocs = df_gantt[df_gantt['Resource'] == project]
-                    total_fte_months = 0
-
-                    for idx, row in project_allocs.iterrows():
-                        # Convert Timestamp to date for comparison
-                        row_start = row['Start'].date() if hasattr(row['Start'], 'date') else row['Start']
-                        row_end = row['Finish'].date() if hasattr(row['Finish'], 'date') else row['Finish']
-
-                        # Calculate actual months shown in the filtered period
-                        actual_start = max(row_start, gantt_start_date)
-                        actual_end = min(row_end, gantt_end_date)
-                        if actual_start < actual_end:
-                            months_diff = (actual_end.year - actual_start.year) * 12 + (actual_end.month - actual_start.month) + 1
-                            total_fte_months += row['FTE'] * months_diff
-
                     with [col1, col2, col3][i]:
-                        st.metric(f"{project} FTE-Monate", f"{total_fte_months:.1f}")
+                        st.metric(f"{project} FTE-Monate", f"{project_fte_months[project]:.1f}")
             else:
                 st.info("Keine Allokationen im ausgewählten Zeitraum gefunden.")
         else:
@@ -346,6 +333,7 @@ else:
     st.info("Keine Daten für Gantt-Chart verfügbar.")
 
 # Monthly allocation overview
+perf.section("monthly_overview", rows=len(st.session_state.project_allocations))
 st.markdown("---")
 st.markdown("### 📅 Monatliche Übersicht")
 
@@ -359,48 +347,19 @@ if st.session_state.project_allocations:
         all_dates = []
         for alloc in st.session_state.project_allocations:
             all_dates.extend([alloc['start_date'], alloc['end_date']])
-        monthly_start = min(all_dates) if all_dates else datetime.now().date()
-        monthly_end = max(all_dates) if all_dates else datetime.now().date() + timedelta(days=365)
-
-    # Generate monthly breakdown for selected period
-    monthly_data = []
-
-    # Generate all months in selected range
-    current_date = monthly_start.replace(day=1) if hasattr(monthly_start, 'replace') else monthly_start
-    end_limit = monthly_end.replace(day=1) if hasattr(monthly_end, 'replace') else monthly_end
-    
-    while current_date <= end_limit:
-        month_data = {'Month': current_date.strftime('%Y-%m')}
-
-        # Calculate per project FTE
-        for project in PROJECTS:
-            total_fte = 0
-            for alloc in st.session_state.project_allocations:
-                if (alloc['project'] == project and
-                    alloc['start_date'] <= current_date <= alloc['end_date']):
-                    total_fte += alloc['percentage'] / 100.0
-            month_data[f'{project} FTE'] = total_fte
-
-        # Calculate per employee total allocation
-        employee_allocations = {}
-        for alloc in st.session_state.project_allocations:
-            if alloc['start_date'] <= current_date <= alloc['end_date']:
-                emp = alloc['employee']
-                if emp not in employee_allocations:
-                    employee_allocations[emp] = 0
-                employee_allocations[emp] += alloc['percentage']
-
-        for emp in df_team['name'].unique():
-            month_data[f'{emp} Total %'] = employee_allocations.get(emp, 0)
-
-        monthly_data.append(month_data)
-        # Move to next month
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
-        else:
-            current_date = current_date.replace(month=current_date.month + 1)
+        monthly_start = min(all_dates) if all_dates else as_of.date()
+        monthly_end = max(all_dates) if all_dates else as_of.date() + timedelta(days=365)
+
+    # Resolution of the overview: averages over the days of each month, week or day
+    period_label = st.radio("Auflösung", list(planner.ALLOCATION_PERIODS), horizontal=True, key="allocation_period")
+    period_freq = planner.ALLOCATION_PERIODS[period_label][0]
+
+    # Generate breakdown for selected period
+    df_monthly = shared_state.materialized("allocation_matrix", latest=True,
+                                           allocation_range=(monthly_start, monthly_end, period_freq))
+    period_column = df_monthly.columns[0]
+    perf.rows(len(df_monthly) * len(st.session_state.project_allocations))
 
-    df_monthly = pd.DataFrame(monthly_data)
     st.dataframe(df_monthly, use_container_width=True)
 
     # Monthly chart
@@ -408,7 +367,7 @@ if st.session_state.project_allocations:
 
     for project in PROJECTS:
         fig_monthly.add_trace(go.Scatter(
-            x=df_monthly['Month'],
+            x=df_monthly[period_column],
             y=df_monthly[f'{project} FTE'],
             mode='lines+markers',
             name=project,
@@ -417,8 +376,8 @@ if st.session_state.project_allocations:
         ))
 
     fig_monthly.update_layout(
-        title=f"Monatliche FTE-Entwicklung pro Projekt ({monthly_start.strftime('%Y-%m')} bis {monthly_end.strftime('%Y-%m')})",
-        xaxis_title="Monat",
+        title=f"FTE-Entwicklung pro Projekt je {period_label} ({monthly_start.strftime('%Y-%m')} bis {monthly_end.strftime('%Y-%m')})",
+        xaxis_title=period_label,
         yaxis_title="Gesamt FTE",
         height=400
     )
@@ -435,7 +394,7 @@ if st.session_state.project_allocations:
         for emp_col in employee_cols:
             emp_name = emp_col.replace(' Total %', '')
             fig_employees.add_trace(go.Scatter(
-                x=df_monthly['Month'],
+                x=df_monthly[period_column],
                 y=df_monthly[emp_col],
                 mode='lines+markers',
                 name=emp_name,
@@ -445,7 +404,7 @@ if st.session_state.project_allocations:
 
         # Add 100% reference line
         fig_employees.add_trace(go.Scatter(
-            x=df_monthly['Month'],
+            x=df_monthly[period_column],
             y=[100] * len(df_monthly),
             mode='lines',
             name='100% Kapazität',
@@ -454,12 +413,81 @@ if st.session_state.project_allocations:
         ))
 
         fig_employees.update_layout(
-            title=f"Mitarbeiter-Gesamtauslastung über Zeit ({monthly_start.strftime('%Y-%m')} bis {monthly_end.strftime('%Y-%m')})",
-            xaxis_title="Monat",
+            title=f"Mitarbeiter-Gesamtauslastung je {period_label} ({monthly_start.strftime('%Y-%m')} bis {monthly_end.strftime('%Y-%m')})",
+            xaxis_title=period_label,
             yaxis_title="Auslastung (%)",
             height=400
         )
 
         st.plotly_chart(fig_employees, use_container_width=True)
 else:
-    st.info("Keine monatlichen Daten verfügbar.")
\ No newline at end of file
+    st.info("Keine monatlichen Daten verfügbar.")
+
+# Allocation optimizer
+perf.section("optimizer", rows=len(st.session_state.team_data))
+st.markdown("---")
+st.markdown("### 🤖 Allocation-Optimierer")
+st.markdown("Schlägt Allocations vor, die den monatlichen FTE-Bedarf je Projekt mit der freien Kapazität "
+            "der Mitarbeiter decken (max. 100 %, Interns nach Wochenstunden).")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    optimizer_start = st.date_input("Start Monat", value=as_of.replace(day=1), key="optimizer_start")
+with col2:
+    optimizer_months = st.slider("Anzahl Monate", 1, 36, 12, key="optimizer_months")
+with col3:
+    enforce_skills = st.checkbox("Nur Mitarbeiter mit Komponenten des Produkts",
+                                 help="Berücksichtigt nur Mitarbeiter, die an einer Komponente des jeweiligen Produkts arbeiten.")
+
+st.markdown("**FTE-Bedarf je Monat und Projekt** (Gesamtbedarf inklusive bestehender Allocations)")
+current_fte = planner.project_fte(shared_state.derived("allocations"), optimizer_start, optimizer_months)
+demand_df = st.data_editor(current_fte.round(1), disabled=['Monat'], hide_index=True, use_container_width=True,
+                           key=f"optimizer_demand_{optimizer_start}_{optimizer_months}")
+
+if st.button("🔍 Vorschlag berechnen"):
+    st.session_state.optimizer_params = (pd.Timestamp(optimizer_start),
+                                         tuple(map(tuple, demand_df[PROJECTS].to_numpy(dtype=float).round(2))),
+                                         enforce_skills)
+
+# Der Vorschlag rechnet im Hintergrund; die Seite lädt neu, sobald er fertig ist
+proposal = None
+if st.session_state.get("optimizer_params"):
+    proposal = shared_state.derived_latest("allocation_proposal", wait=False, today=as_of,
+                                           optimizer_params=st.session_state.optimizer_params)
+if proposal is not None:
+    proposals, coverage = proposal
+    perf.rows(len(st.session_state.team_data) * len(coverage))
+    open_cols = [f"{project} Offen" for project in PROJECTS]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Vorgeschlagene Allocations", len(proposals))
+    col2.metric("Vorgeschlagene FTE-Monate", f"{coverage[[f'{p} Vorschlag' for p in PROJECTS]].to_numpy().sum():.1f}")
+    col3.metric("Ungedeckte FTE-Monate", f"{coverage[open_cols].to_numpy().sum():.1f}")
+    if coverage[open_cols].to_numpy().sum() > 0:
+        st.warning("⚠️ Der Bedarf kann mit der freien Kapazität nicht vollständig gedeckt werden.")
+
+    with st.expander("📊 Bedarfsdeckung je Monat"):
+        st.dataframe(coverage, use_container_width=True, hide_index=True)
+
+    if proposals.empty:
+        st.info("ℹ️ Kein zusätzlicher Bedarf oder keine freie Kapazität im gewählten Zeitraum.")
+    else:
+        selection = st.data_editor(proposals.assign(Übernehmen=True), hide_index=True, use_container_width=True,
+                                   disabled=list(proposals.columns), key="optimizer_selection")
+        if st.button("✅ Ausgewählte Allocations übernehmen", type="primary"):
+            accepted = selection[selection['Übernehmen']]
+            allocations = st.session_state.project_allocations
+            next_id = max((a['id'] for a in allocations if isinstance(a['id'], int)), default=-1) + 1
+            new_allocations = [{
+                'employee': str(row['employee']),
+                'project': str(row['project']),
+                'start_date': row['start_date'],
+                'end_date': row['end_date'],
+                'percentage': int(row['percentage']),
+                'id': next_id + i
+            } for i, row in enumerate(accepted.to_dict('records'))]
+            if shared_state.commit({"project_allocations": allocations + new_allocations}):
+                del st.session_state.optimizer_params
+                st.success(f"✅ {len(new_allocations)} Allocations übernommen!")
+                st.rerun()
+
+instrumentation.end_rerun(perf)
@@ -0,0 +1,226 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import timedelta
+
+import instrumentation
+import planner
+import shared_state
+from planner import EMPLOYEE_TYPES, PROJECTS
+
+# Page config
+st.set_page_config(
+    page_title="Szenarien",
+    page_icon="🔮",
+    layout="wide"
+)
+
+# Rerun-Instrumentierung (Section-Timer, Debug-Panel, Traces)
+perf = instrumentation.begin_rerun("Szenarien")
+perf.section("session_init")
+
+# Szenarien liegen als Overlays (nur Änderungen) neben dem Basisplan im gemeinsamen Datenmodell
+snapshot = shared_state.attach({
+    # Teamdaten legt die Startseite an; hier nur übernehmen, falls schon im Session-State
+    "team_data": None,
+    "scenarios": dict,
+    "components": list,
+    "budget_data": planner.default_budget_data,
+    "employee_settings": dict,
+    "rate_history": list,
+    "project_allocations": list,
+})
+
+# Stichtag dieses Reruns, wird an alle Berechnungen übergeben
+as_of = shared_state.as_of_date()
+
+# Check if team_data exists (im gemeinsamen Datenmodell, nicht nur im Session-State)
+if snapshot.get("team_data") is None:
+    st.error("Teamdaten nicht gefunden. Bitte zuerst die Organisationsseite besuchen.")
+    st.stop()
+
+st.title("🔮 Szenarien (Was-wäre-wenn)")
+st.markdown("Szenarien verändern den Plan nicht, sondern speichern nur Abweichungen vom Basisplan.")
+
+scenarios = st.session_state.scenarios
+member_names = [member['name'] for member in st.session_state.team_data]
+component_names = shared_state.derived("component_registry").names
+
+
+def save_scenario(name, scenario):
+    """Commit one scenario as a new scenarios dict (copy-on-write)."""
+    if shared_state.commit({"scenarios": {**st.session_state.scenarios, name: scenario}}):
+        st.rerun()
+
+
+# Scenario selection and management
+perf.section("sidebar_forms", rows=len(scenarios))
+st.sidebar.markdown("### 🔮 Szenario")
+
+with st.sidebar.form("new_scenario", clear_on_submit=True):
+    new_name = st.text_input("Neues Szenario")
+    if st.form_submit_button("➕ Anlegen", use_container_width=True):
+        if not new_name or new_name == planner.BASE_NAME:
+            st.error("Bitte einen eindeutigen Namen angeben.")
+        elif new_name in scenarios:
+            st.error(f"Szenario '{new_name}' existiert bereits.")
+        else:
+            st.session_state.selected_scenario = new_name
+            save_scenario(new_name, planner.empty_scenario())
+
+if not scenarios:
+    st.info("Noch keine Szenarien vorhanden. Legen Sie in der Sidebar ein Szenario an.")
+    instrumentation.end_rerun(perf)
+    st.stop()
+
+scenario_names = list(scenarios)
+if st.session_state.get("selected_scenario") not in scenario_names:
+    st.session_state.selected_scenario = scenario_names[0]
+selected = st.sidebar.selectbox("Szenario bearbeiten", scenario_names, key="selected_scenario")
+scenario = scenarios[selected]
+
+if st.sidebar.button("🗑️ Szenario löschen", use_container_width=True):
+    remaining = {name: sc for name, sc in scenarios.items() if name != selected}
+    if shared_state.commit({"scenarios": remaining}):
+        st.rerun()
+
+# Overlay editors
+perf.section("overlay_forms")
+st.markdown("---")
+st.markdown(f"### ✏️ Änderungen in „{selected}“")
+
+tab_exit, tab_hire, tab_comp, tab_alloc = st.tabs([
+    "🚪 Austritte verschieben", "➕ Neueinstellungen", "🧩 Komponenten umverteilen", "📅 Allocations ändern"
+])
+
+with tab_exit:
+    with st.form("exit_change", clear_on_submit=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            exit_members = st.multiselect("Mitarbeiter", member_names)
+        with col2:
+            new_exit = st.date_input("Neues Austrittsdatum", value=as_of + timedelta(days=90))
+        if st.form_submit_button("💾 Übernehmen") and exit_members:
+            exit_changes = {**scenario["exit_changes"], **{name: new_exit.strftime("%Y-%m-%d") for name in exit_members}}
+            save_scenario(selected, {**scenario, "exit_changes": exit_changes})
+    if scenario["exit_changes"]:
+        st.dataframe(pd.DataFrame(list(scenario["exit_changes"].items()), columns=["Mitarbeiter", "Neuer Austritt"]),
+                     use_container_width=True, hide_index=True)
+
+with tab_hire:
+    with st.form("hire", clear_on_submit=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            hire_type = st.selectbox("Mitarbeitertyp", EMPLOYEE_TYPES)
+            hire_count = st.number_input("Anzahl", min_value=1, max_value=100, value=1)
+        with col2:
+            hire_start = st.date_input("Startdatum", value=as_of + timedelta(days=90))
+            hire_exit = st.date_input("Austritt (optional)", value=None)
+        with col3:
+            hire_components = st.multiselect("Komponenten", component_names)
+        if st.form_submit_button("💾 Übernehmen"):
+            offset = len(scenario["hires"])
+            hires = scenario["hires"] + [{
+                "name": f"{hire_type} (neu {offset + i + 1})",
+                "employee_type": hire_type,
+                "start_date": hire_start.strftime("%Y-%m-%d"),
+                "planned_exit": hire_exit.strftime("%Y-%m-%d") if hire_exit else None,
+                "components": ", ".join(hire_components)
+            } for i in range(int(hire_count))]
+            save_scenario(selected, {**scenario, "hires": hires})
+    if scenario["hires"]:
+        st.dataframe(pd.DataFrame(scenario["hires"]), use_container_width=True, hide_index=True)
+
+with tab_comp:
+    if component_names:
+        with st.form("component_change", clear_on_submit=True):
+            comp = st.selectbox("Komponente", component_names)
+            responsibles = st.multiselect("Neue Verantwortliche", member_names)
+            if st.form_submit_button("💾 Übernehmen"):
+                component_changes = {**scenario["component_changes"], comp: responsibles}
+                save_scenario(selected, {**scenario, "component_changes": component_changes})
+    else:
+        st.info("ℹ️ Noch keine Komponenten hinzugefügt.")
+    if scenario["component_changes"]:
+        st.dataframe(pd.DataFrame([(comp, ", ".join(resp)) for comp, resp in scenario["component_changes"].items()],
+                                  columns=["Komponente", "Verantwortlich"]),
+                     use_container_width=True, hide_index=True)
+
+with tab_alloc:
+    with st.form("allocation_change", clear_on_submit=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            alloc_employee = st.selectbox("Mitarbeiter", member_names)
+            alloc_project = st.selectbox("Projekt", PROJECTS)
+        with col2:
+            alloc_start = st.date_input("Start", value=as_of.replace(day=1))
+            alloc_end = st.date_input("Ende", value=(as_of + timedelta(days=365)).replace(day=1))
+        with col3:
+            alloc_pct = st.slider("Allokation (%)", 0, 100, 50, 10)
+        if st.form_submit_button("➕ Allocation hinzufügen"):
+            changes = scenario["allocation_changes"]
+            added = changes["add"] + [{
+                'employee': alloc_employee,
+                'project': alloc_project,
+                'start_date': alloc_start,
+                'end_date': alloc_end,
+                'percentage': alloc_pct,
+                'id': f"{selected}-{len(changes['add'])}"
+            }]
+            save_scenario(selected, {**scenario, "allocation_changes": {**changes, "add": added}})
+
+    allocations = st.session_state.project_allocations
+    if allocations:
+        labels = {alloc['id']: f"{alloc['employee']} - {alloc['project']} ({alloc['percentage']}%)" for alloc in allocations}
+        to_remove = st.multiselect("Bestehende Allocations entfernen", list(labels),
+                                   default=[i for i in scenario["allocation_changes"]["remove"] if i in labels],
+                                   format_func=labels.get)
+        if st.button("💾 Entfernte Allocations übernehmen"):
+            save_scenario(selected, {**scenario, "allocation_changes": {**scenario["allocation_changes"], "remove": to_remove}})
+    if scenario["allocation_changes"]["add"]:
+        st.dataframe(pd.DataFrame(scenario["allocation_changes"]["add"]).drop(columns=['id']),
+                     use_container_width=True, hide_index=True)
+
+if st.button("↩️ Alle Änderungen dieses Szenarios verwerfen"):
+    save_scenario(selected, planner.empty_scenario())
+
+# Side-by-side comparison
+perf.section("comparison", rows=len(st.session_state.team_data) * (len(scenarios) + 1))
+st.markdown("---")
+st.markdown("### ⚖️ Vergleich")
+
+col1, col2 = st.columns([1, 3])
+with col1:
+    horizon_years = st.slider("Horizont (Jahre)", 1, 10, 5)
+with col2:
+    compared = st.multiselect("Szenarien", scenario_names, default=scenario_names)
+
+scenario_range = (as_of, as_of + pd.DateOffset(years=horizon_years))
+summary, timeline = shared_state.derived("scenario_comparison", today=as_of, scenario_range=scenario_range)
+shown = [planner.BASE_NAME] + compared
+summary = summary[summary['Szenario'].isin(shown)]
+timeline = timeline[timeline['Szenario'].isin(shown)]
+
+st.dataframe(summary.style.format({
+    "Kosten gesamt (€)": "€{:,.0f}",
+    "Δ Kosten (€)": "€{:+,.0f}",
+    **{f"{project} FTE (Ø)": "{:.2f}" for project in PROJECTS}
+}), use_container_width=True, hide_index=True)
+
+perf.section("charts", rows=len(timeline))
+col1, col2 = st.columns(2)
+with col1:
+    fig_headcount = px.line(timeline, x="Monat", y="Aktive Mitglieder", color="Szenario",
+                            title="Aktive Mitglieder pro Monat")
+    st.plotly_chart(fig_headcount, use_container_width=True)
+with col2:
+    fig_cost = px.line(timeline, x="Monat", y="Monatliche Kosten", color="Szenario",
+                       title="Monatliche Kosten")
+    fig_cost.update_yaxes(tickformat=",.0f")
+    st.plotly_chart(fig_cost, use_container_width=True)
+
+fig_coverage = px.line(timeline, x="Monat", y="Unterbesetzte Komponenten", color="Szenario",
+                       title="Unterbesetzte Komponenten (aktive Ressourcen < benötigt)")
+st.plotly_chart(fig_coverage, use_container_width=True)
+
+instrumentation.end_rerun(perf)
@@ -0,0 +1,70 @@
+"""
+Compute core of the resource dashboard.
+
+Pure pandas/NumPy functions without Streamlit or Plotly imports, so they can be
+used from the Streamlit pages, worker processes, benchmarks and CLI tools alike.
+"""
+from planner import clock
+from planner.allocation import (
+    ALLOCATION_GRANULARITIES,
+    ALLOCATION_PERIODS,
+    PROJECTS,
+    AllocationRuns,
+    allocation_frame,
+    check_overallocation,
+    filter_allocations,
+    fte_months,
+    gantt_defaults,
+    gantt_frame,
+    monthly_breakdown,
+)
+from planner.assignments import assignments_for, member_assignments
+from planner.attribution import OVERHEAD, TOTAL, member_costs, project_costs
+from planner.components import (
+    component_staffing,
+    component_summary,
+    responsible_exit_status,
+    transfer_alerts,
+)
+from planner.conflicts import ConflictScanner, scan_conflicts
+from planner.cube import DIMENSIONS, PARQUET, PERIODS, CostCube, export_bytes
+from planner.events import EventIndex, to_ical
+from planner.finance import (
+    FORECAST_FREQ,
+    calculate_employee_cost,
+    calculate_employee_fte,
+    cost_by_type,
+    cost_forecast,
+    cost_intervals,
+    cost_totals,
+    default_budget_data,
+    employee_costs,
+    resolve_costs,
+)
+from planner.forecast import GRANULARITIES, active_at, headcount_forecast, yearly_entries_exits
+from planner.hiring import hiring_plan
+from planner.jobs import JobRunner
+from planner.kpi import KpiCounters
+from planner.optimizer import project_fte, propose_allocations
+from planner.org import KINDS, UNASSIGNED, OrgRollup, OrgTree, default_org_units, in_subtree, subtree_teams
+from planner.rates import EMPLOYEE_SCOPE, RATE_FIELDS, TYPE_SCOPE, rates_at
+from planner.registry import ComponentRegistry, canonical_key, upsert_component
+from planner.scenarios import BASE_NAME, ScenarioEngine, compare as compare_scenarios, empty_scenario
+from planner.simulation import band_frame, coverage_risk, simulate
+from planner.team import (
+    CRITICAL_EXIT_DAYS,
+    EMPLOYEE_TYPES,
+    TEAMS,
+    age_distribution,
+    apply_tenure_classification,
+    birthdays_in_month,
+    build_team_frame,
+    calculate_kt_status_from_tenure,
+    calculate_priority_from_tenure,
+    classify_team,
+    classify_tenure,
+    critical_exits,
+    filter_team,
+    get_kt_status_mapping,
+    team_kpis,
+)
@@ -0,0 +1,236 @@
+"""
+Project allocations: day runs, overallocation check, period overview and FTE-months.
+
+Allocations are the dicts from st.session_state.project_allocations
+(employee, project, start_date, end_date, percentage, id, granularity). The
+granularity says how start/end are meant:
+- "month" (default, also for allocations without the key): all months whose
+  first day lies in [start_date, end_date], i.e. the whole end month,
+- "week": the whole (Monday-Sunday) weeks of start_date through end_date,
+- "day": exactly start_date through end_date.
+allocation_frame() turns each allocation into one day run [run_start, run_end)
+and AllocationRuns sums them per employee and per project into run-length
+encoded step functions (planner.runs), from which month, week and day views
+are period averages of prefix sums.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from planner.runs import Runs, day_numbers
+
+PROJECTS = ["CG", "iUZ", "iBS"]
+MAX_ALLOCATION = 100
+
+ALLOCATION_COLUMNS = ['employee', 'project', 'start_date', 'end_date', 'percentage', 'id', 'granularity']
+ALLOCATION_GRANULARITIES = {"Monat": "month", "Woche": "week", "Tag": "day"}
+
+# Overview resolution -> (pandas freq, first column, label format)
+ALLOCATION_PERIODS = {
+    "Monat": ("MS", "Month", "%Y-%m"),
+    "Woche": ("W-MON", "Week", "%G-W%V"),
+    "Tag": ("D", "Day", "%Y-%m-%d"),
+}
+_PERIOD_BY_FREQ = {freq: (column, fmt) for freq, column, fmt in ALLOCATION_PERIODS.values()}
+
+
+def allocation_runs(start_dates, end_dates, granularities):
+    """
+    Day run [run_start, run_end) of each allocation as datetime64[ns] arrays;
+    an empty run has run_start >= run_end.
+    """
+    starts = pd.DatetimeIndex(pd.to_datetime(start_dates)).normalize()
+    ends = pd.DatetimeIndex(pd.to_datetime(end_dates)).normalize()
+    granularities = np.asarray(granularities, dtype=object)
+    # month: first day of the first covered month up to the first day after the end month
+    month_first = np.where(starts.day == 1, starts, starts + pd.offsets.MonthBegin(1))
+    month_end = ends + pd.offsets.MonthBegin(1)
+    # week: Monday of the start week up to the Monday after the end week
+    week_first = starts - pd.to_timedelta(starts.weekday, unit='D')
+    week_end = ends + pd.to_timedelta(7 - ends.weekday, unit='D')
+    day_end = ends + pd.Timedelta(days=1)
+    run_start = np.select([granularities == "week", granularities == "day"],
+                          [week_first.to_numpy(), starts.to_numpy()], np.asarray(month_first, dtype='datetime64[ns]'))
+    run_end = np.select([granularities == "week", granularities == "day"],
+                        [week_end.to_numpy(), day_end.to_numpy()], month_end.to_numpy())
+    return run_start, run_end
+
+
+def allocation_frame(project_allocations):
+    """Typed allocation frame with datetime64 start/end and the day run [run_start, run_end)."""
+    alloc_df = pd.DataFrame(list(project_allocations), columns=ALLOCATION_COLUMNS)
+    alloc_df['start_date'] = pd.to_datetime(alloc_df['start_date'])
+    alloc_df['end_date'] = pd.to_datetime(alloc_df['end_date'])
+    alloc_df['percentage'] = alloc_df['percentage'].astype(float)
+    alloc_df['granularity'] = alloc_df['granularity'].fillna("month")
+    alloc_df['run_start'], alloc_df['run_end'] = allocation_runs(
+        alloc_df['start_date'], alloc_df['end_date'], alloc_df['granularity'])
+    return alloc_df
+
+
+class AllocationRuns:
+    """Allocated percent per employee and FTE per project as day runs (planner.runs.Runs)."""
+
+    def __init__(self, alloc_df, projects=PROJECTS):
+        self.projects = list(projects)
+        self.employees = pd.Index(pd.unique(alloc_df['employee']))
+        dated = (alloc_df['run_start'].notna() & alloc_df['run_end'].notna()).to_numpy()
+        starts = np.where(dated, day_numbers(alloc_df['run_start'].fillna(pd.Timestamp(0))), 0)
+        ends = np.where(dated, day_numbers(alloc_df['run_end'].fillna(pd.Timestamp(0))), 0)
+        percentages = alloc_df['percentage'].to_numpy(dtype=float)
+        employee_codes = np.where(dated, self.employees.get_indexer(alloc_df['employee']), -1)
+        self.by_employee = Runs(starts, ends, percentages, employee_codes, len(self.employees))
+        project_codes = np.where(dated, pd.Categorical(alloc_df['project'], categories=self.projects).codes, -1)
+        self.by_project = Runs(starts, ends, percentages / 100.0, project_codes, len(self.projects))
+
+    def employee_codes(self, employees):
+        """Group codes of `employees` (-1 for employees without allocations)."""
+        return self.employees.get_indexer(pd.Index(list(employees)))
+
+    def employee_averages(self, employees, bounds):
+        """Average allocated percent per employee (rows) and period between `bounds`."""
+        codes = self.employee_codes(employees)
+        averages = np.zeros((len(codes), len(bounds) - 1))
+        known = codes >= 0
+        averages[known] = self.by_employee.averages(bounds, codes[known])
+        return averages
+
+    def project_averages(self, bounds):
+        """Average FTE per project (rows) and period between `bounds`."""
+        return self.by_project.averages(bounds)
+
+
+def gantt_defaults(project_allocations, today):
+    """
+    (min_date, max_date, default_start, default_end) of the Gantt filter as
+    datetime.date: all allocation dates, and the last 12 to the next 6 months
+    around `today` within them. None without allocations.
+    """
+    dates = []
+    for alloc in project_allocations:
+        for value in (alloc['start_date'], alloc['end_date']):
+            if isinstance(value, datetime):
+                value = value.date()
+            elif not isinstance(value, date):
+                value = pd.Timestamp(value).date()
+            dates.append(value)
+    if not dates:
+        return None
+    min_date, max_date = min(dates), max(dates)
+    return (min_date, max_date, max(min_date, today - timedelta(days=365)),
+            min(max_date, today + timedelta(days=180)))
+
+
+def month_starts(start, end):
+    """First days of all months from start's month up to end."""
+    return pd.date_range(start=pd.Timestamp(start).replace(day=1), end=pd.Timestamp(end), freq='MS')
+
+
+def period_starts(start, end, freq='MS'):
+    """First days of all periods (MS, W-MON or D) from the one containing start up to end."""
+    start = pd.Timestamp(start).normalize()
+    if freq == 'MS':
+        start = start.replace(day=1)
+    elif freq == 'W-MON':
+        start = start - pd.Timedelta(days=start.weekday())
+    return pd.date_range(start=start, end=pd.Timestamp(end), freq=freq)
+
+
+def period_bounds(starts, freq='MS'):
+    """Day numbers of the period starts plus the end of the last period (len + 1)."""
+    starts = pd.DatetimeIndex(starts)
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    last_end = starts[-1] + pd.tseries.frequencies.to_offset(freq)
+    return day_numbers(starts.append(pd.DatetimeIndex([last_end])))
+
+
+def _period_average(alloc_df, values, codes, n_groups, bounds):
+    """Average of `values` per group (allocations with code -1 skipped) and period between `bounds`."""
+    if len(bounds) < 2:
+        return np.zeros((n_groups, 0))
+    runs = Runs(day_numbers(alloc_df['run_start']), day_numbers(alloc_df['run_end']), values, codes, n_groups)
+    return runs.averages(bounds)
+
+
+def check_overallocation(runs, employee, start_date, end_date, percentage, granularity="month"):
+    """
+    First day on which adding the allocation would exceed 100 %.
+
+    Returns (day 'YYYY-MM-DD', total %) or None.
+    """
+    run_start, run_end = allocation_runs([start_date], [end_date], [granularity])
+    start, end = day_numbers(run_start)[0], day_numbers(run_end)[0]
+    if start >= end:
+        return None
+    code = runs.employee_codes([employee])[0]
+    if code < 0:
+        return None if percentage <= MAX_ALLOCATION else (str(np.datetime64(start, 'D')), float(percentage))
+    over = runs.by_employee.first_above(code, start, end, MAX_ALLOCATION - percentage)
+    if over is None:
+        return None
+    day, existing = over
+    return str(np.datetime64(day, 'D')), existing + percentage
+
+
+def filter_allocations(alloc_df, start_date, end_date):
+    """Allocations overlapping [start_date, end_date]."""
+    start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    return alloc_df[(alloc_df['run_end'] > start_date) & (alloc_df['run_start'] <= end_date)]
+
+
+def monthly_breakdown(runs, employees, start_date, end_date, freq='MS'):
+    """
+    Period x (project FTE, employee total %) table for the selected range.
+
+    Periods are months, weeks or days (freq MS, W-MON or D); values are
+    averages over the days of the period. Columns: Month/Week/Day,
+    '<project> FTE' per project, '<employee> Total %' per employee.
+    """
+    column, fmt = _PERIOD_BY_FREQ[freq]
+    end_date = pd.Timestamp(end_date)
+    starts = period_starts(start_date, end_date.replace(day=1) if freq == 'MS' else end_date, freq)
+    table = pd.DataFrame({column: starts.strftime(fmt)})
+    if len(starts) == 0:
+        return table
+
+    bounds = period_bounds(starts, freq)
+    project_fte = runs.project_averages(bounds)
+    for i, project in enumerate(runs.projects):
+        table[f'{project} FTE'] = project_fte[i]
+
+    employees = list(pd.unique(pd.Series(employees)))
+    employee_total = runs.employee_averages(employees, bounds)
+    employee_cols = pd.DataFrame(employee_total.T, columns=[f'{emp} Total %' for emp in employees])
+    return pd.concat([table, employee_cols], axis=1)
+
+
+def fte_months(runs, start_date, end_date):
+    """FTE-months per project within [start_date, end_date]: FTE-days / days of their month."""
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+    if start >= end:
+        return {project: 0.0 for project in runs.projects}
+    cuts = pd.date_range(start + pd.offsets.MonthBegin(1), end - pd.Timedelta(days=1), freq='MS')
+    points = pd.DatetimeIndex([start]).append(cuts).append(pd.DatetimeIndex([end]))
+    days_in_month = points[:-1].days_in_month.to_numpy()
+    fte_days = np.diff(runs.by_project.integral(day_numbers(points)), axis=1)
+    totals = (fte_days / days_in_month).sum(axis=1)
+    return {project: float(totals[i]) for i, project in enumerate(runs.projects)}
+
+
+def gantt_frame(alloc_df, df_team):
+    """Allocations joined with employee type and role of the first matching team member."""
+    members = df_team.drop_duplicates('name')[['name', 'employee_type', 'role']]
+    gantt = alloc_df.merge(members, left_on='employee', right_on='name', how='inner')
+    return pd.DataFrame({
+        'Task': gantt['employee'] + " (" + gantt['project'] + ")",
+        'Start': gantt['run_start'],
+        'Finish': gantt['run_end'],
+        'Resource': gantt['project'],
+        'Percentage': gantt['percentage'],
+        'FTE': gantt['percentage'] / 100.0,
+        'Employee_Type': gantt['employee_type'],
+        'Role': gantt['role']
+    })
@@ -0,0 +1,57 @@
+"""
+Normalized member–component assignments.
+
+A member works on a component when it names the component in its free-text
+components field or is one of the component's responsibles in the registry.
+member_tokens() splits and canonicalizes the free text once per team_data
+version; member_assignments() resolves the tokens through the registry's
+canonicalization index and adds the responsibles, giving one row per
+(member row, component) with the source flags `named` and `responsible`.
+Staffing, hiring, simulation, scenarios and the optimizer read these rows
+(dataflow node "assignments") instead of parsing the text again.
+
+Member rows are positions in team_data, i.e. the row positions of the team frame.
+"""
+import numpy as np
+import pandas as pd
+
+from planner.registry import canonical_keys
+
+ASSIGNMENT_COLUMNS = ["member", "name", "comp", "component", "named", "responsible"]
+
+
+def member_tokens(components):
+    """One row per (member row, canonical key) of a sequence of components fields."""
+    tokens = pd.Series(list(components), dtype=object).fillna('').astype(str).str.split(',').explode().str.strip()
+    tokens = tokens[tokens != '']
+    return (pd.DataFrame({"member": tokens.index.to_numpy(dtype=int), "key": canonical_keys(tokens).to_numpy(dtype=object)})
+            .drop_duplicates(ignore_index=True))
+
+
+def member_assignments(names, tokens, registry):
+    """Assignment table (ASSIGNMENT_COLUMNS) of members `names` with their member_tokens()."""
+    names = pd.Series(list(names), dtype=object).astype(str).str.strip()
+    keys = pd.DataFrame({"key": registry.table["key"].to_numpy(), "comp": np.arange(len(registry))})
+    named = tokens.merge(keys, on="key")[["member", "comp"]].assign(named=True)
+    responsible = (registry.responsibles[["comp", "name"]]
+                   .merge(pd.DataFrame({"name": names.to_numpy(), "member": np.arange(len(names))}), on="name")
+                   [["member", "comp"]].assign(responsible=True))
+    table = named.merge(responsible, on=["member", "comp"], how="outer")
+    table["named"] = table["named"].notna().to_numpy()
+    table["responsible"] = table["responsible"].notna().to_numpy()
+    table = table.astype({"member": int, "comp": int}).sort_values(["comp", "member"], ignore_index=True)
+    table["name"] = names.to_numpy()[table["member"].to_numpy()]
+    table["component"] = registry.table["name"].to_numpy()[table["comp"].to_numpy()]
+    return table[ASSIGNMENT_COLUMNS]
+
+
+def assignments_for(df, registry):
+    """member_assignments() of a team frame."""
+    return member_assignments(df['name'], member_tokens(df['components']), registry)
+
+
+def component_pairs(df, registry, assignments=None):
+    """(component index, member row) arrays of all assignments."""
+    if assignments is None:
+        assignments = assignments_for(df, registry)
+    return assignments['comp'].to_numpy(dtype=int), assignments['member'].to_numpy(dtype=int)
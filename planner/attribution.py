@@ -0,0 +1,94 @@
+"""
+Project cost attribution: allocations x employee cost.
+
+Every employee's monthly cost (planner.finance: rate intervals within the
+employment, averaged over each month at day resolution) is split across the
+projects by the employee's allocation percentages in that month. The shares
+come from the allocation day runs of each (employee, project) pair; an
+employee allocated above 100 % is scaled down to 100 %, so the project costs
+plus overhead (the unallocated rest) add up to the total cost.
+
+The employee x month cost grid depends only on team and rates and is its own
+dataflow node (member_costs). An allocation edit only recomputes the pair
+grid and one matmul: projects x pairs indicator @ (pair shares x pair cost).
+"""
+import numpy as np
+import pandas as pd
+
+from planner.allocation import PROJECTS, _period_average, period_bounds
+from planner.finance import priced_intervals
+from planner.runs import Runs, day_numbers
+
+OVERHEAD = "Overhead"
+TOTAL = "Gesamt"
+
+
+def cost_months(start_date, end_date):
+    """Month starts from the month of start_date through the month of end_date."""
+    return pd.date_range(pd.Timestamp(start_date).replace(day=1), pd.Timestamp(end_date), freq='MS')
+
+
+def member_costs(df, costs, budget_data, start_date, end_date, intervals=None):
+    """Cost of every member of df (rows, df order) in each month (columns) between the dates."""
+    bounds = period_bounds(cost_months(start_date, end_date))
+    if len(bounds) < 2:
+        return np.zeros((len(df), 0))
+    members, starts, ends, monthly, _ = priced_intervals(df, costs, budget_data, intervals)
+    runs = Runs(day_numbers(starts), day_numbers(ends), monthly, members, len(df))
+    return runs.averages(bounds)
+
+
+def allocation_shares(alloc_df, df, bounds, projects=PROJECTS):
+    """
+    Allocation share (0..1) per (member, project) pair and period between
+    `bounds`, scaled so no member exceeds 1. Allocations refer to the first
+    member of a name; allocations of unknown employees or other projects are
+    left out.
+
+    Returns (pair member positions in df, pair project codes, shares (pairs, periods)).
+    """
+    n, n_projects = len(df), len(projects)
+    n_periods = max(len(bounds) - 1, 0)
+
+    # (member, project) pair per allocation
+    names = df['name'].astype(str).to_numpy()
+    unique_names = pd.unique(names)
+    first_row = pd.Series(np.arange(n)).groupby(names).first().reindex(unique_names).to_numpy()
+    name_codes = pd.Categorical(alloc_df['employee'].astype(str), categories=unique_names).codes
+    project_codes = pd.Categorical(alloc_df['project'], categories=list(projects)).codes
+    known = (name_codes >= 0) & (project_codes >= 0)
+    pair_keys = np.where(known, first_row[np.maximum(name_codes, 0)] * n_projects + project_codes, -1) \
+        if n else np.full(len(alloc_df), -1)
+    pairs, pair_codes = np.unique(pair_keys[known], return_inverse=True)
+    codes = np.full(len(alloc_df), -1)
+    codes[known] = pair_codes
+    pair_member, pair_project = pairs // n_projects, pairs % n_projects
+    if not len(pairs) or not n_periods:
+        return pair_member, pair_project, np.zeros((len(pairs), n_periods))
+
+    share = _period_average(alloc_df, alloc_df['percentage'].to_numpy(dtype=float) / 100.0, codes,
+                            len(pairs), bounds)
+    # Scale employees above 100 % down to 100 %
+    member_total = np.zeros((n, n_periods))
+    np.add.at(member_total, pair_member, share)
+    return pair_member, pair_project, share / np.maximum(member_total, 1.0)[pair_member]
+
+
+def project_costs(alloc_df, df, monthly_costs, start_date, end_date, projects=PROJECTS):
+    """
+    Attributed cost per month (rows) and project (columns), plus OVERHEAD and
+    TOTAL, as frame with column Monat. `monthly_costs` is member_costs() of df
+    for the same months.
+    """
+    months = cost_months(start_date, end_date)
+    pair_member, pair_project, share = allocation_shares(alloc_df, df, period_bounds(months), projects)
+    indicator = np.zeros((len(projects), len(pair_member)))
+    indicator[pair_project, np.arange(len(pair_member))] = 1.0
+    attributed = indicator @ (share * monthly_costs[pair_member])
+
+    total = monthly_costs.sum(axis=0)
+    frame = pd.DataFrame(attributed.T, columns=list(projects))
+    frame[OVERHEAD] = total - attributed.sum(axis=0)
+    frame[TOTAL] = total
+    frame.insert(0, 'Monat', months.strftime('%Y-%m'))
+    return frame
@@ -0,0 +1,34 @@
+"""
+As-of date of a rerun.
+
+Every time-dependent computation takes the as-of date as an explicit argument
+instead of reading the system clock, so results are stable within a rerun and
+caches keyed by the date are valid for the whole day. as_of() resolves the
+date once per rerun: a pinned date ("Plan zum Stichtag X") or today.
+"""
+from datetime import date, datetime
+
+import pandas as pd
+
+
+def today():
+    """System date as a normalized Timestamp."""
+    return pd.Timestamp.today().normalize()
+
+
+def as_of(pinned=None):
+    """Normalized as-of Timestamp: `pinned` if given, otherwise today."""
+    if pinned is None:
+        return today()
+    if isinstance(pinned, datetime):
+        pinned = pinned.date()
+    return pd.Timestamp(pinned).normalize()
+
+
+def is_pinned(as_of_date):
+    return as_of_date != today()
+
+
+def to_date(as_of_date):
+    """datetime.date of an as-of Timestamp (for st.date_input defaults)."""
+    return as_of_date.date() if isinstance(as_of_date, pd.Timestamp) else date.fromisoformat(str(as_of_date)[:10])
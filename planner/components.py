@@ -0,0 +1,124 @@
+"""
+Component staffing and knowledge transfer alerts.
+
+Components come from the ComponentRegistry (planner.registry): its table gives
+required staffing and transfer time per component, its responsibles frame the
+(component, responsible name) pairs. Members per component come from the
+assignment table (planner.assignments).
+"""
+import numpy as np
+import pandas as pd
+
+from planner import clock
+from planner.assignments import assignments_for
+
+
+def active_mask(df, today):
+    """Members that have started and not yet left at `today`."""
+    return (df['start_date'] <= today) & (df['planned_exit'].isna() | (df['planned_exit'] > today))
+
+
+def staffing_status(active_count, required):
+    if active_count == 0:
+        return "UNBESETZT"
+    if active_count < required:
+        # Single resource available -> critical (red)
+        return "UNTERBESETZT - SINGLE" if active_count == 1 else "UNTERBESETZT"
+    return "OK"
+
+
+def component_staffing(df, registry, today=None, assignments=None):
+    """
+    Active resources per component versus required staffing.
+
+    A member counts for a component when it is assigned to it (named in the
+    member's components field or responsible) and active today.
+    """
+    columns = ["Komponente", "Verantwortlich", "Aktive Ressourcen", "Benötigt", "Status"]
+    if registry.empty:
+        return pd.DataFrame(columns=columns)
+    today = clock.as_of(today)
+    if assignments is None:
+        assignments = assignments_for(df, registry)
+
+    active = (df['start_date'].notna() & active_mask(df, today)).to_numpy()
+    comp = assignments['comp'].to_numpy()[active[assignments['member'].to_numpy()]]
+    counts = np.bincount(comp, minlength=len(registry))
+
+    comp_df = pd.DataFrame({
+        "Komponente": registry.table["name"],
+        "Verantwortlich": registry.table["responsible_names"],
+        "Aktive Ressourcen": counts,
+        "Benötigt": registry.table["required_count"],
+    })
+    comp_df["Status"] = [staffing_status(a, r) for a, r in zip(comp_df["Aktive Ressourcen"], comp_df["Benötigt"])]
+    return comp_df.sort_values(["Status", "Komponente"], ascending=[True, True])
+
+
+def component_summary(registry):
+    """Compact view: Komponente, Verantwortlich, Benötigt, WU-Zeit (Monate)."""
+    return pd.DataFrame({
+        "Komponente": registry.table["name"],
+        "Verantwortlich": registry.table["responsible_names"],
+        "Benötigt": registry.table["required_count"],
+        "WU-Zeit (Monate)": registry.table["transfer_months"],
+    })
+
+
+def responsible_exit_status(df, registry):
+    """
+    Responsible persons joined with their exit date and required transfer time.
+
+    Columns: component, name, days_until_exit, knowledge_transfer_status,
+    transfer_months, transfer_days, days_to_start_hiring, critical.
+    """
+    first_rows = df.drop_duplicates('name')[['name', 'days_until_exit', 'knowledge_transfer_status']]
+    joined = registry.responsibles.merge(first_rows, on="name", how="inner")
+    joined["transfer_months"] = registry.transfer_months[joined.pop("comp").to_numpy()]
+    joined["transfer_days"] = joined["transfer_months"] * 30
+    joined["days_to_start_hiring"] = joined["days_until_exit"] - joined["transfer_days"]
+    joined["critical"] = joined["days_until_exit"] < joined["transfer_days"]
+    return joined
+
+
+PRODUCT_OVERVIEW_COLUMNS = ["product", "component", "transfer_months", "assigned", "name", "days_until_exit",
+                            "knowledge_transfer_status", "days_to_start_hiring", "critical"]
+
+
+def product_overview(registry, exit_status, assignments):
+    """
+    Produkten Übersicht as one frame: one row per (product, component,
+    responsible person) with the person's exit status, and one row with an
+    empty name for components without a known responsible. Ordered by
+    product, component (registry order) and, per component, responsibles with
+    enough time for the knowledge transfer before the critical ones.
+    """
+    components = pd.DataFrame({
+        "product": registry.table["product"].to_numpy(),
+        "component": registry.table["name"].to_numpy(),
+        "transfer_months": registry.transfer_months,
+        "assigned": np.bincount(assignments["comp"].to_numpy(dtype=int), minlength=len(registry)),
+        "comp": np.arange(len(registry)),
+    })
+    people = exit_status[["component", "name", "days_until_exit", "knowledge_transfer_status",
+                          "days_to_start_hiring", "critical"]]
+    overview = components.merge(people, on="component", how="left")
+    overview["critical"] = overview["critical"].eq(True)
+    overview = overview.sort_values(["product", "comp", "critical"], kind="stable", ignore_index=True)
+    return overview[PRODUCT_OVERVIEW_COLUMNS]
+
+
+def transfer_alerts(df, registry):
+    """Responsibles who leave before the knowledge transfer of their component can finish."""
+    return alerts_from_exit_status(responsible_exit_status(df, registry))
+
+
+def alerts_from_exit_status(status):
+    """Transfer alert table from responsible_exit_status()."""
+    alerts = status[status["critical"]]
+    return pd.DataFrame({
+        "Komponente": alerts["component"],
+        "Verantwortlich": alerts["name"],
+        "Tage bis Austritt": alerts["days_until_exit"],
+        "Benötigte WU-Zeit (Tage)": alerts["transfer_days"]
+    }).reset_index(drop=True)
@@ -0,0 +1,231 @@
+"""
+Allocation conflicts over the whole dataset.
+
+check_overallocation() only looks at one new allocation. ConflictScanner
+checks all allocations of every employee against each other and against the
+employee's start_date/planned_exit in one sweep per employee: the endpoints of
+the allocation day runs (+percentage at run_start, -percentage at run_end, see
+planner.allocation) and of the employment [start_date, planned_exit] are
+sorted, and a running total is carried from endpoint to endpoint. Every
+stretch of days with a constant total and set of allocations is one candidate
+row:
+- "Vor Eintritt" / "Nach Austritt": allocated days outside the employment,
+- "Nicht im Team": the employee is not in team_data,
+- "Überbelegung": more than 100 % in total.
+
+The scanner is a planner.store listener: a commit re-scans only the employees
+whose allocations or (first) team member changed. Copy-on-write lists share
+unchanged dicts, so changes are found by object identity as in KpiCounters.
+"""
+import threading
+from math import inf
+
+import numpy as np
+import pandas as pd
+
+from planner.allocation import MAX_ALLOCATION, allocation_frame
+from planner.runs import day_numbers
+
+BEFORE_START = "Vor Eintritt"
+AFTER_EXIT = "Nach Austritt"
+NOT_IN_TEAM = "Nicht im Team"
+OVERALLOCATED = "Überbelegung"
+
+CONFLICT_COLUMNS = ["employee", "reason", "start_date", "end_date", "days", "total", "projects", "allocation_ids"]
+
+
+def _day_bounds(starts, ends):
+    """Day numbers of [start, end) as floats; NaT start/end is -inf/inf."""
+    starts, ends = pd.DatetimeIndex(starts), pd.DatetimeIndex(ends)
+    first = np.where(starts.isna(), -inf, day_numbers(starts.fillna(pd.Timestamp(0))).astype(float))
+    end = np.where(ends.isna(), inf, day_numbers(ends.fillna(pd.Timestamp(0))).astype(float))
+    return first, end
+
+
+def _employment_bounds(members):
+    """Day numbers of [start_date, planned_exit + 1 day) of team members."""
+    starts = pd.to_datetime(pd.Series([m.get("start_date") for m in members], dtype=object), errors="coerce")
+    exits = pd.to_datetime(pd.Series([m.get("planned_exit") for m in members], dtype=object), errors="coerce")
+    return _day_bounds(starts, exits + pd.Timedelta(days=1))
+
+
+def day_label(day):
+    return str(np.datetime64(int(day), "D"))
+
+
+def scan_employee(employee, allocations, employment):
+    """
+    Conflict rows of one employee.
+
+    `allocations` are (first day, end day, percentage, allocation) tuples of
+    day runs [first, end), `employment` the [first, end) active days or None
+    when the employee is not in team_data.
+    """
+    events = []
+    for key, (first, end, percentage, _) in enumerate(allocations):
+        if -inf < first < end < inf and percentage:
+            events.append((first, key, percentage))
+            events.append((end, key, -percentage))
+    if not events:
+        return []
+    points = sorted({day for day, _, _ in events} | (set(employment) - {-inf, inf} if employment else set()))
+    events.sort(key=lambda event: event[0])
+
+    rows = []
+    active = {}
+    total = 0.0
+    i = 0
+    for day, next_day in zip(points, points[1:]):
+        while i < len(events) and events[i][0] == day:
+            _, key, delta = events[i]
+            total += delta
+            if delta > 0:
+                active[key] = delta
+            else:
+                active.pop(key, None)
+            i += 1
+        if not active or total <= 0:
+            continue
+        if employment is None:
+            reason = NOT_IN_TEAM
+        elif day < employment[0]:
+            reason = BEFORE_START
+        elif day >= employment[1]:
+            reason = AFTER_EXIT
+        elif total > MAX_ALLOCATION:
+            reason = OVERALLOCATED
+        else:
+            continue
+        keys = sorted(active)
+        if rows and rows[-1]["reason"] == reason and rows[-1]["total"] == total and rows[-1]["_end"] == day:
+            # Same conflict continues with other allocations (one ends, the next starts)
+            row = rows[-1]
+            row["_end"] = next_day
+            row["_keys"] = sorted(set(row["_keys"]) | set(keys))
+        else:
+            rows.append({"employee": employee, "reason": reason, "total": total,
+                         "_start": day, "_end": next_day, "_keys": keys})
+
+    for row in rows:
+        start, end, keys = row.pop("_start"), row.pop("_end"), row.pop("_keys")
+        row["start_date"] = day_label(start)
+        row["end_date"] = day_label(end - 1)
+        row["days"] = int(end - start)
+        row["projects"] = ", ".join(sorted({str(allocations[key][3].get("project")) for key in keys}))
+        row["allocation_ids"] = [allocations[key][3].get("id") for key in keys]
+    return rows
+
+
+def _first_members(team_data):
+    """{name: first member with that name}, as in gantt_frame/responsible_exit_status."""
+    first = {}
+    for member in team_data or ():
+        first.setdefault(member.get("name"), member)
+    return first
+
+
+class ConflictScanner:
+    """Allocation conflicts of project_allocations against each other and team_data."""
+
+    def __init__(self, project_allocations=(), team_data=()):
+        self._lock = threading.Lock()
+        self.reset(project_allocations, team_data)
+
+    def reset(self, project_allocations, team_data):
+        with self._lock:
+            self._allocations = {}    # employee -> {id(allocation): (first, last, percentage, allocation)}
+            self._members = {}        # name -> first team member
+            self._employment = {}     # name -> [first, end) active days
+            self._rows = {}           # employee -> conflict rows
+            self._report = None
+            self._add_allocations(list(project_allocations or ()))
+            self._set_members(_first_members(team_data))
+            for employee in self._allocations:
+                self._rescan(employee)
+
+    def _add_allocations(self, allocations):
+        if not allocations:
+            return set()
+        frame = allocation_frame(allocations)
+        first, end = _day_bounds(frame['run_start'], frame['run_end'])
+        for allocation, lo, hi in zip(allocations, first, end):
+            self._allocations.setdefault(allocation.get("employee"), {})[id(allocation)] = (
+                lo, hi, float(allocation.get("percentage") or 0), allocation)
+        return {allocation.get("employee") for allocation in allocations}
+
+    def _remove_allocations(self, allocations):
+        for allocation in allocations:
+            own = self._allocations.get(allocation.get("employee"), {})
+            own.pop(id(allocation), None)
+            if not own:
+                self._allocations.pop(allocation.get("employee"), None)
+        return {allocation.get("employee") for allocation in allocations}
+
+    def _set_members(self, members):
+        """Replace the first-member map; returns the names whose member changed."""
+        changed = {name for name in self._members.keys() | members.keys()
+                   if self._members.get(name) is not members.get(name)}
+        self._members = members
+        names = [name for name in changed if name in members]
+        for name in changed - set(names):
+            self._employment.pop(name, None)
+        if names:
+            first, end = _employment_bounds([members[n] for n in names])
+            self._employment.update(zip(names, zip(first, end)))
+        return changed
+
+    def _rescan(self, employee):
+        allocations = self._allocations.get(employee)
+        rows = scan_employee(employee, list(allocations.values()), self._employment.get(employee)) if allocations else []
+        if rows:
+            self._rows[employee] = rows
+        else:
+            self._rows.pop(employee, None)
+
+    def apply_change(self, old_allocations=None, new_allocations=None, old_team=None, new_team=None):
+        """
+        Update for new allocation and/or team lists (None: unchanged) and
+        re-scan the affected employees.
+        """
+        with self._lock:
+            dirty = set()
+            if new_allocations is not None:
+                old_ids = {id(a): a for a in old_allocations or ()}
+                new_ids = {id(a): a for a in new_allocations}
+                dirty |= self._remove_allocations([a for key, a in old_ids.items() if key not in new_ids])
+                dirty |= self._add_allocations([a for key, a in new_ids.items() if key not in old_ids])
+            if new_team is not None:
+                dirty |= self._set_members(_first_members(new_team)) & self._allocations.keys()
+            for employee in dirty:
+                self._rescan(employee)
+            if dirty:
+                self._report = None
+            return dirty
+
+    def on_commit(self, old, new, changed):
+        """planner.store listener keeping the conflicts in sync with allocations and team_data."""
+        if "project_allocations" not in changed and "team_data" not in changed:
+            return
+        self.apply_change(
+            old.get("project_allocations"),
+            new.get("project_allocations") if "project_allocations" in changed else None,
+            old.get("team_data"),
+            new.get("team_data") if "team_data" in changed else None,
+        )
+
+    def report(self):
+        """Conflict frame (CONFLICT_COLUMNS) by employee and start date."""
+        with self._lock:
+            if self._report is None:
+                rows = [row for employee in sorted(self._rows, key=str) for row in self._rows[employee]]
+                self._report = pd.DataFrame(rows, columns=CONFLICT_COLUMNS)
+            return self._report
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(rows) for rows in self._rows.values())
+
+
+def scan_conflicts(project_allocations, team_data):
+    """Conflict report of one full scan."""
+    return ConflictScanner(project_allocations, team_data).report()
@@ -0,0 +1,192 @@
+"""
+Aggregation cube of headcount, FTE, cost and budget.
+
+CostCube aggregates one data version over employee_type x team x project x
+month (role is an optional extra dimension). Each member-month is split
+across the project slices by the member's allocation shares
+(planner.attribution); the unallocated rest goes to OVERHEAD, so summing
+over projects gives the member's full values. Headcount and FTE are the
+average active members in the month (day resolution), cost the integrated
+monthly cost with rate history and budget the budget_data ceiling
+(yearly_budget / 12 per active member of a priced type).
+
+Only populated cells are stored: one row per label combination that occurs,
+with measures x months. The rollups are built once from these rows, one
+table per subset of the dimensions (the dimensions not in the subset summed
+out), so a slice over single labels or "all" is a row lookup; several labels
+of one dimension are a sum over the matching rows of one table.
+"""
+import io
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from planner.allocation import PROJECTS, period_bounds
+from planner.attribution import OVERHEAD, allocation_shares, cost_months, member_costs
+from planner.runs import Runs, day_numbers
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET = True
+except ImportError:  # pyarrow ist optional, sonst nur CSV-Export
+    PARQUET = False
+
+DIMENSIONS = ("employee_type", "team", "project")
+# Dimensionen, die nur auf Wunsch aufgebaut werden (viele Werte, vergrößern die Rollups)
+OPTIONAL_DIMENSIONS = ("role",)
+# Kennzahl -> Spaltenname der Auswertungen
+MEASURES = {"headcount": "Mitarbeiter", "fte": "FTE", "cost": "Kosten", "budget": "Budget"}
+# Kennzahlen, die über mehrere Monate gemittelt statt summiert werden
+AVERAGED = ("headcount", "fte")
+PERIODS = {"Monat": "M", "Quartal": "Q", "Jahr": "Y"}
+
+
+def _group_sum(values, codes, n_groups):
+    """Row sums of `values` (rows, ...) per code, as (n_groups, ...)."""
+    out = np.zeros((n_groups, *values.shape[1:]))
+    if len(codes):
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        heads = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        out[sorted_codes[heads]] = np.add.reduceat(values[order], heads, axis=0)
+    return out
+
+
+def _rollup(keys, data, columns):
+    """Rows of `data` summed per distinct combination of the key `columns`: (keys, data)."""
+    if not columns:
+        return np.zeros((1, 0), dtype=int), data.sum(axis=0, keepdims=True)
+    if not len(keys):
+        return np.zeros((0, len(columns)), dtype=int), data[:0]
+    groups, codes = np.unique(keys[:, list(columns)], axis=0, return_inverse=True)
+    return groups, _group_sum(data, codes.reshape(-1), len(groups))
+
+
+class CostCube:
+    """Headcount/FTE/cost/budget cube of the members of df between two dates."""
+
+    def __init__(self, df, costs, budget_data, alloc_df, start_date, end_date, intervals=None, projects=PROJECTS,
+                 dimensions=DIMENSIONS):
+        unknown = set(dimensions) - set(DIMENSIONS + OPTIONAL_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unbekannte Dimension: {', '.join(sorted(unknown))}")
+        self.dimensions = tuple(d for d in DIMENSIONS[:-1] + OPTIONAL_DIMENSIONS + DIMENSIONS[-1:]
+                                if d in dimensions)
+        self.months = cost_months(start_date, end_date)
+        bounds = period_bounds(self.months)
+        n, n_months = len(df), len(self.months)
+
+        # Member x month measures
+        active = np.zeros((n, n_months))
+        if n_months:
+            # Employment [start_date, planned_exit + 1 day), open end: to the last month
+            members = np.flatnonzero(df['start_date'].notna().to_numpy())
+            exits = df['planned_exit'].iloc[members] + pd.Timedelta(days=1)
+            ends = np.full(len(members), bounds[-1])
+            ends[exits.notna().to_numpy()] = day_numbers(exits.dropna())
+            runs = Runs(day_numbers(df['start_date'].iloc[members]), ends, np.ones(len(members)), members, n)
+            active = runs.averages(bounds)
+        ceiling = df['employee_type'].map(
+            lambda t: (budget_data.get(t) or {}).get('yearly_budget', 0)).astype(float).to_numpy() / 12
+        measures = np.stack([
+            active,
+            active * costs['fte'].to_numpy(dtype=float)[:, None],
+            member_costs(df, costs, budget_data, start_date, end_date, intervals),
+            active * ceiling[:, None],
+        ], axis=1)  # (members, measures, months)
+
+        # Fact rows: the allocated share of each (member, project) pair and the overhead rest per member
+        pair_member, pair_project, share = allocation_shares(alloc_df, df, bounds, projects)
+        allocated = np.zeros((n, n_months))
+        np.add.at(allocated, pair_member, share)
+        row_member = np.r_[np.arange(n), pair_member]
+        row_project = np.r_[np.full(n, len(projects)), pair_project]
+        row_data = np.concatenate([measures * (1.0 - allocated)[:, None, :],
+                                   measures[pair_member] * share[:, None, :]])
+
+        # Dimension labels and the codes of every fact row
+        self.labels = {}
+        row_codes = []
+        for dimension in self.dimensions:
+            if dimension == "project":
+                self.labels[dimension] = [*projects, OVERHEAD]
+                row_codes.append(row_project)
+            else:
+                codes, labels = pd.factorize(df[dimension].fillna("").astype(str), sort=True)
+                self.labels[dimension] = list(labels)
+                row_codes.append(codes[row_member])
+        keys = np.column_stack(row_codes) if row_codes else np.zeros((len(row_member), 0), dtype=int)
+
+        # Populated cells, then one rollup table per subset of the dimensions
+        self.keys, self.data = _rollup(keys, row_data, range(len(self.dimensions)))
+        self._tables = {}
+        for size in range(len(self.dimensions) + 1):
+            for columns in combinations(range(len(self.dimensions)), size):
+                table_keys, table_data = _rollup(self.keys, self.data, columns)
+                rows = {tuple(key): i for i, key in enumerate(table_keys.tolist())}
+                self._tables[columns] = (table_keys, table_data, rows)
+        self._index = {d: {label: i for i, label in enumerate(self.labels[d])} for d in self.dimensions}
+
+    def values(self, **selection):
+        """Measures x months of the slice; dimensions not given (or empty) are rolled up."""
+        unknown = set(selection) - set(self.dimensions)
+        if unknown:
+            raise ValueError(f"Unbekannte Dimension: {', '.join(sorted(unknown))}")
+        columns, codes = [], []
+        for axis, dimension in enumerate(self.dimensions):
+            chosen = selection.get(dimension)
+            if chosen is None or (isinstance(chosen, (list, tuple, set)) and not chosen):
+                continue
+            labels = chosen if isinstance(chosen, (list, tuple, set)) else [chosen]
+            columns.append(axis)
+            codes.append([self._index[dimension][label] for label in labels if label in self._index[dimension]])
+        table_keys, table_data, rows = self._tables[tuple(columns)]
+        empty = np.zeros((len(MEASURES), len(self.months)))
+        if all(len(c) == 1 for c in codes):
+            row = rows.get(tuple(c[0] for c in codes))
+            return empty if row is None else table_data[row]
+        mask = np.ones(len(table_keys), dtype=bool)
+        for i, chosen in enumerate(codes):
+            mask &= np.isin(table_keys[:, i], chosen)
+        return table_data[mask].sum(axis=0) if mask.any() else empty
+
+    def frame(self, freq="M", **selection):
+        """Measures of the slice per period with budget comparison (Abweichung, Über Budget)."""
+        values = self.values(**selection)
+        periods = self.months.to_period(freq)
+        data = pd.DataFrame(values.T, columns=list(MEASURES)).groupby(periods.astype(str).to_numpy(), sort=False)
+        frame = data.agg({measure: "mean" if measure in AVERAGED else "sum" for measure in MEASURES})
+        frame = frame.rename(columns=MEASURES).rename_axis("Zeitraum").reset_index()
+        frame["Abweichung"] = frame["Kosten"] - frame["Budget"]
+        frame["Über Budget"] = frame["Abweichung"] > 0
+        return frame
+
+    def breakdown(self, dimension, measure="cost", freq="M", **selection):
+        """
+        One column per label of `dimension` (the selected ones, default all)
+        with `measure` of the slice per period; empty columns are left out.
+        """
+        periods = self.months.to_period(freq).astype(str).to_numpy()
+        labels = selection.get(dimension) or self.labels[dimension]
+        columns = {}
+        for label in [labels] if isinstance(labels, str) else labels:
+            values = self.values(**{**selection, dimension: label})[list(MEASURES).index(measure)]
+            if values.any():
+                columns[label] = values
+        frame = pd.DataFrame(columns, index=self.months).groupby(periods, sort=False)
+        frame = frame.mean() if measure in AVERAGED else frame.sum()
+        return frame.rename_axis("Zeitraum").reset_index()
+
+
+def export_bytes(frame, fmt="csv"):
+    """Frame as CSV (UTF-8) or Parquet bytes for downloads."""
+    if fmt == "csv":
+        return frame.to_csv(index=False).encode("utf-8")
+    if fmt == "parquet":
+        if not PARQUET:
+            raise ValueError("Parquet-Export benötigt pyarrow")
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Unbekanntes Format: {fmt}")
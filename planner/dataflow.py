@@ -0,0 +1,295 @@
+"""
+Incremental recomputation of derived artifacts.
+
+Derived artifacts (team frame, staffing status, forecasts, ...) are nodes with
+declared inputs. Inputs are either other nodes or sources: the store datasets,
+whose version comes from the snapshot, and plain parameters such as the as-of
+date, whose value is its own version. A node's key is the tuple of its input
+keys, so a node is recomputed only when one of its (transitive) inputs changed;
+a team_data commit invalidates exactly the nodes that depend on team_data.
+
+Cached values are shared between sessions and reruns and must not be mutated.
+Concurrent requests for the same node and key (from any session or
+background job) are computed once; the other callers wait for that result.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from planner.allocation import AllocationRuns, allocation_frame, monthly_breakdown
+from planner.assignments import member_assignments, member_tokens
+from planner.attribution import member_costs, project_costs
+from planner.components import (
+    alerts_from_exit_status,
+    component_staffing,
+    product_overview,
+    responsible_exit_status,
+)
+from planner.cube import CostCube
+from planner.events import EventIndex
+from planner.finance import cost_forecast, cost_intervals, employee_costs
+from planner.forecast import headcount_forecast
+from planner.hiring import hiring_plan
+from planner.optimizer import propose_allocations
+from planner.org import OrgTree, in_subtree
+from planner.rates import rates_at
+from planner.registry import ComponentRegistry
+from planner.scenarios import ScenarioEngine, compare
+from planner.simulation import cost_bands, headcount_bands
+from planner.team import build_team_frame
+
+
+class Node:
+    """A derived artifact: fn(*inputs) with a small LRU of results per input key."""
+
+    def __init__(self, name, inputs, fn, maxsize=4):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.fn = fn
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.stamps = {}
+        self.hits = 0
+        self.computed = 0
+        self.last_ms = 0.0
+
+
+class Context:
+    """
+    Source values and versions of one evaluation.
+
+    `versions`/`data` come from a store snapshot (or the session binding of it);
+    `params` are additional sources such as the as-of date and must be hashable.
+    """
+
+    def __init__(self, versions, data, params=None):
+        self.versions = versions
+        self.data = data
+        self.params = dict(params or {})
+
+    @classmethod
+    def from_snapshot(cls, snapshot, **params):
+        return cls(snapshot.versions, snapshot.data, params)
+
+    def version(self, name):
+        if name in self.params:
+            return ("param", self.params[name])
+        return ("data", self.versions.get(name, 0))
+
+    def value(self, name):
+        if name in self.params:
+            return self.params[name]
+        return self.data.get(name)
+
+
+class Dataflow:
+    """Graph of nodes, evaluated lazily and cached by input versions."""
+
+    def __init__(self):
+        self._nodes = {}
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def node(self, name, inputs, fn, maxsize=4):
+        self._nodes[name] = Node(name, inputs, fn, maxsize)
+        return self
+
+    def nodes(self):
+        return dict(self._nodes)
+
+    def key(self, name, ctx):
+        """Version key of `name`: source version or tuple of input keys."""
+        node = self._nodes.get(name)
+        if node is None:
+            return ctx.version(name)
+        return tuple(self.key(i, ctx) for i in node.inputs)
+
+    def sources(self, name):
+        """Sources (datasets and params) node `name` (transitively) depends on."""
+        node = self._nodes.get(name)
+        if node is None:
+            return {name}
+        return set().union(*(self.sources(i) for i in node.inputs))
+
+    def dependents(self, source):
+        """All nodes that (transitively) depend on `source`."""
+        result = set()
+        changed = True
+        while changed:
+            changed = False
+            for node in self._nodes.values():
+                if node.name not in result and any(i == source or i in result for i in node.inputs):
+                    result.add(node.name)
+                    changed = True
+        return result
+
+    def get(self, name, ctx, trace=None):
+        """
+        Value of node `name` for `ctx`. `trace` collects (node, 'hit'|'computed'|'waited', ms)
+        for every node touched.
+        """
+        node = self._nodes.get(name)
+        if node is None:
+            return ctx.value(name)
+        key = self.key(name, ctx)
+        with self._lock:
+            if key in node.cache:
+                node.cache.move_to_end(key)
+                node.hits += 1
+                if trace is not None:
+                    trace.append((name, "hit", 0.0))
+                return node.cache[key]
+            pending = self._inflight.get((name, key))
+            owner = pending is None
+            if owner:
+                pending = self._inflight[(name, key)] = Future()
+
+        if not owner:
+            t0 = time.perf_counter()
+            value = pending.result()
+            if trace is not None:
+                trace.append((name, "waited", (time.perf_counter() - t0) * 1000))
+            return value
+
+        try:
+            args = [self.get(i, ctx, trace) for i in node.inputs]
+            t0 = time.perf_counter()
+            value = node.fn(*args)
+            elapsed = (time.perf_counter() - t0) * 1000
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[(name, key)]
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            node.cache[key] = value
+            node.cache.move_to_end(key)
+            node.stamps[key] = time.time()
+            while len(node.cache) > node.maxsize:
+                evicted, _ = node.cache.popitem(last=False)
+                node.stamps.pop(evicted, None)
+            node.computed += 1
+            node.last_ms = elapsed
+            del self._inflight[(name, key)]
+        pending.set_result(value)
+        if trace is not None:
+            trace.append((name, "computed", elapsed))
+        return value
+
+    def put(self, name, ctx, value, computed_at=None):
+        """Cache `value` as node `name` for `ctx` (e.g. a stored view), unless already cached."""
+        node = self._nodes[name]
+        key = self.key(name, ctx)
+        with self._lock:
+            if key in node.cache:
+                return
+            node.cache[key] = value
+            node.stamps[key] = computed_at or time.time()
+            while len(node.cache) > node.maxsize:
+                evicted, _ = node.cache.popitem(last=False)
+                node.stamps.pop(evicted, None)
+
+    def cached(self, name, ctx):
+        """Compute time of `name` if it is cached for `ctx`, otherwise None."""
+        node = self._nodes[name]
+        key = self.key(name, ctx)
+        with self._lock:
+            return node.stamps.get(key) if key in node.cache else None
+
+    def latest(self, name, ctx):
+        """
+        Newest cached (value, computed_at) of `name` for the same params as
+        `ctx` but any dataset versions, or None.
+        """
+        node = self._nodes[name]
+        signature = _params_only(self.key(name, ctx))
+        with self._lock:
+            candidates = [key for key in node.cache if _params_only(key) == signature]
+            if not candidates:
+                return None
+            key = max(candidates, key=node.stamps.__getitem__)
+            return node.cache[key], node.stamps[key]
+
+    def stats(self):
+        return {name: {"hits": n.hits, "computed": n.computed, "last_ms": round(n.last_ms, 2),
+                       "cached": len(n.cache)}
+                for name, n in self._nodes.items()}
+
+
+def _params_only(key):
+    """Version key with the dataset versions blanked out."""
+    if len(key) == 2 and key[0] == "data":
+        return ("data",)
+    if len(key) == 2 and key[0] == "param":
+        return key
+    return tuple(_params_only(k) for k in key)
+
+
+def default_graph():
+    """
+    Derived artifacts of the dashboard pages.
+
+    Sources: the store DATASETS plus the params `today`, `headcount_range`
+    ((start, end, freq, x_title)), `org_node` (name of an org_units node),
+    `allocation_range` ((start, end, freq)),
+    `scenario_range` ((start, end)), `cost_range` ((start, end, freq, cost column)),
+    `project_cost_range` ((start, end)), `cube_range` ((start, end, dimensions)), `simulation`
+    ((runs, seed)), `hiring_params` ((lead days, monthly capacity, horizon months)) and
+    `optimizer_params` ((start month, demand rows, enforce skills)).
+    """
+    graph = Dataflow()
+    graph.node("team_frame", ["team_data", "today"], build_team_frame)
+    graph.node("component_registry", ["components"], ComponentRegistry)
+    graph.node("member_tokens", ["team_data"], lambda team: member_tokens(m.get('components') for m in team))
+    graph.node("assignments", ["team_data", "member_tokens", "component_registry"],
+               lambda team, tokens, registry: member_assignments((m['name'] for m in team), tokens, registry))
+    graph.node("staffing", ["team_frame", "component_registry", "today", "assignments"], component_staffing)
+    graph.node("exit_status", ["team_frame", "component_registry"], responsible_exit_status)
+    graph.node("transfer_alerts", ["exit_status"], alerts_from_exit_status)
+    graph.node("event_index", ["team_data", "component_registry"], EventIndex)
+    graph.node("product_overview", ["component_registry", "exit_status", "assignments"], product_overview)
+    graph.node("headcount", ["team_frame", "headcount_range"],
+               lambda df, params: headcount_forecast(df, *params))
+    graph.node("org_tree", ["org_units"], OrgTree)
+    graph.node("subtree_headcount", ["team_frame", "org_tree", "org_node", "headcount_range"],
+               lambda df, tree, node, params: headcount_forecast(df[in_subtree(df, tree, node)], *params))
+    graph.node("hiring_plan", ["team_frame", "component_registry", "today", "hiring_params", "assignments"],
+               lambda df, registry, today, params, assignments: hiring_plan(
+                   df, registry, today, *params, assignments=assignments))
+    graph.node("costs", ["team_frame", "budget_data", "employee_settings", "rate_history", "today"],
+               lambda df, budget, settings, history, today: employee_costs(
+                   df, *rates_at(budget, settings, history, today)))
+    graph.node("cost_intervals", ["team_frame", "budget_data", "employee_settings", "rate_history"], cost_intervals)
+    graph.node("cost_forecast", ["team_frame", "costs", "budget_data", "cost_range", "cost_intervals"],
+               lambda df, costs, budget, params, intervals: cost_forecast(
+                   df, costs, budget, *params[:3], intervals=intervals))
+    graph.node("member_costs", ["team_frame", "costs", "budget_data", "cost_intervals", "project_cost_range"],
+               lambda df, costs, budget, intervals, params: member_costs(df, costs, budget, *params,
+                                                                          intervals=intervals))
+    graph.node("allocations", ["project_allocations"], allocation_frame)
+    graph.node("allocation_runs", ["allocations"], AllocationRuns)
+    graph.node("allocation_matrix", ["allocation_runs", "team_data", "allocation_range"],
+               lambda runs, team_data, params: monthly_breakdown(
+                   runs, [member['name'] for member in team_data or ()], *params))
+    graph.node("project_costs", ["allocations", "team_frame", "member_costs", "project_cost_range"],
+               lambda alloc_df, df, monthly_costs, params: project_costs(alloc_df, df, monthly_costs, *params))
+    graph.node("cost_cube", ["team_frame", "costs", "budget_data", "allocations", "cost_intervals", "cube_range"],
+               lambda df, costs, budget, alloc_df, intervals, params: CostCube(
+                   df, costs, budget, alloc_df, *params[:2], intervals=intervals, dimensions=params[2]))
+    graph.node("allocation_proposal", ["team_frame", "costs", "allocations", "component_registry", "optimizer_params",
+                                       "assignments"],
+               lambda df, costs, alloc_df, registry, params, assignments: propose_allocations(
+                   df, costs, alloc_df, registry, *params, assignments=assignments))
+    graph.node("scenario_engine", ["team_frame", "costs", "component_registry", "allocations", "budget_data",
+                                   "scenario_range", "assignments"],
+               lambda df, costs, registry, alloc_df, budget, params, assignments: ScenarioEngine(
+                   df, costs, registry, alloc_df, budget, *params, assignments=assignments))
+    graph.node("scenario_comparison", ["scenario_engine", "scenarios"], compare)
+    graph.node("attrition_headcount", ["team_frame", "component_registry", "today", "headcount_range", "simulation",
+                                       "assignments"],
+               lambda df, registry, today, params, sim, assignments: headcount_bands(
+                   df, registry, today, *params[:3], *sim, assignments=assignments))
+    graph.node("attrition_costs", ["team_frame", "costs", "budget_data", "today", "cost_range", "simulation"],
+               lambda df, costs, budget, today, params, sim: cost_bands(df, costs, budget, today, *params, *sim))
+    return graph
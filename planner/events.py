@@ -0,0 +1,178 @@
+"""
+Calendar of dated team events: starts, exits, recruiting deadlines and birthdays.
+
+EventIndex is built once per team_data/components version and answers "what
+happens between A and B" with np.searchsorted slices instead of scanning the
+team frame:
+- dated events (Eintritt, Austritt, Recruiting-Start) in one frame sorted by
+  date. The recruiting deadline of a responsible person is exit - transfer
+  time of the component (as days_to_start_hiring in responsible_exit_status),
+- birthdays sorted by day of year (leap-year numbering, so 29 February has its
+  own day and is celebrated on 28 February in other years). A window over the
+  year end is split per calendar year, so birthdays wrap around.
+
+ical_lines() writes a window as iCalendar (RFC 5545) all-day events.
+"""
+import numpy as np
+import pandas as pd
+
+START = "Eintritt"
+EXIT = "Austritt"
+RECRUITING = "Recruiting-Start"
+BIRTHDAY = "Geburtstag"
+
+EVENT_COLUMNS = ["date", "type", "member", "name", "component"]
+BIRTHDAY_COLUMNS = ["date", "member", "name", "role", "dob", "age"]
+
+_FEB_29 = 60
+
+
+def _leap_day_of_year(dates):
+    """Day of year (1-366) counted as in a leap year."""
+    dates = pd.DatetimeIndex(dates)
+    return np.asarray(dates.dayofyear + (~dates.is_leap_year & (dates.month > 2)), dtype=int)
+
+
+def _dates(values):
+    return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+
+class EventIndex:
+    """Sorted event arrays of one team_data/components version."""
+
+    def __init__(self, team_data, registry):
+        team_data = team_data or []
+        names = np.array([str(m.get("name", "")) for m in team_data], dtype=object)
+        starts = _dates([m.get("start_date") for m in team_data])
+        exits = _dates([m.get("planned_exit") for m in team_data])
+        dobs = _dates([m.get("dob") for m in team_data])
+        members = np.arange(len(team_data))
+
+        # Recruiting deadlines of responsibles (first member per name, as in responsible_exit_status)
+        first = pd.Series(members, index=names).groupby(level=0, sort=False).first()
+        resp = registry.responsibles
+        resp_member = first.reindex(resp["name"]).to_numpy()
+        known = ~np.isnan(resp_member.astype(float))
+        resp_member = resp_member[known].astype(int)
+        transfer_days = registry.transfer_months[resp["comp"].to_numpy()[known]] * 30
+        deadlines = exits[resp_member] - transfer_days.astype("timedelta64[D]")
+
+        has_start, has_exit = ~np.isnat(starts), ~np.isnat(exits)
+        has_deadline = ~np.isnat(deadlines)
+        no_component = np.full(int(has_start.sum() + has_exit.sum()), None, dtype=object)
+        events = pd.DataFrame({
+            "date": np.concatenate([starts[has_start], exits[has_exit], deadlines[has_deadline]]),
+            "type": np.repeat([START, EXIT, RECRUITING],
+                              [has_start.sum(), has_exit.sum(), has_deadline.sum()]),
+            "member": np.concatenate([members[has_start], members[has_exit], resp_member[has_deadline]]),
+            "component": np.concatenate([no_component,
+                                         resp["component"].to_numpy()[known][has_deadline].astype(object)]),
+        })
+        events["name"] = names[events["member"].to_numpy(dtype=int)]
+        self.events = events.sort_values(["date", "type", "name"], kind="stable", ignore_index=True)[EVENT_COLUMNS]
+        self._event_dates = self.events["date"].to_numpy(dtype="datetime64[ns]")
+
+        has_dob = ~np.isnat(dobs)
+        birthdays = pd.DataFrame({
+            "key": _leap_day_of_year(dobs[has_dob]),
+            "member": members[has_dob],
+            "name": names[has_dob],
+            "role": np.array([team_data[i].get("role") for i in members[has_dob]], dtype=object),
+            "dob": dobs[has_dob],
+        })
+        self.birthdays = birthdays.sort_values(["key", "name"], kind="stable", ignore_index=True)
+        self._birthday_keys = self.birthdays["key"].to_numpy()
+
+    def __len__(self):
+        return len(self.events) + len(self.birthdays)
+
+    def dated_between(self, start, end):
+        """Starts, exits and recruiting deadlines with start <= date < end, by date."""
+        lo, hi = np.searchsorted(self._event_dates, [np.datetime64(pd.Timestamp(start), "ns"),
+                                                     np.datetime64(pd.Timestamp(end), "ns")])
+        return self.events.iloc[lo:hi]
+
+    def birthdays_between(self, start, end):
+        """
+        Birthdays with start <= date < end, by date. `date` is the birthday in
+        that year, `age` the age reached on it.
+        """
+        start, last = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize() - pd.Timedelta(days=1)
+        parts = []
+        for year in range(start.year, last.year + 1):
+            first_day = max(start, pd.Timestamp(year, 1, 1))
+            last_day = min(last, pd.Timestamp(year, 12, 31))
+            lo_key, hi_key = _leap_day_of_year([first_day, last_day])
+            if not first_day.is_leap_year and lo_key <= _FEB_29 - 1 <= hi_key:
+                hi_key = max(hi_key, _FEB_29)
+            lo, hi = np.searchsorted(self._birthday_keys, [lo_key, hi_key + 1])
+            part = self.birthdays.iloc[lo:hi]
+            offset = part["key"].to_numpy() - 1
+            if not first_day.is_leap_year:
+                offset = offset - (offset >= _FEB_29 - 1)
+            parts.append(part.assign(
+                date=np.datetime64(f"{year}-01-01", "ns") + offset.astype("timedelta64[D]"),
+                age=year - part["dob"].dt.year,
+            ))
+        if not parts:
+            return pd.DataFrame(columns=BIRTHDAY_COLUMNS)
+        return pd.concat(parts, ignore_index=True)[BIRTHDAY_COLUMNS]
+
+    def between(self, start, end):
+        """All events (including birthdays) with start <= date < end, by date."""
+        birthdays = self.birthdays_between(start, end)
+        birthdays = birthdays.assign(type=BIRTHDAY, component=None)[EVENT_COLUMNS]
+        dated = self.dated_between(start, end)
+        if birthdays.empty:
+            return dated.reset_index(drop=True)
+        return (pd.concat([dated, birthdays], ignore_index=True)
+                .sort_values(["date", "type", "name"], kind="stable", ignore_index=True))
+
+    def upcoming(self, today, days):
+        """Events of the `days` days from `today` on."""
+        today = pd.Timestamp(today).normalize()
+        return self.between(today, today + pd.Timedelta(days=days))
+
+
+def _ical_text(value):
+    """Escape a TEXT value (RFC 5545, 3.3.11)."""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def event_summary(event_type, name, component):
+    if component:
+        return f"{event_type}: {name} ({component})"
+    return f"{event_type}: {name}"
+
+
+def ical_lines(events, calendar_name="Ressourcenplanung", stamp=None):
+    """
+    iCalendar lines (without line breaks) of an event frame from
+    EventIndex.between(), one all-day VEVENT per event.
+    """
+    stamp = (pd.Timestamp(stamp) if stamp is not None else pd.Timestamp.now(tz="UTC")).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "PRODID:-//Aura//Ressourcenplanung//DE"
+    yield f"X-WR-CALNAME:{_ical_text(calendar_name)}"
+    dates = pd.DatetimeIndex(events["date"])
+    for day, next_day, event_type, member, name, component in zip(
+            dates.strftime("%Y%m%d"), (dates + pd.Timedelta(days=1)).strftime("%Y%m%d"),
+            events["type"], events["member"], events["name"], events["component"]):
+        uid_component = f"-{component}" if component else ""
+        yield "BEGIN:VEVENT"
+        yield f"UID:{_ical_text(f'{day}-{event_type}-{member}{uid_component}')}@ressourcenplanung"
+        yield f"DTSTAMP:{stamp}"
+        yield f"DTSTART;VALUE=DATE:{day}"
+        yield f"DTEND;VALUE=DATE:{next_day}"
+        yield f"SUMMARY:{_ical_text(event_summary(event_type, name, component))}"
+        yield f"CATEGORIES:{_ical_text(event_type)}"
+        yield "TRANSP:TRANSPARENT"
+        yield "END:VEVENT"
+    yield "END:VCALENDAR"
+
+
+def to_ical(events, calendar_name="Ressourcenplanung", stamp=None):
+    """iCalendar document of `events` with CRLF line endings."""
+    return "\r\n".join(ical_lines(events, calendar_name, stamp)) + "\r\n"
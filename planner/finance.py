@@ -0,0 +1,233 @@
+"""
+Cost and FTE model of the Finanzielle Verwaltung page.
+
+Interns may carry individual hourly settings (employee_settings), all other
+employee types use the monthly/yearly defaults from budget_data. An employee
+entry with monthly_cost (e.g. a renewed external contract) overrides the
+cost of any type. Rates can change over time (planner.rates): the cost
+forecast integrates the monthly cost over the overlap of each period with
+each rate interval.
+"""
+import numpy as np
+import pandas as pd
+
+from planner.forecast import active_at
+from planner.rates import RATE_FIELDS, rate_intervals
+
+# 35 Stunden pro Woche gelten als Vollzeit
+FULL_TIME_HOURS = 35
+WEEKS_PER_YEAR = 52
+
+FORECAST_FREQ = {"Monatlich": 'M', "Quartalsweise": 'Q', "Jährlich": 'Y'}
+
+
+def default_budget_data():
+    """Default cost model per employee type."""
+    return {
+        "Intern": {"monthly_cost": 1500, "yearly_budget": 18000, "hourly_rate": 75, "weekly_hours": 35},
+        "Lead Cost Employee (LCE)": {"monthly_cost": 5000, "yearly_budget": 60000, "hourly_rate": 0, "weekly_hours": 0},
+        "Extern": {"monthly_cost": 7000, "yearly_budget": 84000, "hourly_rate": 0, "weekly_hours": 0}
+    }
+
+
+def calculate_employee_cost(emp_name, emp_type, budget_data, employee_settings):
+    """Calculate monthly and yearly costs for an employee."""
+    if emp_type == "Intern" and emp_name in employee_settings:
+        settings = employee_settings[emp_name]
+        hr = settings.get('hourly_rate', budget_data[emp_type]['hourly_rate'])
+        wh = settings.get('weekly_hours', budget_data[emp_type]['weekly_hours'])
+        monthly = (wh * hr * WEEKS_PER_YEAR) / 12
+        yearly = wh * hr * WEEKS_PER_YEAR
+    else:
+        monthly = budget_data.get(emp_type, {}).get('monthly_cost', 0)
+        yearly = budget_data.get(emp_type, {}).get('yearly_budget', 0)
+    return monthly, yearly
+
+
+def calculate_employee_fte(emp_name, emp_type, budget_data, employee_settings):
+    """Calculate FTE (Full-Time Equivalent) for an employee."""
+    if emp_type == "Intern":
+        if emp_name in employee_settings:
+            wh = employee_settings[emp_name].get('weekly_hours', budget_data[emp_type]['weekly_hours'])
+        else:
+            wh = budget_data[emp_type]['weekly_hours']
+        return wh / FULL_TIME_HOURS if wh > 0 else 0
+    # Assuming other types are full-time
+    return 1.0
+
+
+def resolve_costs(is_intern, has_employee, type_fields, employee_fields):
+    """
+    (monthly cost, yearly cost, FTE) arrays from the fields of the type and of
+    the employee ({field: float array}, NaN when not set).
+
+    Interns with own settings cost weekly_hours x hourly_rate (employee value,
+    else type default); an employee monthly_cost (and yearly_budget, else
+    12 x monthly) overrides everything; all others cost their type's defaults.
+    """
+    def field(name):
+        own = employee_fields[name]
+        return np.where(np.isnan(own), type_fields[name], own)
+
+    hours, rates = field('weekly_hours'), field('hourly_rate')
+    hourly = is_intern & has_employee
+    monthly = np.where(hourly, hours * rates * WEEKS_PER_YEAR / 12, type_fields['monthly_cost'])
+    yearly = np.where(hourly, hours * rates * WEEKS_PER_YEAR, type_fields['yearly_budget'])
+    own_monthly, own_yearly = employee_fields['monthly_cost'], employee_fields['yearly_budget']
+    overridden = ~np.isnan(own_monthly)
+    monthly = np.where(overridden, own_monthly, monthly)
+    yearly = np.where(~np.isnan(own_yearly), own_yearly, np.where(overridden, own_monthly * 12, yearly))
+    fte = np.where(is_intern, np.where(hours > 0, hours / FULL_TIME_HOURS, 0), 1.0)
+    return np.nan_to_num(monthly), np.nan_to_num(yearly), np.nan_to_num(fte)
+
+
+def _fields(keys, table):
+    """{field: float array} of table[key][field] per key, NaN when missing."""
+    return {name: keys.map(lambda key: (table.get(key) or {}).get(name, np.nan)).astype(float).to_numpy()
+            for name in RATE_FIELDS}
+
+
+def employee_costs(df, budget_data, employee_settings):
+    """
+    Vectorized per-employee costs.
+
+    Returns a frame aligned with df: name, employee_type, monthly_cost,
+    yearly_cost, fte.
+    """
+    names = df['name'].astype(str)
+    types = df['employee_type']
+    settings = {str(name): values for name, values in (employee_settings or {}).items()}
+    monthly, yearly, fte = resolve_costs((types == "Intern").to_numpy(), names.isin(list(settings)).to_numpy(),
+                                         _fields(types, budget_data), _fields(names, settings))
+    return pd.DataFrame({
+        'name': names.to_numpy(),
+        'employee_type': types.to_numpy(),
+        'monthly_cost': monthly,
+        'yearly_cost': yearly,
+        'fte': fte
+    }, index=df.index)
+
+
+def cost_intervals(df, budget_data, employee_settings, rate_history):
+    """
+    Rate intervals of the members of df (planner.rates.rate_intervals) with
+    their monthly and yearly cost: member, start, end, monthly_cost, yearly_cost.
+    """
+    intervals = rate_intervals(df, budget_data, employee_settings, rate_history)
+    is_intern = (df['employee_type'] == "Intern").reindex(intervals['member']).to_numpy(dtype=bool)
+    monthly, yearly, _ = resolve_costs(
+        is_intern, intervals['has_employee'].to_numpy(dtype=bool),
+        {name: intervals[f'type_{name}'].to_numpy(dtype=float) for name in RATE_FIELDS},
+        {name: intervals[f'employee_{name}'].to_numpy(dtype=float) for name in RATE_FIELDS})
+    return intervals[['member', 'start', 'end']].assign(monthly_cost=monthly, yearly_cost=yearly)
+
+
+def cost_totals(costs):
+    """Totals for the Budgetübersicht metrics."""
+    return {
+        "monthly": float(costs['monthly_cost'].sum()),
+        "yearly": float(costs['yearly_cost'].sum()),
+        "employees": len(costs),
+        "fte": float(costs['fte'].sum())
+    }
+
+
+def cost_by_type(costs, budget_data):
+    """Per employee type: count, FTE, per-person defaults and actual totals."""
+    budget_df = pd.DataFrame.from_dict(budget_data, orient='index')
+    grouped = costs.groupby('employee_type')
+    budget_df['Anzahl'] = budget_df.index.map(grouped.size()).fillna(0).astype(int)
+    budget_df['Gesamt FTE'] = budget_df.index.map(grouped['fte'].sum()).fillna(0)
+    budget_df['Gesamtkosten (Monat)'] = budget_df.index.map(grouped['monthly_cost'].sum()).fillna(0)
+    budget_df['Gesamtkosten (Jahr)'] = budget_df.index.map(grouped['yearly_cost'].sum()).fillna(0)
+    return budget_df
+
+
+def _month_position(dates):
+    """Dates as fractional month numbers (year * 12 + month - 1 + elapsed share of the month)."""
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 12 + dates.month - 1).to_numpy(dtype=float) + \
+        (dates.day - 1).to_numpy(dtype=float) / dates.days_in_month.to_numpy(dtype=float)
+
+
+def _integrate(starts, ends, rates, period_starts, period_ends):
+    """
+    Sum of rate x overlap (in months) of the intervals [starts, ends) with
+    each period: F(t) = sum rate * clip(t - start, 0, end - start) from the
+    sorted starts and ends with cumulative sums, F(period end) - F(period start).
+    """
+    def integral(points):
+        total = np.zeros(len(points))
+        for edges, sign in ((starts, 1.0), (ends, -1.0)):
+            order = np.argsort(edges)
+            sorted_edges = edges[order]
+            weight = np.concatenate([[0.0], np.cumsum(rates[order])])
+            moment = np.concatenate([[0.0], np.cumsum(rates[order] * sorted_edges)])
+            k = np.searchsorted(sorted_edges, points, side='right')
+            total += sign * (points * weight[k] - moment[k])
+        return total
+
+    return integral(period_ends) - integral(period_starts)
+
+
+def priced_intervals(df, costs, budget_data, intervals=None):
+    """
+    Cost intervals of the members of df that are priced (type in budget_data),
+    clipped to their employment [start_date, planned_exit]; members without
+    start or planned exit are left out. Without `intervals` the current
+    `costs` apply throughout.
+
+    Returns (member positions in df, starts, ends, monthly, yearly) arrays.
+    """
+    priced = df['employee_type'].isin(list(budget_data))
+    if intervals is None:
+        intervals = pd.DataFrame({'member': df.index, 'start': pd.NaT, 'end': pd.NaT,
+                                  'monthly_cost': costs['monthly_cost'].to_numpy(dtype=float),
+                                  'yearly_cost': costs['yearly_cost'].to_numpy(dtype=float)})
+    intervals = intervals[intervals['member'].isin(df.index[priced.to_numpy()])]
+
+    member_start = df['start_date'].reindex(intervals['member']).to_numpy(dtype='datetime64[ns]')
+    member_end = (df['planned_exit'] + pd.Timedelta(days=1)).reindex(intervals['member']).to_numpy(dtype='datetime64[ns]')
+    starts = intervals['start'].to_numpy(dtype='datetime64[ns]')
+    ends = intervals['end'].to_numpy(dtype='datetime64[ns]')
+    starts = np.where(np.isnat(starts) | (starts < member_start), member_start, starts)
+    ends = np.where(np.isnat(ends) | (ends > member_end), member_end, ends)
+    valid = ~np.isnat(starts) & ~np.isnat(ends) & (starts < ends)
+    return (df.index.get_indexer(intervals['member'])[valid], starts[valid], ends[valid],
+            intervals['monthly_cost'].to_numpy(dtype=float)[valid],
+            intervals['yearly_cost'].to_numpy(dtype=float)[valid])
+
+
+def cost_forecast(df, costs, budget_data, start_date, end_date, freq='Q', intervals=None):
+    """
+    Active employees per type and their costs at each period end.
+
+    Monatliche_Kosten/Jährliche_Kosten are the run rates at the period end,
+    Periodenkosten the cost of the calendar period (month, quarter, year)
+    ending there: monthly cost integrated over its overlap with every rate
+    interval (cost_intervals; without `intervals` the current costs apply
+    throughout).
+    """
+    date_range = pd.date_range(start=start_date, end=end_date, freq=freq)
+    forecast_df = pd.DataFrame({'Datum': date_range})
+
+    def active(weights=None, mask=None):
+        sub = df if mask is None else df[mask]
+        w = None if weights is None else weights[mask if mask is not None else slice(None)]
+        return active_at(sub['start_date'], sub['planned_exit'], date_range, weights=w,
+                         exit_inclusive=True, open_ended=False)
+
+    forecast_df['Gesamt_Mitarbeiter'] = active().astype(int)
+    for emp_type in budget_data.keys():
+        forecast_df[emp_type] = active(mask=(df['employee_type'] == emp_type).to_numpy()).astype(int)
+
+    # Types outside budget_data have no cost, as in the per-type loop
+    _, starts, ends, monthly, yearly = priced_intervals(df, costs, budget_data, intervals)
+
+    forecast_df['Monatliche_Kosten'] = active_at(starts, ends, date_range, weights=monthly)
+    forecast_df['Jährliche_Kosten'] = active_at(starts, ends, date_range, weights=yearly)
+    period_starts = date_range.to_period(freq).start_time if len(date_range) else date_range
+    forecast_df['Periodenkosten'] = _integrate(_month_position(starts), _month_position(ends), monthly,
+                                               _month_position(period_starts),
+                                               _month_position(date_range + pd.Timedelta(days=1)))
+    return forecast_df
@@ -0,0 +1,83 @@
+"""
+Headcount forecast over a date range.
+
+Active counts per period are computed from sorted start/exit dates with
+np.searchsorted, so the cost is O((members + periods) log members) instead of
+one full frame scan per period.
+"""
+import numpy as np
+import pandas as pd
+
+GRANULARITIES = {
+    # Anzeige -> (freq, x-Achsentitel, Titelzusatz)
+    "Monatlich": ("MS", "Monat", "pro Monat"),
+    "Quartalsweise": ("QS", "Quartal", "pro Quartal"),
+    "Jährlich": ("YS", "Jahr", "pro Jahr"),
+}
+
+
+def active_at(start_dates, exit_dates, points, weights=None, exit_inclusive=False, open_ended=True):
+    """
+    Sum of `weights` (default: count) of members active at each of `points`.
+
+    A member is active at p when start <= p and (exit > p, or exit >= p with
+    exit_inclusive). Missing exit dates count as active when `open_ended`.
+    """
+    starts = pd.to_datetime(pd.Series(start_dates)).to_numpy(dtype='datetime64[ns]')
+    exits = pd.to_datetime(pd.Series(exit_dates)).to_numpy(dtype='datetime64[ns]')
+    points = pd.to_datetime(pd.Series(points)).to_numpy(dtype='datetime64[ns]')
+    weights = np.ones(len(starts)) if weights is None else np.asarray(weights, dtype=float)
+
+    no_exit = np.isnat(exits)
+    if not open_ended:
+        keep = ~no_exit
+    else:
+        keep = np.ones(len(starts), dtype=bool)
+    keep &= ~np.isnat(starts)
+    # Members that leave before they start are never active
+    keep &= no_exit | (exits >= starts)
+    starts, exits, weights, no_exit = starts[keep], exits[keep], weights[keep], no_exit[keep]
+
+    order = np.argsort(starts)
+    started = np.concatenate([[0.0], np.cumsum(weights[order])])[np.searchsorted(starts[order], points, side='right')]
+
+    closed = ~no_exit
+    exit_order = np.argsort(exits[closed])
+    exit_sorted = exits[closed][exit_order]
+    exit_weights = np.concatenate([[0.0], np.cumsum(weights[closed][exit_order])])
+    # Left at p: exit <= p (exclusive end) or exit < p (inclusive end)
+    side = 'left' if exit_inclusive else 'right'
+    left = exit_weights[np.searchsorted(exit_sorted, points, side=side)]
+    return started - left
+
+
+def forecast_points(start_date, end_date, freq='MS'):
+    """Period starts of the Teamprognose between start_date and end_date."""
+    start_month = pd.Timestamp(start_date).replace(day=1)
+    return pd.date_range(start=start_month, end=end_date, freq=freq)
+
+
+def headcount_forecast(df, start_date, end_date, freq='MS', x_title='Monat'):
+    """Active members and planned exits per period between start_date and end_date."""
+    date_range = forecast_points(start_date, end_date, freq)
+    forecast_df = pd.DataFrame({x_title: date_range})
+
+    forecast_df['Aktive Mitglieder'] = active_at(df['start_date'], df['planned_exit'], date_range).astype(int)
+
+    period_code = freq[0].upper()
+    exit_counts = df['planned_exit'].dropna().dt.to_period(period_code).value_counts()
+    forecast_df['Geplante Austritte'] = (date_range.to_period(period_code).map(exit_counts)
+                                         .fillna(0).astype(int).to_numpy())
+    return forecast_df
+
+
+def yearly_entries_exits(df, start_date, end_date):
+    """Entries and exits per calendar year in the range."""
+    years = pd.date_range(start=start_date, end=end_date, freq='YS').year
+    entries = df['start_date'].dt.year.value_counts()
+    exits = df['planned_exit'].dt.year.value_counts()
+    return pd.DataFrame({
+        'Jahr': years,
+        'Eintritte': [int(entries.get(year, 0)) for year in years],
+        'Austritte': [int(exits.get(year, 0)) for year in years]
+    })
@@ -0,0 +1,168 @@
+"""
+Hiring plan across all components.
+
+A component is at risk when its staffing (members naming the component or
+responsible for it, as in component_staffing) is or will fall below its
+required_count in the component registry. Staffing changes are swept once per component over
+the sorted start/exit events of all its members. Every exit that leaves the
+component understaffed needs a successor, and so does every missing person of
+a component that is understaffed today. Recruiting has to start at the latest
+
+    Bedarf ab - transfer time (months x 30 days) - recruiting lead time
+
+Shortfalls caused by the same leaving member become one requisition: the
+successor takes over all of that member's at-risk components, with the
+longest transfer time of them.
+
+Requisitions are scheduled with a priority queue under a monthly hiring
+capacity: each starts as late as possible but not after its latest start
+(months are filled from the horizon backwards, latest start first), so hires
+do not arrive years early. Requisitions that do not fit in time start in the
+first months with free capacity, ordered by latest start and number of
+covered components.
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from planner import clock
+from planner.assignments import component_pairs
+
+# Dauer der Rekrutierung bis zum ersten Arbeitstag (ca. 3 Monate)
+DEFAULT_LEAD_DAYS = 90
+DEFAULT_MONTHLY_CAPACITY = 2
+DEFAULT_HORIZON_MONTHS = 24
+
+PLAN_COLUMNS = ["Requisition", "Komponenten", "Anzahl Komponenten", "Ersetzt", "Bedarf ab", "WU-Zeit (Monate)",
+                "Spätester Recruiting-Start", "Geplanter Start", "Puffer (Tage)", "Status"]
+
+
+def requisitions(df, registry, today=None, lead_days=DEFAULT_LEAD_DAYS, horizon_months=DEFAULT_HORIZON_MONTHS,
+                 assignments=None):
+    """
+    Open requisitions of all at-risk components until the end of the horizon.
+
+    Columns: components, replaces (leaving member or None for a current gap),
+    needed (date), transfer_months, latest_start.
+    """
+    columns = ["components", "replaces", "needed", "transfer_months", "latest_start"]
+    if registry.empty:
+        return pd.DataFrame(columns=columns)
+    today = clock.as_of(today)
+    horizon_end = today + pd.DateOffset(months=horizon_months)
+    components = registry.names
+    required = registry.required
+    transfer = registry.transfer_months
+
+    # Start (+1) and exit (-1) events per (component, member) pair
+    pair_comp, pair_member = component_pairs(df, registry, assignments)
+    starts = df['start_date'].to_numpy(dtype='datetime64[ns]')[pair_member]
+    exits = df['planned_exit'].to_numpy(dtype='datetime64[ns]')[pair_member]
+    point = np.datetime64(today, 'ns')
+    counted = ~np.isnat(starts) & (starts <= np.datetime64(horizon_end, 'ns')) & \
+        (np.isnat(exits) | ((exits > point) & (exits > starts)))
+    leaving = counted & ~np.isnat(exits) & (exits <= np.datetime64(horizon_end, 'ns'))
+    events = pd.DataFrame({
+        "comp": np.concatenate([pair_comp[counted], pair_comp[leaving]]),
+        "date": np.concatenate([np.maximum(starts[counted], point), exits[leaving]]),
+        "delta": np.concatenate([np.ones(counted.sum(), dtype=int), -np.ones(leaving.sum(), dtype=int)]),
+        "member": np.concatenate([pair_member[counted], pair_member[leaving]]),
+    })
+    # Joiners on an exit day cover the exit
+    events = events.sort_values(["comp", "date", "delta"], ascending=[True, True, False], kind="stable")
+    events["staffing"] = events.groupby("comp")["delta"].cumsum()
+    short = events[(events["delta"] < 0) & (events["staffing"].to_numpy() < required[events["comp"].to_numpy()])]
+
+    # Current gaps: one requisition per missing person and component
+    initial = np.bincount(events.loc[(events["delta"] > 0) & (events["date"] == point), "comp"],
+                          minlength=len(components))
+    gap = np.maximum(required - initial, 0)
+    gap_comp = np.repeat(np.arange(len(components)), gap)
+    rows = [([components[c]], None, today, int(transfer[c])) for c in gap_comp]
+
+    # Exits: one requisition per leaving member covering all components it leaves understaffed
+    names = df['name'].to_numpy()
+    for member, group in short.groupby("member", sort=False):
+        comps = group["comp"].to_numpy()
+        rows.append(([components[c] for c in comps], names[member], pd.Timestamp(group["date"].iloc[0]),
+                     int(transfer[comps].max())))
+
+    result = pd.DataFrame(rows, columns=columns[:4])
+    result["latest_start"] = (result["needed"] - pd.to_timedelta(result["transfer_months"] * 30 + lead_days, unit='D')
+                              if len(result) else pd.Series(dtype='datetime64[ns]'))
+    return result.sort_values(["latest_start", "needed"], kind="stable").reset_index(drop=True)
+
+
+def schedule(reqs, today=None, capacity=DEFAULT_MONTHLY_CAPACITY, horizon_months=DEFAULT_HORIZON_MONTHS):
+    """
+    Planned recruiting start per requisition (NaT without capacity).
+
+    Backward pass: months from the horizon end to today, each taking up to
+    `capacity` of the requisitions whose latest start falls into or after that
+    month, latest first. Forward pass: leftovers fill free months from today on.
+    """
+    today = clock.as_of(today)
+    months = pd.date_range(today.replace(day=1), periods=max(horizon_months, 1), freq='MS')
+    planned = np.full(len(reqs), -1)
+    if reqs.empty or capacity <= 0:
+        return pd.Series(pd.NaT, index=reqs.index, dtype='datetime64[ns]')
+    deadline = np.searchsorted(months.to_numpy(), reqs["latest_start"].to_numpy(dtype='datetime64[ns]'),
+                               side='right') - 1
+    deadline = np.minimum(deadline, len(months) - 1)
+    latest = reqs["latest_start"].to_numpy(dtype='datetime64[ns]').astype('int64')
+    n_components = reqs["components"].map(len).to_numpy()
+    free = np.full(len(months), capacity)
+
+    order = np.argsort(-deadline, kind="stable")
+    heap, i = [], 0
+    for m in range(len(months) - 1, -1, -1):
+        while i < len(order) and deadline[order[i]] >= m:
+            r = order[i]
+            heapq.heappush(heap, (-latest[r], n_components[r], r))
+            i += 1
+        while heap and free[m]:
+            _, _, r = heapq.heappop(heap)
+            planned[r] = m
+            free[m] -= 1
+
+    # Overdue and displaced requisitions: earliest free month, most urgent first
+    late = [(latest[r], -n_components[r], r) for r in range(len(reqs)) if planned[r] < 0]
+    heapq.heapify(late)
+    for m in range(len(months)):
+        while late and free[m]:
+            _, _, r = heapq.heappop(late)
+            planned[r] = m
+            free[m] -= 1
+
+    # Recruiting starts at the beginning of the planned month, in the current month today
+    starts = np.maximum(months.to_numpy(), np.datetime64(today, 'ns'))
+    return pd.Series(np.where(planned >= 0, starts[np.maximum(planned, 0)], np.datetime64('NaT')),
+                     index=reqs.index, dtype='datetime64[ns]')
+
+
+def hiring_plan(df, registry, today=None, lead_days=DEFAULT_LEAD_DAYS, capacity=DEFAULT_MONTHLY_CAPACITY,
+                horizon_months=DEFAULT_HORIZON_MONTHS, assignments=None):
+    """Hiring plan table (PLAN_COLUMNS), ordered by planned start."""
+    today = clock.as_of(today)
+    reqs = requisitions(df, registry, today, lead_days, horizon_months, assignments)
+    if reqs.empty:
+        return pd.DataFrame(columns=PLAN_COLUMNS)
+    planned = schedule(reqs, today, capacity, horizon_months)
+    status = np.select(
+        [planned.isna(), reqs["latest_start"] < today, planned > reqs["latest_start"]],
+        ["Keine Kapazität", "Überfällig", "Verspätet"], default="Geplant")
+    plan = pd.DataFrame({
+        "Komponenten": reqs["components"].map(", ".join),
+        "Anzahl Komponenten": reqs["components"].map(len),
+        "Ersetzt": reqs["replaces"].fillna("— (aktuelle Lücke)"),
+        "Bedarf ab": reqs["needed"],
+        "WU-Zeit (Monate)": reqs["transfer_months"],
+        "Spätester Recruiting-Start": reqs["latest_start"],
+        "Geplanter Start": planned,
+        "Puffer (Tage)": (reqs["latest_start"] - planned).dt.days,
+        "Status": status,
+    })
+    plan = plan.sort_values(["Geplanter Start", "Spätester Recruiting-Start"], kind="stable").reset_index(drop=True)
+    plan.insert(0, "Requisition", np.arange(1, len(plan) + 1))
+    return plan
@@ -0,0 +1,105 @@
+"""
+Background computation of dataflow nodes (stale-while-revalidate).
+
+Heavy views (long-range forecasts, cost forecast, Monatliche Übersicht) ask
+the JobRunner instead of computing on the script thread. When the node is
+cached for the current data it is returned as usual. Otherwise the newest
+result for the same params but older dataset versions is returned at once and
+a fresh one is computed in a thread pool; the caller shows the old result with
+its age and reruns when the job is done. Without any older result the caller
+waits for the job, or (wait=False, e.g. the allocation optimizer) gets no
+value and reruns when the job is done.
+
+Jobs are keyed by node and version key: identical requests from all sessions
+share one job, and Dataflow.get() deduplicates the inputs they have in common
+with synchronous requests. Threads (not processes) because the results land in
+the shared, in-process dataflow cache; the heavy parts run in NumPy/pandas.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _workers():
+    return max(1, int(os.environ.get("AURA_JOB_WORKERS", 2)))
+
+
+class Result:
+    """Value of a node with the time it was computed and the refresh job, if stale."""
+
+    def __init__(self, value, computed_at, job=None):
+        self.value = value
+        self.computed_at = computed_at
+        self.job = job
+
+    @property
+    def stale(self):
+        return self.job is not None
+
+    @property
+    def age(self):
+        """Seconds since the value was computed."""
+        return max(time.time() - self.computed_at, 0.0)
+
+
+class JobRunner:
+    """Thread pool computing nodes of `graph`, one job per node and version key."""
+
+    def __init__(self, graph, max_workers=None):
+        self.graph = graph
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or _workers(), thread_name_prefix="planner-job")
+        self._jobs = {}
+        self._lock = threading.RLock()
+
+    def submit(self, name, ctx):
+        """Future of node `name` for `ctx`; joins a running job for the same key."""
+        job_key = (name, self.graph.key(name, ctx))
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                job = self._jobs[job_key] = self._pool.submit(self.graph.get, name, ctx)
+                job.add_done_callback(lambda _: self._forget(job_key))
+        return job
+
+    def _forget(self, job_key):
+        with self._lock:
+            self._jobs.pop(job_key, None)
+
+    def pending(self):
+        """Number of running or queued jobs."""
+        with self._lock:
+            return len(self._jobs)
+
+    def latest(self, name, ctx, trace=None, wait=True):
+        """
+        Result of node `name` for `ctx` without blocking on a recomputation.
+
+        Fresh when cached for `ctx`. Otherwise starts (or joins) the job and
+        returns the newest result for older dataset versions with `job` set;
+        when there is none, blocks (`wait`) or returns a Result without value
+        and computed_at. `trace` gets (node, 'hit'|'stale'|'pending'|'computed', ms).
+        """
+        computed_at = self.graph.cached(name, ctx)
+        if computed_at is not None:
+            return Result(self.graph.get(name, ctx, trace), computed_at)
+
+        job = self.submit(name, ctx)
+        previous = self.graph.latest(name, ctx)
+        if previous is not None and not job.done():
+            if trace is not None:
+                trace.append((name, "stale", 0.0))
+            return Result(*previous, job=job)
+        if not wait and not job.done():
+            if trace is not None:
+                trace.append((name, "pending", 0.0))
+            return Result(None, None, job=job)
+
+        t0 = time.perf_counter()
+        value = job.result()
+        if trace is not None:
+            trace.append((name, "computed", (time.perf_counter() - t0) * 1000))
+        return Result(value, self.graph.cached(name, ctx) or time.time())
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,129 @@
+"""
+Incrementally maintained header KPIs.
+
+KpiCounters keeps running aggregates over team_data (count, sums of start and
+exit day ordinals, exit days histogram, KT status counts) that are updated per
+added/removed member. team_kpis() of an as-of date is then O(1); moving the
+as-of date only walks the histogram between the old and the new threshold.
+"""
+import threading
+from collections import Counter
+from datetime import date
+
+import pandas as pd
+
+from planner.team import CRITICAL_EXIT_DAYS
+
+
+def _ordinal(value):
+    """Day ordinal of an ISO date string/date, None when missing or invalid."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        parsed = pd.to_datetime(value, errors='coerce')
+        return None if pd.isna(parsed) else parsed.date().toordinal()
+
+
+class KpiCounters:
+    """Running aggregates behind team_kpis() for the members of team_data."""
+
+    def __init__(self, team_data=(), critical_days=CRITICAL_EXIT_DAYS):
+        self._lock = threading.Lock()
+        self.critical_days = critical_days
+        self.reset(team_data)
+
+    def reset(self, team_data):
+        with self._lock:
+            self.total = 0
+            self.n_start = 0
+            self.sum_start = 0
+            self.n_exit = 0
+            self.sum_exit = 0
+            self.exit_days = Counter()
+            self.kt_status = Counter()
+            # Critical count for the cached threshold (exit ordinal < threshold)
+            self._threshold = None
+            self._critical = 0
+            for member in team_data:
+                self._apply(member, 1)
+
+    def _apply(self, member, sign):
+        self.total += sign
+        start = _ordinal(member.get('start_date'))
+        if start is not None:
+            self.n_start += sign
+            self.sum_start += sign * start
+        exit_day = _ordinal(member.get('planned_exit'))
+        if exit_day is not None:
+            self.n_exit += sign
+            self.sum_exit += sign * exit_day
+            self.exit_days[exit_day] += sign
+            if not self.exit_days[exit_day]:
+                del self.exit_days[exit_day]
+            if self._threshold is not None and exit_day < self._threshold:
+                self._critical += sign
+        self.kt_status[member.get('knowledge_transfer_status')] += sign
+
+    def add(self, member):
+        with self._lock:
+            self._apply(member, 1)
+
+    def remove(self, member):
+        with self._lock:
+            self._apply(member, -1)
+
+    def apply_change(self, old_team, new_team):
+        """
+        Update for a new team_data list. Copy-on-write lists share unchanged
+        member dicts, so only members that are not the same object are applied.
+        """
+        old_ids = {id(member): member for member in old_team or ()}
+        new_ids = {id(member): member for member in new_team or ()}
+        with self._lock:
+            for key, member in old_ids.items():
+                if key not in new_ids:
+                    self._apply(member, -1)
+            for key, member in new_ids.items():
+                if key not in old_ids:
+                    self._apply(member, 1)
+
+    def on_commit(self, old, new, changed):
+        """planner.store listener keeping the counters in sync with team_data."""
+        if "team_data" in changed:
+            self.apply_change(old.get("team_data"), new["team_data"])
+
+    def kt_counts(self, statuses):
+        """Members per knowledge transfer status."""
+        with self._lock:
+            return {status: self.kt_status[status] for status in statuses}
+
+    def _critical_count(self, threshold):
+        if self._threshold is None or abs(threshold - self._threshold) > len(self.exit_days):
+            self._critical = sum(count for day, count in self.exit_days.items() if day < threshold)
+        elif threshold > self._threshold:
+            self._critical += sum(self.exit_days.get(day, 0) for day in range(self._threshold, threshold))
+        elif threshold < self._threshold:
+            self._critical -= sum(self.exit_days.get(day, 0) for day in range(threshold, self._threshold))
+        self._threshold = threshold
+        return self._critical
+
+    def team_kpis(self, today):
+        """Same figures as planner.team_kpis for a frame built with `today`."""
+        today = pd.Timestamp(today).date().toordinal()
+        with self._lock:
+            if not self.total:
+                return {"total": 0, "critical": 0, "completed_kt": 0,
+                        "avg_tenure_years": 0, "avg_days_until_exit": 0}
+            avg_tenure = (self.n_start * today - self.sum_start) / self.n_start if self.n_start else 0
+            avg_exit = (self.sum_exit - self.n_exit * today) / self.n_exit if self.n_exit else 0
+            return {
+                "total": self.total,
+                "critical": self._critical_count(today + self.critical_days),
+                "completed_kt": self.kt_status["Completed"],
+                "avg_tenure_years": int(avg_tenure / 365),
+                "avg_days_until_exit": int(avg_exit)
+            }
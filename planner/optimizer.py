@@ -0,0 +1,263 @@
+"""
+Allocation optimizer: proposes project allocations for the monthly FTE demand.
+
+Every month is a transportation problem in STEP_PERCENT units. Employees
+supply their free capacity: FTE x 100 % (interns weekly_hours / 35) minus
+their existing allocations (monthly average of the day runs), while they are
+active at the first of the month.
+Projects demand the FTE still missing after the existing allocations. The
+proposal is a min-cost max-flow: as much demand as possible is covered, at the
+lowest cost per FTE. Keeping a project the employee already works on (existing
+allocation or proposal of the previous month) is cheaper, so proposals stay
+stable and merge into few allocations. Optional skill constraint: only members
+working on a component of the project's product (component registry).
+
+With scipy each month is solved as an LP (HiGHS); the transportation matrix
+is totally unimodular, so the vertex solution is integral. Without scipy a
+NumPy successive-shortest-path solver is used: with three projects an
+augmenting path visits each project at most once, so the shortest path is a
+Bellman-Ford over three nodes, using the cheapest free employee per project
+and the cheapest reassignment between two projects. Path lengths never
+decrease, so when the shortest path is a direct one, all free employees of
+the same cost for that project are shortest paths too and are filled in one
+block.
+"""
+import numpy as np
+import pandas as pd
+
+from planner.allocation import PROJECTS, _period_average, period_bounds
+from planner.assignments import component_pairs
+
+try:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+except ImportError:  # scipy ist optional, sonst NumPy-Solver
+    linprog = None
+
+STEP_PERCENT = 10
+# Kostenfaktoren: gleiches Projekt wie bisher bzw. passende Komponente (ohne Skill-Pflicht)
+CONTINUITY_FACTOR = 0.5
+SKILL_FACTOR = 0.8
+
+PROPOSAL_COLUMNS = ['employee', 'project', 'start_date', 'end_date', 'percentage']
+
+
+def _monthly_grid(alloc_df, values, codes, n_groups, bounds):
+    """Monthly averages (day resolution) of `values` per group; code -1 is skipped."""
+    if len(values) == 0:
+        return np.zeros((n_groups, max(len(bounds) - 1, 0)))
+    return _period_average(alloc_df, np.asarray(values, dtype=float), codes, n_groups, bounds)
+
+
+def project_fte(alloc_df, start_month, n_months, projects=PROJECTS):
+    """Allocated FTE per month (rows) and project (columns) as frame with column Monat."""
+    months = pd.date_range(pd.Timestamp(start_month).replace(day=1), periods=n_months, freq='MS')
+    codes = pd.Categorical(alloc_df['project'], categories=list(projects)).codes
+    fte = _monthly_grid(alloc_df, alloc_df['percentage'].to_numpy() / 100.0, codes, len(projects),
+                        period_bounds(months))
+    frame = pd.DataFrame(fte.T, columns=list(projects))
+    frame.insert(0, 'Monat', months.strftime('%Y-%m'))
+    return frame
+
+
+def _ssp(supply, demand, cost):
+    """
+    Min-cost max-flow of a transportation problem with few sinks (NumPy).
+
+    supply (n,), demand (k,) in units, cost (n, k) with inf for forbidden
+    pairs. Returns the integral flow (n, k).
+    """
+    n, k = cost.shape
+    supply = supply.astype(int).copy()
+    demand = demand.astype(int).copy()
+    flow = np.zeros((n, k), dtype=int)
+    order = [np.argsort(cost[:, p], kind='stable') for p in range(k)]
+    pointer = [0] * k
+    used = []
+    is_used = np.zeros(n, dtype=bool)
+    while demand.sum() > 0:
+        # Cheapest employee with free capacity per project (supply only decreases)
+        dist = np.full(k, np.inf)
+        pred = [None] * k
+        for p in range(k):
+            while pointer[p] < n and supply[order[p][pointer[p]]] == 0:
+                pointer[p] += 1
+            if pointer[p] < n:
+                e = order[p][pointer[p]]
+                if np.isfinite(cost[e, p]):
+                    dist[p], pred[p] = cost[e, p], (None, e)
+
+        # Cheapest reassignment p -> q of an employee with flow on p
+        if used:
+            idx = np.array(used)
+            c = cost[idx]
+            # inf - inf (both projects infeasible) is NaN; like every other non-finite move it becomes inf
+            with np.errstate(invalid="ignore"):
+                delta = c[:, None, :] - c[:, :, None]
+            delta[flow[idx] == 0] = np.inf
+            delta[~np.isfinite(delta)] = np.inf
+            best = delta.argmin(axis=0)
+            swap = np.take_along_axis(delta, best[None], axis=0)[0]
+            for _ in range(k - 1):
+                for p in range(k):
+                    for q in range(k):
+                        if p != q and dist[p] + swap[p, q] < dist[q] - 1e-9:
+                            dist[q] = dist[p] + swap[p, q]
+                            pred[q] = (p, idx[best[p, q]])
+
+        open_projects = np.flatnonzero(demand > 0)
+        target = open_projects[np.argmin(dist[open_projects])]
+        if not np.isfinite(dist[target]):
+            break
+
+        if pred[target][0] is None:
+            # Direct path: fill the free employees of this cost in order, up to the demand
+            rest = order[target][pointer[target]:]
+            above = np.flatnonzero(cost[rest, target] > dist[target] + 1e-9)
+            block = rest[:above[0] if len(above) else len(rest)]
+            block = block[supply[block] > 0]
+            before = np.cumsum(supply[block]) - supply[block]
+            take = np.minimum(supply[block], np.maximum(demand[target] - before, 0))
+            block, take = block[take > 0], take[take > 0]
+            flow[block, target] += take
+            supply[block] -= take
+            demand[target] -= take.sum()
+            used.extend(block[~is_used[block]].tolist())
+            is_used[block] = True
+            continue
+
+        # Path back to the source: (employee, from project or None, to project)
+        path, q = [], target
+        while q is not None and len(path) < k:
+            p, e = pred[q]
+            path.append((e, p, q))
+            q = p
+        amount = demand[target]
+        for e, p, q in path:
+            amount = min(amount, supply[e] if p is None else flow[e, p])
+        for e, p, q in path:
+            flow[e, q] += amount
+            if p is None:
+                supply[e] -= amount
+                if not is_used[e]:
+                    used.append(e)
+                    is_used[e] = True
+            else:
+                flow[e, p] -= amount
+        demand[target] -= amount
+    return flow
+
+
+def _lp(supply, demand, cost):
+    """Same problem as _ssp() solved with scipy's HiGHS."""
+    n, k = cost.shape
+    rows, cols = np.nonzero(np.isfinite(cost) & (supply[:, None] > 0))
+    if len(rows) == 0:
+        return np.zeros((n, k), dtype=int)
+    c = cost[rows, cols]
+    # Shift all costs below zero so covering demand always beats saving cost
+    c = c - (3 * np.abs(c).max() + 1)
+    var = np.arange(len(rows))
+    a_ub = coo_matrix((np.ones(2 * len(rows)), (np.concatenate([rows, n + cols]), np.concatenate([var, var]))),
+                      shape=(n + k, len(rows)))
+    result = linprog(c, A_ub=a_ub.tocsr(), b_ub=np.concatenate([supply, demand]), bounds=(0, None), method="highs")
+    flow = np.zeros((n, k), dtype=int)
+    flow[rows, cols] = np.rint(result.x).astype(int)
+    return flow
+
+
+def propose_allocations(df, costs, alloc_df, registry, start_month, demand, enforce_skills=False,
+                        projects=PROJECTS, solver=None, assignments=None):
+    """
+    Proposed allocations covering `demand` (months x projects total FTE from
+    start_month on) on top of the existing allocations.
+
+    Returns (proposals, coverage): proposals has PROPOSAL_COLUMNS (one row per
+    run of equal percentage), coverage is Monat x project with demand,
+    existing, proposed and open FTE.
+    """
+    demand = np.asarray(demand, dtype=float).reshape(-1, len(projects))
+    n_months = len(demand)
+    months = pd.date_range(pd.Timestamp(start_month).replace(day=1), periods=n_months, freq='MS')
+    bounds = period_bounds(months)
+    solver = solver or (_lp if linprog is not None else _ssp)
+    n = len(df)
+
+    # Free capacity per employee and month in units; allocations refer to the first member of a name
+    names = df['name'].astype(str).to_numpy()
+    unique_names = pd.unique(names)
+    first_row = pd.Series(np.arange(n)).groupby(names).first().reindex(unique_names).to_numpy()
+    name_codes = pd.Categorical(alloc_df['employee'], categories=unique_names).codes
+    known = name_codes >= 0
+    pct = alloc_df['percentage'].to_numpy(dtype=float)
+    member_codes = np.where(known, first_row[np.maximum(name_codes, 0)] if n else -1, -1)
+    allocated = _monthly_grid(alloc_df, pct, member_codes, n, bounds)
+    points = months.to_numpy(dtype='datetime64[ns]')
+    starts = df['start_date'].to_numpy(dtype='datetime64[ns]')
+    exits = df['planned_exit'].to_numpy(dtype='datetime64[ns]')
+    active = (starts[:, None] <= points) & (np.isnat(exits)[:, None] | (exits[:, None] > points))
+    active[np.setdiff1d(np.arange(n), first_row)] = False
+    capacity = costs['fte'].to_numpy(dtype=float)[:, None] * 100 * active
+    supply = np.floor((np.maximum(capacity - allocated, 0) + 1e-9) / STEP_PERCENT).astype(int)
+
+    # Existing project FTE and missing demand in units
+    codes = pd.Categorical(alloc_df['project'], categories=list(projects)).codes
+    existing = np.zeros((len(projects), n_months))
+    on_project = np.zeros((n, len(projects), n_months), dtype=bool)
+    in_projects = codes >= 0
+    if in_projects.any():
+        existing = _monthly_grid(alloc_df, pct / 100.0, codes, len(projects), bounds)
+        both = known & in_projects
+        grid = _monthly_grid(alloc_df, np.ones(len(alloc_df)), np.where(both, member_codes * len(projects) + codes, -1),
+                             n * len(projects), bounds)
+        on_project = grid.reshape(n, len(projects), n_months) > 0
+    missing = np.ceil(np.maximum(demand.T - existing, 0) * 100 / STEP_PERCENT - 1e-9).astype(int)
+
+    # Cost per unit: monthly cost per FTE, cheaper for known products/projects
+    fte = costs['fte'].to_numpy(dtype=float)
+    unit_cost = costs['monthly_cost'].to_numpy(dtype=float) / np.maximum(fte, 1e-9)
+    skilled = np.zeros((n, len(projects)), dtype=bool)
+    if not registry.empty:
+        pair_comp, pair_member = component_pairs(df, registry, assignments)
+        product_of = pd.Categorical(registry.table['product'], categories=list(projects)).codes
+        has_product = product_of[pair_comp] >= 0
+        skilled[pair_member[has_product], product_of[pair_comp][has_product]] = True
+    base = np.repeat(unit_cost[:, None], len(projects), axis=1)
+    if enforce_skills:
+        base[~skilled] = np.inf
+    else:
+        base[skilled] *= SKILL_FACTOR
+
+    flows = np.zeros((n, len(projects), n_months), dtype=int)
+    previous = np.zeros((n, len(projects)), dtype=bool)
+    for m in range(n_months):
+        cost = np.where(previous | on_project[:, :, m], base * CONTINUITY_FACTOR, base)
+        if missing[:, m].any():
+            flows[:, :, m] = solver(supply[:, m], missing[:, m], cost)
+        previous = flows[:, :, m] > 0
+
+    # Runs of equal percentage per (employee, project) become one allocation each
+    runs = flows.reshape(n * len(projects), n_months)
+    padded = np.pad(runs, ((0, 0), (1, 1)))
+    r, c = np.nonzero(padded[:, 1:] != padded[:, :-1])
+    same = r[:-1] == r[1:]
+    row, lo, hi = r[:-1][same], c[:-1][same], c[1:][same]
+    units = runs[row, lo]
+    keep = units > 0
+    row, lo, hi, units = row[keep], lo[keep], hi[keep], units[keep]
+    proposals = pd.DataFrame({
+        'employee': names[row // len(projects)],
+        'project': np.asarray(projects)[row % len(projects)],
+        'start_date': months[lo].date if len(lo) else [],
+        'end_date': (months[hi - 1] + pd.offsets.MonthEnd(0)).date if len(hi) else [],
+        'percentage': units * STEP_PERCENT,
+    }, columns=PROPOSAL_COLUMNS).sort_values(['employee', 'project', 'start_date'], kind='stable')
+
+    proposed = flows.sum(axis=0) * STEP_PERCENT / 100.0
+    coverage = pd.DataFrame({'Monat': months.strftime('%Y-%m')})
+    for i, project in enumerate(projects):
+        coverage[f'{project} Bedarf'] = demand[:, i]
+        coverage[f'{project} Bestehend'] = existing[i]
+        coverage[f'{project} Vorschlag'] = proposed[i]
+        coverage[f'{project} Offen'] = np.maximum(demand[:, i] - existing[i] - proposed[i], 0).round(2)
+    return proposals.reset_index(drop=True), coverage
@@ -0,0 +1,288 @@
+"""
+Hierarchical org structure: departments -> groups -> teams.
+
+The dataset org_units is a list of nodes {"name", "parent", "kind"}; names are
+unique and members point to their node with the `team` field, so the flat
+teams of older data are nodes of the default tree. OrgTree orders the nodes
+depth-first: a subtree is one contiguous slice of that order.
+
+OrgRollup is a planner.store listener like KpiCounters: every node holds
+KpiCounters over its whole subtree. FTE and monthly cost depend on the rates
+of the as-of day (with a rate history), so their subtree sums are kept per day
+for the last PRICED_DAYS days asked for; a new day prices all members once. An
+added or removed member updates the nodes on its path to the root in the
+counters and every kept day (O(depth)), so the rollup of any node is O(1). A
+tree edit re-places all members; rate edits drop the kept days.
+"""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from planner.finance import default_budget_data, employee_costs
+from planner.kpi import KpiCounters
+from planner.rates import rates_at
+from planner.team import TEAMS
+
+UNASSIGNED = "Unassigned"
+KINDS = ["Abteilung", "Gruppe", "Team"]
+KT_STATUSES = ["Not Started", "In Progress", "Completed"]
+RATE_DATASETS = {"budget_data", "employee_settings", "rate_history"}
+# Stichtage, deren Preise behalten werden (Sitzungen mit verschiedenen Stichtagen)
+PRICED_DAYS = 8
+
+
+def default_org_units(teams=TEAMS):
+    """One department with one group of the flat teams; Unassigned directly below the department."""
+    units = [{"name": "Abteilung", "parent": None, "kind": "Abteilung"},
+             {"name": "Gruppe CS", "parent": "Abteilung", "kind": "Gruppe"}]
+    for team in teams:
+        parent = "Abteilung" if team == UNASSIGNED else "Gruppe CS"
+        units.append({"name": team, "parent": parent, "kind": "Team"})
+    return units
+
+
+class OrgTree:
+    """Nodes of org_units in depth-first order with subtree slices and root paths."""
+
+    def __init__(self, org_units):
+        self.units = {}
+        for unit in org_units or ():
+            self.units.setdefault(str(unit.get("name")), unit)
+        # Unknown parents make a node a root
+        self.parent = {}
+        for name, unit in self.units.items():
+            parent = None if unit.get("parent") is None else str(unit.get("parent"))
+            self.parent[name] = parent if parent in self.units and parent != name else None
+        # Cycles: the first node reached twice on the way up becomes a root
+        for name in self.units:
+            seen, current = set(), name
+            while current is not None and current not in seen:
+                seen.add(current)
+                current = self.parent[current]
+            if current is not None:
+                self.parent[current] = None
+        self.children = {name: [] for name in self.units}
+        self.roots = []
+        for name, parent in self.parent.items():
+            (self.children[parent] if parent is not None else self.roots).append(name)
+
+        self.order, self.depth, self._first, self._end = [], {}, {}, {}
+        stack = [(root, 0) for root in reversed(self.roots)]
+        while stack:
+            name, depth = stack.pop()
+            if depth < 0:
+                self._end[name] = len(self.order)
+                continue
+            self._first[name] = len(self.order)
+            self.depth[name] = depth
+            self.order.append(name)
+            stack.append((name, -1))
+            stack.extend((child, depth + 1) for child in reversed(self.children[name]))
+        self.paths = {name: self._path(name) for name in self.order}
+
+    def _path(self, name):
+        path = [name]
+        while self.parent[path[-1]] is not None:
+            path.append(self.parent[path[-1]])
+        return path
+
+    def __contains__(self, name):
+        return name in self.units
+
+    def __len__(self):
+        return len(self.order)
+
+    def subtree(self, name):
+        """Names of `name` and all its descendants (empty for unknown names)."""
+        if name not in self._first:
+            return []
+        return self.order[self._first[name]:self._end[name]]
+
+    def ancestors(self, name):
+        """`name` and its parents up to the root."""
+        return self.paths.get(name, [])
+
+    def label(self, name):
+        """Indented name for select boxes (em spaces, which the browser does not collapse)."""
+        depth = self.depth.get(name, 0)
+        return "\u2003" * depth + ("└ " if depth else "") + str(name)
+
+    def node_of(self, team):
+        """Node of a member's team field; unknown teams belong to Unassigned (if present)."""
+        team = UNASSIGNED if team is None or team == "" else str(team)
+        if team in self.units:
+            return team
+        return UNASSIGNED if UNASSIGNED in self.units else None
+
+
+def subtree_teams(df, tree, name):
+    """Distinct team values of df whose node lies in the subtree of `name` (for filter_team)."""
+    nodes = set(tree.subtree(name))
+    return [team for team in df['team'].unique() if tree.node_of(team) in nodes]
+
+
+def in_subtree(df, tree, name):
+    """Boolean mask of the members of df in the subtree of `name`."""
+    return df['team'].isin(subtree_teams(df, tree, name))
+
+
+class _Prices:
+    """FTE and monthly cost of every member on one day, and their sums per subtree."""
+
+    __slots__ = ("members", "fte", "cost")
+
+    def __init__(self, nodes):
+        self.members = {}       # id(member) -> (fte, cost)
+        self.fte = dict.fromkeys(nodes, 0.0)
+        self.cost = dict.fromkeys(nodes, 0.0)
+
+
+class OrgRollup:
+    """Subtree aggregates of every org node over team_data, kept in sync with the store."""
+
+    def __init__(self, org_units=(), team_data=(), budget_data=None, employee_settings=None, rate_history=None):
+        self._lock = threading.Lock()
+        self._rates = (budget_data or default_budget_data(), employee_settings or {}, rate_history or [])
+        self.reset(org_units, team_data)
+
+    def reset(self, org_units, team_data):
+        """Rebuild for a new tree and member list."""
+        with self._lock:
+            self._reset(OrgTree(org_units), list(team_data or ()))
+
+    def _reset(self, tree, team_data):
+        self.tree = tree
+        self._nodes = {name: KpiCounters() for name in tree.order}
+        self._members = {}      # id(member) -> (member, node)
+        self._unplaced = 0
+        self._priced = OrderedDict()    # rates day -> _Prices, least recently used first
+        self._add(team_data)
+
+    def _day(self, today):
+        """Key of the prices valid on `today`; without a rate history all days share one."""
+        return pd.Timestamp(today).normalize() if self._rates[2] else None
+
+    def _price(self, members, day):
+        """(fte, monthly cost) per member with the rates valid on `day`."""
+        if not members:
+            return []
+        frame = pd.DataFrame({"name": [m.get("name") for m in members],
+                              "employee_type": [m.get("employee_type") for m in members]})
+        as_of = pd.Timestamp.today().normalize() if day is None else day
+        costs = employee_costs(frame, *rates_at(*self._rates[:2], self._rates[2], as_of))
+        return list(zip(costs["fte"].to_numpy(dtype=float), costs["monthly_cost"].to_numpy(dtype=float)))
+
+    def _add_prices(self, prices, day, keys, sign=1):
+        if sign > 0:
+            for key, price in zip(keys, self._price([self._members[key][0] for key in keys], day)):
+                prices.members[key] = price
+        for key in keys:
+            fte, cost = prices.members[key] if sign > 0 else prices.members.pop(key)
+            node = self._members[key][1]
+            for name in self.tree.ancestors(node) if node is not None else ():
+                prices.fte[name] += sign * fte
+                prices.cost[name] += sign * cost
+
+    def _prices(self, today):
+        """Prices of `today`, computed once per day and kept for the last PRICED_DAYS days."""
+        day = self._day(today)
+        prices = self._priced.get(day)
+        if prices is None:
+            prices = self._priced[day] = _Prices(self.tree.order)
+            self._add_prices(prices, day, list(self._members))
+            while len(self._priced) > PRICED_DAYS:
+                self._priced.popitem(last=False)
+        else:
+            self._priced.move_to_end(day)
+        return prices
+
+    def _add(self, members):
+        keys = []
+        for member in members:
+            node = self.tree.node_of(member.get("team"))
+            self._members[id(member)] = (member, node)
+            keys.append(id(member))
+            if node is None:
+                self._unplaced += 1
+            else:
+                for name in self.tree.ancestors(node):
+                    self._nodes[name].add(member)
+        for day, prices in self._priced.items():
+            self._add_prices(prices, day, keys)
+
+    def _remove(self, member_ids):
+        for day, prices in self._priced.items():
+            self._add_prices(prices, day, member_ids, -1)
+        for key in member_ids:
+            member, node = self._members.pop(key)
+            if node is None:
+                self._unplaced -= 1
+            else:
+                for name in self.tree.ancestors(node):
+                    self._nodes[name].remove(member)
+
+    def apply_change(self, old_team, new_team):
+        """Update for a new team_data list (copy-on-write: only changed member objects)."""
+        new_ids = {id(member): member for member in new_team or ()}
+        with self._lock:
+            self._remove([key for key in self._members if key not in new_ids])
+            self._add([member for key, member in new_ids.items() if key not in self._members])
+
+    def on_commit(self, old, new, changed):
+        """planner.store listener for team_data, org_units and the rate datasets."""
+        if RATE_DATASETS & set(changed):
+            with self._lock:
+                self._rates = (new.get("budget_data") or default_budget_data(), new.get("employee_settings") or {},
+                               new.get("rate_history") or [])
+                self._priced.clear()
+        if "org_units" in changed:
+            self.reset(new.get("org_units"), new.get("team_data"))
+        elif "team_data" in changed:
+            self.apply_change(old.get("team_data"), new.get("team_data"))
+
+    def rollup(self, name, today):
+        """Aggregates of the subtree of `name`: team_kpis fields, KT status counts, fte, monthly_cost."""
+        with self._lock:
+            counters = self._nodes.get(name)
+            if counters is None:
+                return None
+            prices = self._prices(today)
+            kpis = counters.team_kpis(today)
+            kpis["kt_status"] = counters.kt_counts(KT_STATUSES)
+            kpis["fte"] = prices.fte[name]
+            kpis["monthly_cost"] = prices.cost[name]
+            return kpis
+
+    def total(self, today):
+        """Summable aggregates (total, critical, kt_status, fte, monthly_cost) over all roots."""
+        totals = {"total": 0, "critical": 0, "kt_status": dict.fromkeys(KT_STATUSES, 0), "fte": 0.0, "monthly_cost": 0.0}
+        for root in self.tree.roots:
+            kpis = self.rollup(root, today)
+            for key in ("total", "critical", "fte", "monthly_cost"):
+                totals[key] += kpis[key]
+            for status, count in kpis["kt_status"].items():
+                totals["kt_status"][status] += count
+        return totals
+
+    def frame(self, today):
+        """Rollups of all nodes in tree order."""
+        rows = []
+        for name in self.tree.order:
+            kpis = self.rollup(name, today)
+            rows.append({
+                "Einheit": self.tree.label(name),
+                "Art": self.tree.units[name].get("kind", ""),
+                "Mitarbeiter": kpis["total"],
+                "Kritische Exits": kpis["critical"],
+                "FTE": round(kpis["fte"], 2),
+                "Monatliche Kosten": kpis["monthly_cost"],
+                **{f"WU {status}": count for status, count in kpis["kt_status"].items()},
+            })
+        return pd.DataFrame(rows)
+
+    @property
+    def unplaced(self):
+        """Members whose team is not a node (no Unassigned node in the tree)."""
+        with self._lock:
+            return self._unplaced
@@ -0,0 +1,152 @@
+"""
+Effective-dated rates: raises, contract renewals and hour changes.
+
+budget_data (per employee type) and employee_settings (per employee) hold the
+rates that apply until the first change. Changes are rows of the dataset
+rate_history:
+
+    {"scope": "type" | "employee", "key": employee type or name,
+     "valid_from": "YYYY-MM-DD", <any of RATE_FIELDS>}
+
+A row sets the given fields of its key from valid_from on; fields it does not
+name keep their previous value. Employee fields take precedence over the
+fields of the employee's type (see finance.resolve_costs).
+
+rates_at() gives budget_data/employee_settings as they apply on one day.
+rate_intervals() joins the members with the change dates of their type and of
+themselves (one pandas merge each) into elementary intervals with constant
+fields, so the cost forecast can integrate over period x interval overlaps.
+"""
+import numpy as np
+import pandas as pd
+
+RATE_FIELDS = ("monthly_cost", "yearly_budget", "hourly_rate", "weekly_hours")
+TYPE_SCOPE = "type"
+EMPLOYEE_SCOPE = "employee"
+
+INTERVAL_COLUMNS = ["member", "start", "end", "has_employee"] + \
+    [f"type_{field}" for field in RATE_FIELDS] + [f"employee_{field}" for field in RATE_FIELDS]
+
+
+def _changes(rate_history, scope):
+    """(valid_from, key, row) of the rows of `scope` with a valid date, ordered by valid_from (stable)."""
+    rows = [row for row in rate_history or () if row.get("scope") == scope]
+    dates = pd.to_datetime(pd.Series([row.get("valid_from") for row in rows], dtype=object),
+                           errors="coerce", format="mixed").dt.normalize()
+    changes = [(valid_from, str(row.get("key")), row) for valid_from, row in zip(dates, rows)
+               if not pd.isna(valid_from)]
+    changes.sort(key=lambda item: item[0])
+    return changes
+
+
+def _apply(values, row):
+    return {**values, **{field: row[field] for field in RATE_FIELDS if row.get(field) is not None}}
+
+
+def rates_at(budget_data, employee_settings, rate_history, as_of):
+    """(budget_data, employee_settings) with all changes valid on `as_of` applied."""
+    if not rate_history:
+        return budget_data, employee_settings
+    as_of = pd.Timestamp(as_of).normalize()
+    budget_data = dict(budget_data)
+    for valid_from, key, row in _changes(rate_history, TYPE_SCOPE):
+        if valid_from <= as_of and key in budget_data:
+            budget_data[key] = _apply(budget_data[key], row)
+    employee_settings = dict(employee_settings or {})
+    for valid_from, key, row in _changes(rate_history, EMPLOYEE_SCOPE):
+        if valid_from <= as_of:
+            employee_settings[key] = _apply(employee_settings.get(key, {}), row)
+    return budget_data, employee_settings
+
+
+def _segments(base, changes, key_column):
+    """
+    Frame of (key, valid_from, fields) with the cumulative fields after each
+    change; `base` entries start at NaT (before any change).
+    """
+    records = []
+    current = {}
+    for key, values in base.items():
+        current[key] = dict(values)
+        records.append({key_column: key, "valid_from": pd.NaT, **current[key]})
+    for valid_from, key, row in changes:
+        current[key] = _apply(current.get(key, {}), row)
+        records.append({key_column: key, "valid_from": valid_from, **current[key]})
+    frame = pd.DataFrame(records, columns=[key_column, "valid_from", *RATE_FIELDS])
+    frame["valid_from"] = pd.to_datetime(frame["valid_from"])
+    frame[list(RATE_FIELDS)] = frame[list(RATE_FIELDS)].apply(pd.to_numeric, errors="coerce")
+    return frame
+
+
+def _forward_fill(segment, group_start):
+    """Last segment >= 0 at or before each row within its member group, else -1."""
+    position = np.where(segment >= 0, np.arange(len(segment)), -1)
+    last = np.maximum.accumulate(position) if len(position) else position
+    last = np.where(last >= group_start, last, -1)
+    return np.where(last >= 0, segment[np.maximum(last, 0)], -1)
+
+
+def rate_intervals(df, budget_data, employee_settings, rate_history):
+    """
+    Elementary rate intervals of the members of df (INTERVAL_COLUMNS).
+
+    `member` is the df index label, [start, end) the interval (NaT: open) and
+    type_*/employee_* the fields of the member's type and of the member
+    (NaN when not set). `has_employee` marks intervals in which the member has
+    own settings. Members of types outside budget_data only get intervals
+    from their own changes on.
+    """
+    types = _segments(budget_data, [c for c in _changes(rate_history, TYPE_SCOPE) if c[1] in budget_data], "type")
+    settings = {str(name): values for name, values in (employee_settings or {}).items()}
+    employees = _segments(settings, _changes(rate_history, EMPLOYEE_SCOPE), "name")
+
+    members = pd.DataFrame({
+        "member": df.index,
+        "position": np.arange(len(df)),
+        "type": df["employee_type"].to_numpy(),
+        "name": df["name"].astype(str).to_numpy(),
+    })
+    type_events = members.merge(types[["type", "valid_from"]].rename_axis("type_segment").reset_index(), on="type")
+    employee_events = members.merge(employees[["name", "valid_from"]].rename_axis("employee_segment").reset_index(),
+                                    on="name")
+    events = pd.concat([
+        type_events[["position", "valid_from", "type_segment"]].assign(employee_segment=-1),
+        employee_events[["position", "valid_from", "employee_segment"]].assign(type_segment=-1),
+    ], ignore_index=True)
+    if events.empty:
+        return pd.DataFrame(columns=INTERVAL_COLUMNS)
+
+    # Events per member in date order; NaT (base) first
+    day = events["valid_from"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    day = np.where(events["valid_from"].isna().to_numpy(), np.iinfo(np.int64).min, day)
+    position = events["position"].to_numpy()
+    order = np.lexsort((day, position))
+    day, position = day[order], position[order]
+    type_segment = events["type_segment"].to_numpy()[order]
+    employee_segment = events["employee_segment"].to_numpy()[order]
+
+    first_of_member = np.r_[True, position[1:] != position[:-1]]
+    group_start = np.maximum.accumulate(np.where(first_of_member, np.arange(len(position)), 0))
+    type_segment = _forward_fill(type_segment, group_start)
+    employee_segment = _forward_fill(employee_segment, group_start)
+
+    # One interval per member and change day, up to the next change day
+    last_of_day = np.r_[(position[1:] != position[:-1]) | (day[1:] != day[:-1]), True]
+    day, position = day[last_of_day], position[last_of_day]
+    type_segment, employee_segment = type_segment[last_of_day], employee_segment[last_of_day]
+    has_next = np.r_[position[1:] == position[:-1], False]
+    end = np.where(has_next, np.r_[day[1:], 0], np.iinfo(np.int64).min)
+
+    open_start = day == np.iinfo(np.int64).min
+    intervals = pd.DataFrame({
+        "member": members["member"].to_numpy()[position],
+        "start": np.where(open_start, np.datetime64("NaT"), day.astype("datetime64[ns]")),
+        "end": np.where(has_next, end.astype("datetime64[ns]"), np.datetime64("NaT")),
+        "has_employee": employee_segment >= 0,
+    })
+    for prefix, segments, index in (("type", types, type_segment), ("employee", employees, employee_segment)):
+        values = np.vstack([segments[list(RATE_FIELDS)].to_numpy(dtype=float), np.full(len(RATE_FIELDS), np.nan)])
+        picked = values[index]  # -1: NaN row
+        for i, field in enumerate(RATE_FIELDS):
+            intervals[f"{prefix}_{field}"] = picked[:, i]
+    return intervals[INTERVAL_COLUMNS]
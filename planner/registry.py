@@ -0,0 +1,137 @@
+"""
+Component registry: one table for the master data of all components.
+
+The store dataset `components` is a list of records
+
+    {"id", "name", "product", "required_count", "transfer_months", "responsibles"}
+
+with the responsibles as member names (members are keyed by name, as in
+project_allocations). ComponentRegistry turns it into
+- `table`: one row per component; the row position is the component index of
+  the vectorized staffing, hiring, simulation and scenario code,
+- `responsibles`: one row per (component, responsible person),
+- a product index (product -> component positions),
+so lookups by component, product or responsible are joins and array
+lookups instead of dict lookups with defaults.
+
+Component names are matched through a canonicalization index: canonical_key()
+folds case, umlauts, whitespace and separators, so "ZL", " zl " and "z-l"
+name the same component.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REQUIRED = 1
+DEFAULT_TRANSFER_MONTHS = 6
+UNKNOWN_PRODUCT = "Unknown"
+TABLE_COLUMNS = ["id", "name", "product", "required_count", "transfer_months"]
+
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+_SEPARATORS = re.compile(r"[\s\-_./]+")
+
+
+def canonical_key(text):
+    """Spelling-insensitive key of a component name."""
+    key = unicodedata.normalize("NFKC", str(text)).casefold().translate(_UMLAUTS)
+    return _SEPARATORS.sub("", key)
+
+
+def canonical_keys(texts):
+    """canonical_key() of every entry of a string Series."""
+    return (texts.str.normalize("NFKC").str.casefold().str.translate(_UMLAUTS)
+            .str.replace(_SEPARATORS, "", regex=True))
+
+
+def split_components(text):
+    """Stripped, non-empty entries of a comma-separated components field."""
+    return [token.strip() for token in str(text or "").split(",") if token.strip()]
+
+
+def _as_list(responsible):
+    if responsible is None:
+        return []
+    return list(responsible) if isinstance(responsible, (list, tuple)) else [responsible]
+
+
+def upsert_component(components, name, product, responsibles, required_count=DEFAULT_REQUIRED,
+                     transfer_months=DEFAULT_TRANSFER_MONTHS):
+    """New components list with `name` added, or replaced (keeping its id) if it exists."""
+    existing = next((c for c in components if c["name"] == name), None)
+    record = {
+        "id": existing["id"] if existing else max((c["id"] for c in components), default=-1) + 1,
+        "name": name,
+        "product": product,
+        "required_count": int(required_count),
+        "transfer_months": int(transfer_months),
+        "responsibles": list(responsibles),
+    }
+    if existing is None:
+        return components + [record]
+    return [record if c is existing else c for c in components]
+
+
+class ComponentRegistry:
+    """Component table with responsibles and product index, built from the `components` records."""
+
+    def __init__(self, components):
+        components = components or []
+        table = pd.DataFrame([{key: c.get(key) for key in TABLE_COLUMNS} for c in components],
+                             columns=TABLE_COLUMNS)
+        table["product"] = table["product"].fillna(UNKNOWN_PRODUCT)
+        table["required_count"] = pd.to_numeric(table["required_count"]).fillna(DEFAULT_REQUIRED).astype(int)
+        table["transfer_months"] = pd.to_numeric(table["transfer_months"]).fillna(DEFAULT_TRANSFER_MONTHS).astype(int)
+        table["key"] = pd.Series([canonical_key(name) for name in table["name"]], index=table.index, dtype=object)
+        responsible_lists = [_as_list(c.get("responsibles")) for c in components]
+        table["responsible_names"] = [", ".join(map(str, r)) for r in responsible_lists]
+        self.table = table
+
+        comp = np.repeat(np.arange(len(components)), [len(r) for r in responsible_lists])
+        self.responsibles = pd.DataFrame({
+            "comp": comp,
+            "component": table["name"].to_numpy()[comp],
+            "name": np.array([str(person).strip() for r in responsible_lists for person in r], dtype=object),
+        })
+        self._by_product = table.groupby("product", sort=True).indices
+        self.by_key = table.groupby("key", sort=False).indices
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def empty(self):
+        return self.table.empty
+
+    @property
+    def names(self):
+        return self.table["name"].tolist()
+
+    @property
+    def required(self):
+        return self.table["required_count"].to_numpy()
+
+    @property
+    def transfer_months(self):
+        return self.table["transfer_months"].to_numpy()
+
+    def products(self):
+        """Products with at least one component, sorted."""
+        return list(self._by_product)
+
+    def components_of(self, product):
+        """Table rows of the components of `product`, in registry order."""
+        return self.table.iloc[self._by_product.get(product, [])]
+
+    def canonical_components(self, text):
+        """
+        Components field with every entry replaced by the registry name it
+        matches (unknown entries kept as typed), without duplicates.
+        """
+        names = self.table["name"].to_numpy()
+        resolved = []
+        for token in split_components(text):
+            matches = self.by_key.get(canonical_key(token))
+            resolved.append(names[matches[0]] if matches is not None else token)
+        return ", ".join(dict.fromkeys(resolved))
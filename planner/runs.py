@@ -0,0 +1,125 @@
+"""
+Run-length encoded step functions per group with prefix sums.
+
+Runs sums overlapping intervals [start, end) with a value per group (employee,
+project) into non-overlapping runs of constant level, sorted by group and
+start: the run-length encoding of a daily series. The area (level x days)
+before each run within its group is kept as prefix sum, so the integral of a
+group up to any day is one np.searchsorted, and averages over months, weeks or
+days of multi-year ranges are differences of integrals at the period bounds.
+
+Days are integer day numbers (days since 1970-01-01, see day_numbers()).
+"""
+import numpy as np
+import pandas as pd
+
+
+def day_numbers(values):
+    """Day numbers (int64 days since 1970-01-01) of dates/datetimes."""
+    days = pd.DatetimeIndex(pd.to_datetime(values)).to_numpy(dtype="datetime64[D]")
+    return days.astype(np.int64)
+
+
+class Runs:
+    """Summed step functions of `n_groups` groups as sorted runs."""
+
+    def __init__(self, starts, ends, values, codes, n_groups):
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        codes = np.asarray(codes, dtype=np.int64)
+        self.n_groups = n_groups
+        keep = (starts < ends) & (values != 0) & (codes >= 0)
+        starts, ends, values, codes = starts[keep], ends[keep], values[keep], codes[keep]
+
+        # Level changes: +value at start, -value at end, per group in day order
+        day = np.concatenate([starts, ends])
+        delta = np.concatenate([values, -values])
+        code = np.concatenate([codes, codes])
+        order = np.lexsort((day, code))
+        day, delta, code = day[order], delta[order], code[order]
+        level = np.cumsum(delta)
+        group_first = np.r_[True, code[1:] != code[:-1]] if len(code) else np.zeros(0, dtype=bool)
+        base = (level - delta)[group_first]
+        level = level - base[np.cumsum(group_first) - 1]
+
+        # Level after the last change of a day holds until the next change day of the group
+        last_of_day = np.r_[(code[1:] != code[:-1]) | (day[1:] != day[:-1]), True] if len(code) else group_first
+        day, code, level = day[last_of_day], code[last_of_day], level[last_of_day]
+        idx = np.flatnonzero(code[1:] == code[:-1]) if len(code) else np.zeros(0, dtype=np.int64)
+        start, end, value, run_code = day[idx], day[idx + 1], level[idx], code[idx]
+        nonzero = np.abs(value) > 1e-9
+        start, end, value, run_code = start[nonzero], end[nonzero], value[nonzero], run_code[nonzero]
+        if not len(start):
+            # No run left (no intervals, only 0 % or empty ones): every group is 0 everywhere
+            self.code = self.start = self.end = np.zeros(0, dtype=np.int64)
+            self.value = self.before = np.zeros(0)
+            self.offsets = np.zeros(n_groups + 1, dtype=np.int64)
+            self._day0, self._span, self._keys = 0, 1, np.zeros(0, dtype=np.int64)
+            return
+
+        # Merge adjacent runs of equal level
+        new_run = np.r_[True, (run_code[1:] != run_code[:-1]) | (start[1:] != end[:-1])
+                        | ~np.isclose(value[1:], value[:-1])]
+        heads = np.flatnonzero(new_run)
+        tails = np.r_[heads[1:], len(start)] - 1
+        self.code = run_code[heads]
+        self.start = start[heads]
+        self.end = end[tails]
+        self.value = np.round(value[heads], 9)
+
+        # Area before each run within its group
+        area = self.value * (self.end - self.start)
+        cumulative = np.cumsum(area)
+        self.offsets = np.searchsorted(self.code, np.arange(n_groups + 1))
+        group_base = np.r_[0.0, cumulative][self.offsets[:-1]]
+        self.before = cumulative - area - np.repeat(group_base, np.diff(self.offsets))
+        self._day0 = int(self.start.min())
+        self._span = int(self.end.max()) - self._day0 + 1
+        self._keys = self.code * self._span + (self.start - self._day0)
+
+    def __len__(self):
+        return len(self.start)
+
+    def group(self, code):
+        """Runs of group `code` as frame (start, end, value); end is exclusive."""
+        lo, hi = self.offsets[code], self.offsets[code + 1]
+        return pd.DataFrame({
+            "start": self.start[lo:hi].astype("datetime64[D]"),
+            "end": self.end[lo:hi].astype("datetime64[D]"),
+            "value": self.value[lo:hi],
+        })
+
+    def integral(self, days, codes=None):
+        """
+        Area up to (excluding) each of `days` for `codes` (default: all groups),
+        as array (len(codes), len(days)).
+        """
+        codes = np.arange(self.n_groups) if codes is None else np.asarray(codes, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        if not len(self.start) or not len(codes) or not len(days):
+            return np.zeros((len(codes), len(days)))
+        t = np.clip(days - self._day0, 0, self._span - 1)
+        keys = codes[:, None] * self._span + t[None, :]
+        idx = np.searchsorted(self._keys, keys, side="right") - 1
+        found = (idx >= 0) & (self.code[np.maximum(idx, 0)] == codes[:, None])
+        idx = np.maximum(idx, 0)
+        inside = np.minimum(t[None, :] + self._day0, self.end[idx]) - self.start[idx]
+        return np.where(found, self.before[idx] + self.value[idx] * inside, 0.0)
+
+    def averages(self, bounds, codes=None):
+        """Average level per period [bounds[i], bounds[i + 1]), as array (groups, periods)."""
+        bounds = np.asarray(bounds, dtype=np.int64)
+        return np.diff(self.integral(bounds, codes), axis=1) / np.diff(bounds)
+
+    def first_above(self, code, start, end, threshold):
+        """(first day, level) in [start, end) where group `code` exceeds `threshold`, or None."""
+        if threshold < 0:
+            return start, 0.0
+        lo, hi = self.offsets[code], self.offsets[code + 1]
+        overlap = np.flatnonzero((self.start[lo:hi] < end) & (self.end[lo:hi] > start)
+                                 & (self.value[lo:hi] > threshold))
+        if not len(overlap):
+            return None
+        run = lo + overlap[0]
+        return max(int(self.start[run]), int(start)), float(self.value[run])
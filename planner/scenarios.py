@@ -0,0 +1,242 @@
+"""
+What-if scenarios as overlays on the base plan.
+
+A scenario is a plain dict stored next to the plan data (dataset "scenarios")
+that records only the differences to the base plan:
+
+    {
+        "exit_changes": {name: "YYYY-MM-DD" or None},
+        "hires": [{"name", "employee_type", "start_date", "planned_exit", "components"}],
+        "component_changes": {component: [responsible names]},
+        "allocation_changes": {"add": [allocation dicts], "remove": [allocation ids]},
+    }
+
+ScenarioEngine computes the base timelines (active members, monthly cost,
+component coverage, project FTE) once per month of the horizon. A scenario is
+evaluated as base + delta of the members, components and allocations it
+touches, so the base plan is never copied and the cost of a scenario does not
+depend on the team size.
+
+A member is active in a month when start <= first day of the month < exit,
+as in the Teamprognose.
+"""
+import numpy as np
+import pandas as pd
+
+from planner.allocation import PROJECTS, _period_average, allocation_frame, month_starts, period_bounds
+from planner.assignments import assignments_for
+from planner.registry import _as_list, canonical_key, split_components
+
+BASE_NAME = "Basisplan"
+
+
+def empty_scenario():
+    return {"exit_changes": {}, "hires": [], "component_changes": {},
+            "allocation_changes": {"add": [], "remove": []}}
+
+
+def _datetimes(values):
+    return pd.to_datetime(pd.Series(list(values), dtype=object)).to_numpy(dtype='datetime64[ns]')
+
+
+def _month_spans(starts, exits, points):
+    """
+    Active month index range [lo, hi) per member on the month-start axis.
+    Members without start or leaving before they start get an empty range.
+    """
+    lo = np.searchsorted(points, starts, side='left')
+    hi = np.where(np.isnat(exits), len(points), np.searchsorted(points, exits, side='left'))
+    invalid = np.isnat(starts) | (~np.isnat(exits) & (exits < starts))
+    hi = np.where(invalid, lo, np.maximum(hi, lo))
+    return lo, hi
+
+
+def _timeline(lo, hi, weights, n_points, groups=None, n_groups=1):
+    """Per-group sum of `weights` over [lo, hi) via a difference array."""
+    groups = np.zeros(len(lo), dtype=int) if groups is None else np.asarray(groups, dtype=int)
+    diff = np.zeros((n_groups, n_points + 1))
+    np.add.at(diff, (groups, lo), weights)
+    np.add.at(diff, (groups, hi), -np.asarray(weights, dtype=float))
+    return np.cumsum(diff, axis=1)[:, :n_points]
+
+
+def _rows_by_name(df):
+    names = df['name'].astype(str).str.strip().to_numpy()
+    return pd.Series(np.arange(len(names))).groupby(names).indices
+
+
+class ScenarioEngine:
+    """Base plan timelines over [start, end] on a monthly axis."""
+
+    def __init__(self, df, costs, registry, alloc_df, budget_data, start_date, end_date, projects=PROJECTS,
+                 assignments=None):
+        self.months = month_starts(start_date, end_date)
+        self.points = self.months.to_numpy(dtype='datetime64[ns]')
+        n_points = len(self.points)
+        self.budget_data = budget_data
+        self.projects = list(projects)
+
+        # Members
+        self.starts = df['start_date'].to_numpy(dtype='datetime64[ns]')
+        self.exits = df['planned_exit'].to_numpy(dtype='datetime64[ns]')
+        self.monthly_cost = costs['monthly_cost'].to_numpy(dtype=float)
+        self.lo, self.hi = _month_spans(self.starts, self.exits, self.points)
+        self.rows_by_name = _rows_by_name(df)
+
+        self.headcount = _timeline(self.lo, self.hi, np.ones(len(self.lo)), n_points)[0]
+        self.cost = _timeline(self.lo, self.hi, self.monthly_cost, n_points)[0]
+
+        # Components: (component, member) pairs of the assignment table
+        if assignments is None:
+            assignments = assignments_for(df, registry)
+        self.components = registry.names
+        self.comp_index = {c: i for i, c in enumerate(self.components)}
+        self.comp_by_key = registry.by_key
+        self.required = registry.required
+
+        self.pair_comp = assignments['comp'].to_numpy(dtype=int)
+        self.pair_member = assignments['member'].to_numpy(dtype=int)
+        named = assignments[assignments['named']]
+        self.token_members = named.groupby('comp')['member'].apply(set).to_dict()
+        responsible = assignments[assignments['responsible']]
+        self.resp_members = responsible.groupby('comp')['member'].apply(set).to_dict()
+        self.coverage = _timeline(self.lo[self.pair_member], self.hi[self.pair_member],
+                                  np.ones(len(self.pair_member)), n_points,
+                                  self.pair_comp, len(self.components))
+
+        # Allocations: project FTE per month
+        self.alloc_df = alloc_df
+        self.bounds = period_bounds(self.months)
+        self.project_fte = self._project_fte(alloc_df)
+
+    def _project_fte(self, alloc_df):
+        codes = pd.Categorical(alloc_df['project'], categories=self.projects).codes
+        if len(self.points) == 0:
+            return np.zeros((len(self.projects), 0))
+        return _period_average(alloc_df, alloc_df['percentage'].to_numpy() / 100.0, codes, len(self.projects),
+                               self.bounds)
+
+    def _hire_cost(self, employee_type):
+        return float(self.budget_data.get(employee_type, {}).get('monthly_cost', 0))
+
+    def evaluate(self, scenario):
+        """Timelines of the base plan with `scenario` applied (None = base plan)."""
+        n_points = len(self.points)
+        headcount = self.headcount.copy()
+        cost = self.cost.copy()
+        coverage = self.coverage.copy()
+        project_fte = self.project_fte.copy()
+        if not scenario:
+            return self._result(headcount, cost, coverage, project_fte)
+
+        # Moved exits: swap the old month span of the affected members for the new one
+        changed = {}
+        for name, new_exit in (scenario.get("exit_changes") or {}).items():
+            for row in self.rows_by_name.get(str(name).strip(), ()):
+                changed[row] = new_exit
+        new_lo, new_hi = self.lo, self.hi
+        if changed:
+            rows = np.fromiter(changed, dtype=int)
+            lo, hi = _month_spans(self.starts[rows], _datetimes(changed.values()), self.points)
+            old = _timeline(self.lo[rows], self.hi[rows], np.ones(len(rows)), n_points)[0]
+            headcount += _timeline(lo, hi, np.ones(len(rows)), n_points)[0] - old
+            cost += (_timeline(lo, hi, self.monthly_cost[rows], n_points)[0]
+                     - _timeline(self.lo[rows], self.hi[rows], self.monthly_cost[rows], n_points)[0])
+            new_lo, new_hi = self.lo.copy(), self.hi.copy()
+            new_lo[rows], new_hi[rows] = lo, hi
+
+        # Component pairs: reassigned responsibles and members with moved exits
+        removed, added = [], []
+        for component, responsibles in (scenario.get("component_changes") or {}).items():
+            c = self.comp_index.get(component)
+            if c is None:
+                continue
+            tokens = self.token_members.get(c, set())
+            old_members = tokens | self.resp_members.get(c, set())
+            new_members = tokens | {m for person in _as_list(responsibles)
+                                    for m in self.rows_by_name.get(str(person).strip(), ())}
+            removed += [(c, m) for m in old_members - new_members]
+            added += [(c, m) for m in new_members - old_members]
+        if changed:
+            moved = np.isin(self.pair_member, rows)
+            removed_set = set(removed)
+            for c, m in zip(self.pair_comp[moved], self.pair_member[moved]):
+                if (c, m) not in removed_set:
+                    removed.append((c, m))
+                    added.append((c, m))
+        if removed:
+            c, m = np.array(removed).T
+            coverage -= _timeline(self.lo[m], self.hi[m], np.ones(len(m)), n_points, c, len(self.components))
+        if added:
+            c, m = np.array(added).T
+            coverage += _timeline(new_lo[m], new_hi[m], np.ones(len(m)), n_points, c, len(self.components))
+
+        # Hires
+        hires = scenario.get("hires") or []
+        if hires:
+            lo, hi = _month_spans(_datetimes(h.get("start_date") for h in hires),
+                                  _datetimes(h.get("planned_exit") for h in hires), self.points)
+            headcount += _timeline(lo, hi, np.ones(len(hires)), n_points)[0]
+            cost += _timeline(lo, hi, [self._hire_cost(h.get("employee_type")) for h in hires], n_points)[0]
+            hire_pairs = [(c, i) for i, h in enumerate(hires)
+                          for c in {c for token in split_components(h.get("components"))
+                                    for c in self.comp_by_key.get(canonical_key(token), ())}]
+            if hire_pairs:
+                c, i = np.array(hire_pairs).T
+                coverage += _timeline(lo[i], hi[i], np.ones(len(i)), n_points, c, len(self.components))
+
+        # Allocation changes
+        allocation_changes = scenario.get("allocation_changes") or {}
+        remove_ids = set(allocation_changes.get("remove") or [])
+        if remove_ids:
+            project_fte -= self._project_fte(self.alloc_df[self.alloc_df['id'].isin(remove_ids)])
+        if allocation_changes.get("add"):
+            project_fte += self._project_fte(allocation_frame(allocation_changes["add"]))
+
+        return self._result(headcount, cost, coverage, project_fte)
+
+    def _result(self, headcount, cost, coverage, project_fte):
+        understaffed = coverage < self.required[:, None]
+        return {
+            "headcount": headcount.round().astype(int),
+            "cost": cost,
+            "coverage": coverage.round().astype(int),
+            "understaffed": understaffed.sum(axis=0),
+            "project_fte": project_fte,
+        }
+
+
+def compare(engine, scenarios):
+    """
+    Evaluate the base plan and all `scenarios` ({name: scenario}).
+
+    Returns (summary, timeline): one summary row per scenario and a long frame
+    Monat x Szenario for the charts.
+    """
+    results = {BASE_NAME: engine.evaluate(None)}
+    for name, scenario in scenarios.items():
+        results[name] = engine.evaluate(scenario)
+
+    base = results[BASE_NAME]
+    summary_rows, timelines = [], []
+    for name, result in results.items():
+        row = {
+            "Szenario": name,
+            "Aktive Mitglieder (Ende)": int(result["headcount"][-1]) if len(result["headcount"]) else 0,
+            "Minimum Mitglieder": int(result["headcount"].min()) if len(result["headcount"]) else 0,
+            "Kosten gesamt (€)": float(result["cost"].sum()),
+            "Δ Kosten (€)": float(result["cost"].sum() - base["cost"].sum()),
+            "Unterbesetzte Komponenten-Monate": int(result["understaffed"].sum()),
+        }
+        for i, project in enumerate(engine.projects):
+            row[f"{project} FTE (Ø)"] = float(result["project_fte"][i].mean()) if len(engine.points) else 0.0
+        summary_rows.append(row)
+        timeline = pd.DataFrame({
+            "Monat": engine.months,
+            "Szenario": name,
+            "Aktive Mitglieder": result["headcount"],
+            "Monatliche Kosten": result["cost"],
+            "Unterbesetzte Komponenten": result["understaffed"],
+        })
+        timelines.append(timeline)
+    return pd.DataFrame(summary_rows), pd.concat(timelines, ignore_index=True)
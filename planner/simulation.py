@@ -0,0 +1,233 @@
+"""
+Monte Carlo simulation of attrition and component coverage risk.
+
+planned_exit is treated as uncertain. Every run samples per member
+- a slip of the planned exit, normally distributed around the planned date
+  with EXIT_SLIP_DAYS of the employee type, and
+- an unplanned exit after an exponential waiting time with the annual
+  ATTRITION_RATES of the employee type and tenure bucket at the as-of date,
+  counted from the as-of date (or the later start).
+The effective exit is the earlier of both; exits before the as-of date are
+facts and stay as planned.
+
+Runs are vectorized as runs x members arrays and split into shards of
+SHARD_RUNS runs, each with its own seed from SeedSequence(seed).spawn(), so
+the result depends only on the seed and not on the number of workers. Shards
+run in a process pool (AURA_SIM_WORKERS, default: CPU count; 1 runs them
+in-process). Headcount and cost bands are percentiles over all runs; the
+staffing of each component is reduced per shard to a histogram
+(component x point x count), which merges exactly.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from planner.forecast import forecast_points
+from planner.assignments import component_pairs
+
+# Jährliche Rate ungeplanter Austritte je Mitarbeitertyp und Tenure (< 1 Jahr, 1-3 Jahre, > 3 Jahre)
+ATTRITION_RATES = {
+    "Intern": (0.10, 0.08, 0.05),
+    "Lead Cost Employee (LCE)": (0.12, 0.08, 0.05),
+    "Extern": (0.25, 0.15, 0.10),
+}
+DEFAULT_ATTRITION = (0.15, 0.10, 0.05)
+TENURE_BUCKETS_DAYS = (365, 3 * 365)
+
+# Standardabweichung in Tagen, um die geplante Austritte verrutschen
+EXIT_SLIP_DAYS = {"Intern": 30, "Lead Cost Employee (LCE)": 60, "Extern": 90}
+DEFAULT_EXIT_SLIP = 60
+
+PERCENTILES = (10, 50, 90)
+SHARD_RUNS = 250
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _workers():
+    return max(1, int(os.environ.get("AURA_SIM_WORKERS", os.cpu_count() or 1)))
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: Streamlit runs scripts in threads, fork would copy their locks
+            _executor = ProcessPoolExecutor(max_workers=_workers(),
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def member_model(df, today):
+    """Start/exit as day offsets to `today`, exit slip and daily attrition hazard per member."""
+    today = pd.Timestamp(today).normalize()
+    start = (df['start_date'] - today).dt.days.to_numpy(dtype=float)
+    exit = (df['planned_exit'] - today).dt.days.to_numpy(dtype=float)
+    types = df['employee_type']
+    slip = types.map(EXIT_SLIP_DAYS).fillna(DEFAULT_EXIT_SLIP).to_numpy(dtype=float)
+
+    codes, uniques = pd.factorize(types)
+    table = np.array([ATTRITION_RATES.get(t, DEFAULT_ATTRITION) for t in uniques] + [DEFAULT_ATTRITION])
+    codes = np.where(codes < 0, len(uniques), codes)
+    bucket = np.searchsorted(TENURE_BUCKETS_DAYS, np.nan_to_num(-start), side='right')
+    hazard = -np.log1p(-table[codes, bucket]) / 365
+    return {"start": start, "exit": exit, "slip": slip, "hazard": hazard}
+
+
+def _run_timelines(lo, hi, weights, runs, n_points):
+    """Per-run sum of `weights` over [lo, hi) (runs x members) via one bincount."""
+    size = runs * (n_points + 1)
+    offsets = np.arange(runs)[:, None] * (n_points + 1)
+    weights = np.broadcast_to(weights, hi.shape).ravel()
+    diff = (np.bincount((offsets + lo).ravel(), weights=weights, minlength=size)
+            - np.bincount((offsets + hi).ravel(), weights=weights, minlength=size))
+    return np.cumsum(diff.reshape(runs, n_points + 1), axis=1)[:, :n_points]
+
+
+def _run_shard(task):
+    """Sample one shard of runs; returns its headcount/cost rows and coverage histogram."""
+    runs, points = task["runs"], task["points"]
+    start, exit, slip, hazard = task["start"], task["exit"], task["slip"], task["hazard"]
+    n_points = len(points)
+    rng = np.random.default_rng(task["seed"])
+
+    # Effective exit per run and member
+    earliest = np.maximum(np.nan_to_num(start, nan=0.0), 0.0)
+    pending = exit >= 0
+    planned = np.where(np.isnan(exit), np.inf, exit)
+    slipped = np.maximum(planned + rng.standard_normal((runs, len(start))) * slip, earliest)
+    planned = np.where(pending, slipped, planned)
+    scale = np.divide(1.0, hazard, out=np.full(len(hazard), np.inf), where=hazard > 0)
+    unplanned = earliest + rng.standard_exponential((runs, len(start))) * scale
+    effective = np.minimum(planned, unplanned)
+
+    # Active at p: start <= p and exit > p (exit >= p with exit_inclusive)
+    lo = np.searchsorted(points, start, side='left')
+    side = 'right' if task["exit_inclusive"] else 'left'
+    hi = np.maximum(np.searchsorted(points, effective.ravel(), side=side).reshape(effective.shape), lo)
+
+    result = {"headcount": _run_timelines(lo, hi, 1.0, runs, n_points)}
+    if task["weights"] is not None:
+        result["cost"] = _run_timelines(lo, hi, task["weights"], runs, n_points)
+
+    pair_comp, pair_member, n_comp, n_counts = (task["pair_comp"], task["pair_member"],
+                                                task["n_comp"], task["n_counts"])
+    if n_comp:
+        coverage = _run_timelines(pair_comp * (n_points + 1) + lo[pair_member],
+                                  pair_comp * (n_points + 1) + hi[:, pair_member],
+                                  1.0, runs, n_comp * (n_points + 1) - 1)
+        coverage = np.pad(coverage, ((0, 0), (0, 1))).reshape(runs, n_comp, n_points + 1)[:, :, :n_points]
+        cells = np.arange(n_comp * n_points).reshape(n_comp, n_points) * n_counts
+        result["coverage"] = np.bincount((cells + coverage.round().astype(int)).ravel(),
+                                         minlength=n_comp * n_points * n_counts).reshape(n_comp, n_points, n_counts)
+    return result
+
+
+def simulate(df, today, points, runs=1000, seed=0, weights=None, registry=None, exit_inclusive=False,
+             assignments=None):
+    """
+    Percentile bands over `runs` sampled futures at `points`.
+
+    A member counts as active at p as in forecast.active_at (start <= p and
+    exit > p, or exit >= p with exit_inclusive). `weights` (e.g. monthly cost per
+    member) give the cost band, `registry` (and its `assignments`) the components. Returns a dict with points, percentiles,
+    headcount and cost (percentile x point), components, required, coverage
+    (component x percentile x point) and understaffed (component x point,
+    probability that fewer members than required are active).
+    """
+    points = pd.DatetimeIndex(points)
+    today = pd.Timestamp(today).normalize()
+    model = member_model(df, today)
+    offsets = (points - today).days.to_numpy(dtype=float)
+    n_points = len(points)
+
+    components = registry.names if registry is not None else []
+    if components:
+        pair_comp, pair_member = component_pairs(df, registry, assignments)
+    else:
+        pair_comp = pair_member = np.array([], dtype=int)
+    max_coverage = int(np.bincount(pair_comp, minlength=len(components)).max()) if components else 0
+
+    shards = [min(SHARD_RUNS, runs - i) for i in range(0, runs, SHARD_RUNS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    tasks = [{**model, "seed": s, "runs": n, "points": offsets, "exit_inclusive": exit_inclusive,
+              "weights": None if weights is None else np.asarray(weights, dtype=float),
+              "pair_comp": pair_comp, "pair_member": pair_member,
+              "n_comp": len(components), "n_counts": max_coverage + 1}
+             for s, n in zip(seeds, shards)]
+    if _workers() > 1 and len(tasks) > 1:
+        parts = list(_pool().map(_run_shard, tasks))
+    else:
+        parts = [_run_shard(task) for task in tasks]
+
+    headcount = np.concatenate([p["headcount"] for p in parts])
+    result = {
+        "points": points,
+        "runs": runs,
+        "percentiles": PERCENTILES,
+        "headcount": np.percentile(headcount, PERCENTILES, axis=0).round(),
+        "cost": (np.percentile(np.concatenate([p["cost"] for p in parts]), PERCENTILES, axis=0)
+                 if weights is not None else None),
+        "components": components,
+        "required": registry.required.astype(int) if components else np.zeros(0, dtype=int),
+    }
+
+    if components:
+        cdf = np.cumsum(sum(p["coverage"] for p in parts), axis=-1)
+        result["coverage"] = np.stack([np.argmax(cdf >= q / 100 * runs, axis=-1) for q in PERCENTILES], axis=1)
+        below = result["required"] - 1
+        below_cdf = np.take_along_axis(cdf, np.clip(below, 0, max_coverage)[:, None, None], axis=-1)[..., 0]
+        result["understaffed"] = np.where((below >= 0)[:, None], below_cdf / runs, 0.0)
+        result["understaffed"][below > max_coverage] = 1.0
+    else:
+        result["coverage"] = np.zeros((0, len(PERCENTILES), n_points), dtype=int)
+        result["understaffed"] = np.zeros((0, n_points))
+    return result
+
+
+def headcount_bands(df, registry, today, start_date, end_date, freq, runs, seed, assignments=None):
+    """Simulation on the Teamprognose axis (period starts, exit exclusive)."""
+    return simulate(df, today, forecast_points(start_date, end_date, freq), runs, seed, registry=registry,
+                    assignments=assignments)
+
+
+def cost_bands(df, costs, budget_data, today, start_date, end_date, freq, cost_column, runs, seed):
+    """
+    Simulation on the Kostenentwicklung axis (period ends, exit inclusive,
+    only members with a planned exit, as in finance.cost_forecast).
+    """
+    planned = df['planned_exit'].notna().to_numpy()
+    priced = df['employee_type'].isin(list(budget_data)).to_numpy()
+    weights = np.where(priced, costs[cost_column].to_numpy(dtype=float), 0.0)[planned]
+    return simulate(df[planned], today, pd.date_range(start=start_date, end=end_date, freq=freq), runs, seed,
+                    weights=weights, exit_inclusive=True)
+
+
+def band_frame(result, key, scale=1.0):
+    """Percentiles of `key` ('headcount' or 'cost') per point as frame Datum, P10, P50, P90."""
+    frame = pd.DataFrame({"Datum": result["points"]})
+    for i, p in enumerate(result["percentiles"]):
+        frame[f"P{p}"] = result[key][i] * scale
+    return frame
+
+
+def coverage_risk(result):
+    """Per component: required staffing, staffing percentiles at the horizon end and understaffing risk."""
+    columns = ["Komponente", "Benötigt"] + [f"P{p} (Ende)" for p in result["percentiles"]] + \
+              ["Max. Risiko Unterbesetzung (%)", "Zeitpunkt max. Risiko"]
+    if not result["components"] or not len(result["points"]):
+        return pd.DataFrame(columns=columns)
+    worst = result["understaffed"].argmax(axis=1)
+    frame = pd.DataFrame({
+        "Komponente": result["components"],
+        "Benötigt": result["required"],
+        **{f"P{p} (Ende)": result["coverage"][:, i, -1] for i, p in enumerate(result["percentiles"])},
+        "Max. Risiko Unterbesetzung (%)": (result["understaffed"].max(axis=1) * 100).round(1),
+        "Zeitpunkt max. Risiko": result["points"][worst],
+    })
+    return frame.sort_values("Max. Risiko Unterbesetzung (%)", ascending=False, kind="stable")[columns]
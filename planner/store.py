@@ -0,0 +1,139 @@
+"""
+Process-wide data model shared by all sessions.
+
+The store holds the editable datasets (team_data, org_units, components,
+project_allocations, budget_data, employee_settings, rate_history, scenarios). Readers
+get the current Snapshot, whose values are shared by every session, so memory does not grow per session. Published values are
+never mutated: writers build new values (copy-on-write, untouched datasets and
+members stay shared) and commit them together with the dataset versions their edit
+was based on. A commit against an outdated version raises VersionConflict.
+"""
+import threading
+
+DATASETS = (
+    "team_data",
+    "org_units",
+    "components",
+    "project_allocations",
+    "budget_data",
+    "employee_settings",
+    "rate_history",
+    "scenarios",
+)
+
+
+class VersionConflict(Exception):
+    """A dataset changed since the writer read it."""
+
+    def __init__(self, key, expected, actual):
+        super().__init__(f"{key}: expected version {expected}, found {actual}")
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+
+
+class Snapshot:
+    """Immutable view of all datasets at one store version."""
+
+    __slots__ = ("version", "versions", "data")
+
+    def __init__(self, version, versions, data):
+        self.version = version
+        self.versions = versions
+        self.data = data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+class DataStore:
+    """
+    Versioned copy-on-write store.
+
+    Every commit creates a new Snapshot with a new global version; the version of
+    each changed dataset is set to that global version. Listeners registered with
+    subscribe() are called under the store lock with (old, new, changed_keys), so
+    they observe commits in order.
+    """
+
+    def __init__(self, data=None):
+        self._lock = threading.RLock()
+        self._listeners = []
+        data = dict(data or {})
+        self._snapshot = Snapshot(0, {key: 0 for key in data}, data)
+
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def ensure(self, key, value):
+        """Seed `key` with `value` unless another session already did."""
+        with self._lock:
+            if key in self._snapshot:
+                return self._snapshot
+            return self._publish({key: value})
+
+    def commit(self, changes, expected=None):
+        """
+        Publish {key: new value}. `expected` maps keys to the version the
+        writer based its change on; any mismatch raises VersionConflict and
+        nothing is published.
+        """
+        with self._lock:
+            versions = self._snapshot.versions
+            for key, version in (expected or {}).items():
+                if versions.get(key, 0) != version:
+                    raise VersionConflict(key, version, versions.get(key, 0))
+            return self._publish(changes)
+
+    def update(self, key, fn):
+        """
+        Apply fn to the current value of `key` and publish the result without a
+        version check. Returns the snapshot; nothing is published when fn returns
+        the value unchanged (same object).
+        """
+        with self._lock:
+            current = self._snapshot.get(key)
+            value = fn(current)
+            if value is current:
+                return self._snapshot
+            return self._publish({key: value})
+
+    def subscribe(self, listener, replay=False):
+        """
+        Register listener(old, new, changed_keys); returns an unsubscribe callable.
+        With `replay` the listener first receives the current snapshot as a
+        change from an empty one, atomically with the registration.
+        """
+        with self._lock:
+            if replay:
+                current = self._snapshot
+                listener(Snapshot(0, {}, {}), current, tuple(current.data))
+            self._listeners.append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+        return unsubscribe
+
+    def _publish(self, changes):
+        old = self._snapshot
+        version = old.version + 1
+        data = dict(old.data)
+        data.update(changes)
+        versions = dict(old.versions)
+        versions.update({key: version for key in changes})
+        self._snapshot = Snapshot(version, versions, data)
+        for listener in list(self._listeners):
+            listener(old, self._snapshot, tuple(changes))
+        return self._snapshot
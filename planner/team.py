@@ -0,0 +1,194 @@
+"""
+Team frame and tenure classification.
+
+build_team_frame() turns the team_data list (session state) into a typed frame
+with the derived columns all views work on: age, days_until_exit and tenure_days.
+"""
+import numpy as np
+import pandas as pd
+
+from planner import clock
+
+EMPLOYEE_TYPES = ["Intern", "Lead Cost Employee (LCE)", "Extern"]
+TEAMS = ["CS1", "CS2", "CS3", "CS4", "CS5", "Unassigned"]
+KT_STATUSES = ["Not Started", "In Progress", "Completed"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+
+# Mitarbeiter mit weniger Tagen bis zum Austritt gelten als kritisch
+CRITICAL_EXIT_DAYS = 180
+
+TEAM_COLUMNS = ['name', 'role', 'employee_type', 'components', 'start_date', 'planned_exit',
+                'knowledge_transfer_status', 'priority', 'team', 'dob']
+DERIVED_COLUMNS = ['age', 'days_until_exit', 'tenure_days']
+
+
+def get_kt_status_mapping():
+    """Returns mapping between German display names and English storage values"""
+    return {
+        "Nicht gestartet": "Not Started",
+        "In Bearbeitung": "In Progress",
+        "Abgeschlossen": "Completed",
+        "Not Started": "Nicht gestartet",
+        "In Progress": "In Bearbeitung",
+        "Completed": "Abgeschlossen"
+    }
+
+
+def _today(today):
+    return clock.today() if today is None else pd.Timestamp(today)
+
+
+def classify_tenure(tenure_days):
+    """
+    Vectorized tenure classification. Returns (priority, kt_status) arrays:
+    - Less than 6 months: High / Not Started
+    - 6 months to 2 years: Medium / In Progress
+    - Over 2 years: Low / Completed
+    """
+    tenure_days = np.asarray(tenure_days)
+    conditions = [tenure_days < 180, tenure_days < 730]
+    priority = np.select(conditions, ["High", "Medium"], default="Low")
+    kt_status = np.select(conditions, ["Not Started", "In Progress"], default="Completed")
+    return priority, kt_status
+
+
+def calculate_priority_from_tenure(start_date_str, today=None):
+    """
+    Calculate priority based on tenure:
+    - Less than 6 months: High
+    - 6 months to 2 years: Medium
+    - Over 2 years: Low
+    """
+    tenure_days = (_today(today) - pd.to_datetime(start_date_str)).days
+    return str(classify_tenure([tenure_days])[0][0])
+
+
+def calculate_kt_status_from_tenure(start_date_str, today=None):
+    """
+    Calculate knowledge transfer status based on tenure:
+    - Less than 6 months: Not Started
+    - 6 months to 2 years: In Progress
+    - Over 2 years: Completed
+    """
+    tenure_days = (_today(today) - pd.to_datetime(start_date_str)).days
+    return str(classify_tenure([tenure_days])[1][0])
+
+
+def apply_tenure_classification(team_data, today=None):
+    """Update priority and KT status in place for members without manual override."""
+    auto = []
+    for member in team_data:
+        # Backward compatibility: members without flag count as auto-calculated
+        if 'manual_override' not in member:
+            member['manual_override'] = False
+        if not member.get('manual_override', False):
+            auto.append(member)
+    if not auto:
+        return 0
+
+    start_dates = pd.to_datetime([member['start_date'] for member in auto])
+    tenure_days = (_today(today) - start_dates).days
+    priority, kt_status = classify_tenure(tenure_days)
+    for member, prio, kt in zip(auto, priority, kt_status):
+        member['priority'] = str(prio)
+        member['knowledge_transfer_status'] = str(kt)
+    return len(auto)
+
+
+def classify_team(team_data, today=None):
+    """
+    Copy-on-write variant of apply_tenure_classification.
+
+    Returns team_data itself when nothing changes, otherwise a new list in
+    which only the changed members are copies.
+    """
+    auto = [i for i, member in enumerate(team_data) if not member.get('manual_override', False)]
+    if not auto:
+        return team_data
+
+    start_dates = pd.to_datetime([team_data[i]['start_date'] for i in auto])
+    tenure_days = (_today(today) - start_dates).days
+    priority, kt_status = classify_tenure(tenure_days)
+    result = None
+    for i, prio, kt in zip(auto, priority, kt_status):
+        member = team_data[i]
+        if (member.get('priority') == prio and member.get('knowledge_transfer_status') == kt
+                and 'manual_override' in member):
+            continue
+        if result is None:
+            result = list(team_data)
+        result[i] = {**member, 'manual_override': False, 'priority': str(prio),
+                     'knowledge_transfer_status': str(kt)}
+    return team_data if result is None else result
+
+
+def build_team_frame(team_data, today=None):
+    """Typed team frame with age, days_until_exit and tenure_days."""
+    if not team_data:
+        df = pd.DataFrame(columns=TEAM_COLUMNS + DERIVED_COLUMNS)
+        for col in ['start_date', 'planned_exit', 'dob']:
+            df[col] = pd.to_datetime(df[col])
+        for col in DERIVED_COLUMNS:
+            df[col] = df[col].astype('int64')
+        return df
+
+    today = _today(today)
+    df = pd.DataFrame(team_data)
+    for col in TEAM_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df['team'] = df['team'].fillna("Unassigned")
+    df['planned_exit'] = pd.to_datetime(df['planned_exit'])
+    df['start_date'] = pd.to_datetime(df['start_date'])
+    df['dob'] = pd.to_datetime(df['dob'])
+    birthday_pending = (today.month < df['dob'].dt.month) | ((today.month == df['dob'].dt.month) & (today.day < df['dob'].dt.day))
+    df['age'] = today.year - df['dob'].dt.year - birthday_pending
+    df['days_until_exit'] = (df['planned_exit'] - today).dt.days
+    df['tenure_days'] = (today - df['start_date']).dt.days
+    return df
+
+
+def team_kpis(df, critical_days=CRITICAL_EXIT_DAYS):
+    """Header and sidebar key figures of the team frame."""
+    if df.empty:
+        return {"total": 0, "critical": 0, "completed_kt": 0,
+                "avg_tenure_years": 0, "avg_days_until_exit": 0}
+    return {
+        "total": len(df),
+        "critical": int((df['days_until_exit'] < critical_days).sum()),
+        "completed_kt": int((df['knowledge_transfer_status'] == "Completed").sum()),
+        "avg_tenure_years": int(df['tenure_days'].mean() / 365),
+        "avg_days_until_exit": int(df['days_until_exit'].mean())
+    }
+
+
+def critical_exits(df, critical_days=CRITICAL_EXIT_DAYS):
+    """Members leaving within `critical_days`, soonest first."""
+    return df[df['days_until_exit'] < critical_days].sort_values('days_until_exit')
+
+
+def birthdays_in_month(df, month):
+    """Members whose birthday falls into `month` (1-12)."""
+    return df[df['dob'].dt.month == month].sort_values('dob')
+
+
+def age_distribution(df):
+    """Member count per age group up to 65."""
+    labels = ["<25", "25-34", "35-44", "45-54", "55-64"]
+    ages = df['age'].dropna().astype(int)
+    if ages.empty:
+        return pd.Series(dtype='int64')
+    age_groups = pd.cut(ages, bins=[0, 24, 34, 44, 54, 64], labels=labels, right=True, include_lowest=True)
+    return age_groups.value_counts().reindex(labels).fillna(0).astype(int)
+
+
+def filter_team(df, statuses, priorities, roles, days_range, teams):
+    """Apply the Teamübersicht filters."""
+    return df[
+        (df['knowledge_transfer_status'].isin(statuses)) &
+        (df['priority'].isin(priorities)) &
+        (df['role'].isin(roles)) &
+        (df['days_until_exit'] >= days_range[0]) &
+        (df['days_until_exit'] <= days_range[1]) &
+        (df['team'].isin(teams))
+    ]
@@ -0,0 +1,211 @@
+"""
+Materialized views: dashboard reads precomputed into SQLite.
+
+Staffing, transfer alerts, the Teamprognose, the Kostenprognose and the
+Monatliche Übersicht (monthly) only change when their datasets change or the day rolls
+over. MaterializedViews computes them with the parameters the pages open with
+(default_views()) after every commit and at midnight, in one background
+thread, and stores them column-wise:
+
+    views         name, stamp, as_of, computed_at, rows
+    view_columns  name, position, column, dtype, payload
+
+Numeric and datetime columns (and the index, position -1) are stored as raw
+NumPy bytes, other columns as JSON lists, so reading a view is one query and
+one np.frombuffer per column, and wide views such as the allocation matrix
+(one column per employee) fit as well.
+
+The stamp is a digest of the node name, its parameters and the content of
+the datasets it depends on, so a view stays valid across restarts of the
+process as long as the data is the same. read() returns a view only when its
+stamp matches the requested context and puts it into the dataflow cache;
+callers compute live otherwise.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from planner import clock
+from planner.allocation import gantt_defaults
+from planner.dataflow import Context
+
+DEFAULT_PATH = os.path.join("views", "planner_views.sqlite")
+
+
+def _path():
+    return os.environ.get("AURA_VIEW_DB", DEFAULT_PATH)
+
+
+def default_views(snapshot, as_of):
+    """{view name: params} of the views the pages show first at `as_of`."""
+    as_of = clock.as_of(as_of)
+    views = {
+        "staffing": {"today": as_of},
+        "transfer_alerts": {"today": as_of},
+        # Teamprognose: Monatlich, Stichtag bis +2 Jahre (st.date_input liefert date)
+        "headcount": {"today": as_of, "headcount_range": (as_of.date(), (as_of + pd.DateOffset(years=2)).date(),
+                                                          "MS", "Monat")},
+        # Kostenprognose: Quartalsweise, Stichtag bis +3 Jahre
+        "cost_forecast": {"today": as_of, "cost_range": (as_of, as_of + pd.DateOffset(years=3), "Q", "monthly_cost")},
+    }
+    gantt = gantt_defaults(snapshot.get("project_allocations") or [], as_of.date())
+    if gantt is not None and gantt[2] < gantt[3]:
+        views["allocation_matrix"] = {"allocation_range": (*gantt[2:], "MS")}
+    return views
+
+
+def dataset_digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class MaterializedViews:
+    """Views of `graph` over `store`, kept in the SQLite database at `path`."""
+
+    def __init__(self, graph, store, path=None):
+        self.graph = graph
+        self.store = store
+        self.path = path or _path()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._digests = {}
+        self._digest_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner-views")
+        self._timer = None
+        self._closed = False
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS views (name TEXT PRIMARY KEY, stamp TEXT, as_of TEXT, "
+                       "computed_at REAL, rows INTEGER)")
+            db.execute("CREATE TABLE IF NOT EXISTS view_columns (name TEXT, position INTEGER, column TEXT, "
+                       "dtype TEXT, payload BLOB, PRIMARY KEY (name, position))")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _digest(self, key, version, value):
+        """Content digest of dataset `key`, computed once per version."""
+        with self._digest_lock:
+            digest = self._digests.get((key, version))
+            if digest is None:
+                digest = self._digests[(key, version)] = dataset_digest(value)
+            return digest
+
+    def stamp(self, name, ctx):
+        """Digest of node `name`, its params and the content of its datasets."""
+        parts = []
+        for source in sorted(self.graph.sources(name)):
+            if source in ctx.params:
+                parts.append((source, repr(ctx.params[source])))
+            else:
+                parts.append((source, self._digest(source, ctx.versions.get(source, 0), ctx.data.get(source))))
+        return hashlib.sha1(repr((name, parts)).encode("utf-8")).hexdigest()
+
+    # Lesen
+
+    def read(self, name, ctx):
+        """Stored view of `name` if it was materialized for `ctx`, otherwise None."""
+        if name not in self.graph.nodes():
+            return None
+        with self._connect() as db:
+            # One statement: views and columns of the same commit
+            rows = db.execute("SELECT v.computed_at, c.position, c.column, c.dtype, c.payload "
+                              "FROM views v JOIN view_columns c ON c.name = v.name "
+                              "WHERE v.name = ? AND v.stamp = ? ORDER BY c.position",
+                              (name, self.stamp(name, ctx))).fetchall()
+        if not rows:
+            return None
+        columns = {column: _decode(dtype, payload) for _, position, column, dtype, payload in rows if position >= 0}
+        index = next((_decode(dtype, payload) for _, position, _, dtype, payload in rows if position < 0), None)
+        value = pd.DataFrame(columns, index=index)
+        self.graph.put(name, ctx, value, computed_at=rows[0][0])
+        return value
+
+    def status(self):
+        """Frame of the stored views: name, as_of, computed_at, rows."""
+        with self._connect() as db:
+            return pd.read_sql_query("SELECT name, as_of, computed_at, rows FROM views ORDER BY name", db)
+
+    # Schreiben
+
+    def on_commit(self, old, new, changed):
+        """Store listener: rematerialize the views of the new snapshot."""
+        self.schedule(new)
+
+    def schedule(self, snapshot=None, as_of=None):
+        """Materialize all default views of `snapshot` (default: current) in the background."""
+        if self._closed:
+            return None
+        return self._executor.submit(self.materialize, snapshot or self.store.snapshot(), as_of)
+
+    def materialize(self, snapshot, as_of=None):
+        """Compute and store all default views of `snapshot`; skips views that are up to date."""
+        as_of = clock.as_of(as_of)
+        written = []
+        for name, params in default_views(snapshot, as_of).items():
+            if self.store.snapshot().version != snapshot.version:
+                # A newer commit has its own job
+                break
+            ctx = Context.from_snapshot(snapshot, **params)
+            if any(source not in ctx.params and source not in snapshot for source in self.graph.sources(name)):
+                # Datasets not seeded yet (no page opened)
+                continue
+            stamp = self.stamp(name, ctx)
+            with self._connect() as db:
+                row = db.execute("SELECT stamp FROM views WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] == stamp:
+                continue
+            self._write(name, stamp, as_of, self.graph.get(name, ctx))
+            written.append(name)
+        return written
+
+    def _write(self, name, stamp, as_of, frame):
+        columns = [(name, -1, "", *_encode(frame.index))]
+        columns += [(name, position, str(column), *_encode(frame[column]))
+                    for position, column in enumerate(frame.columns)]
+        with self._connect() as db:
+            db.execute("DELETE FROM view_columns WHERE name = ?", (name,))
+            db.executemany("INSERT INTO view_columns VALUES (?, ?, ?, ?, ?)", columns)
+            db.execute("INSERT OR REPLACE INTO views VALUES (?, ?, ?, ?, ?)",
+                       (name, stamp, as_of.date().isoformat(), time.time(), len(frame)))
+
+    def start_midnight_refresh(self):
+        """Rematerialize shortly after every midnight for the new as-of date."""
+        if self._closed:
+            return
+        now = pd.Timestamp.now()
+        next_run = (now.normalize() + timedelta(days=1, seconds=5) - now).total_seconds()
+        self._timer = threading.Timer(next_run, self._midnight)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _midnight(self):
+        self.schedule()
+        self.start_midnight_refresh()
+
+    def close(self):
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _encode(values):
+    """(dtype, payload) of a column or index: raw bytes for NumPy dtypes, JSON otherwise."""
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+        return dtype.str, np.ascontiguousarray(values.to_numpy()).tobytes()
+    return "json", json.dumps(values.tolist(), default=str).encode("utf-8")
+
+
+def _decode(dtype, payload):
+    if dtype == "json":
+        return pd.Series(json.loads(payload), dtype=object).to_numpy()
+    return np.frombuffer(payload, dtype=np.dtype(dtype))
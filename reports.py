@@ -0,0 +1,300 @@
+"""
+Statische HTML-Berichte pro Team und Produkt (Batch, Kommandozeile).
+
+Lädt die Daten einmal (JSON-Datei oder synthetische Organisation, wie api.py),
+berechnet Team-Frame, Kosten, Komponenten-Registry, Zuordnungen und Staffing
+einmal über den Abhängigkeitsgraphen (planner.dataflow) und verteilt dann die
+Berichte auf einen Prozesspool. Jeder Worker erhält die gemeinsamen Frames
+einmal beim Start und schneidet pro Bericht nur die Mitglieder des Teams bzw.
+des Produkts (Mitglieder an dessen Komponenten) heraus.
+
+Jeder Bericht ist eine eigenständige HTML-Datei mit Kennzahlen, kritischen
+Austritten, Komponentenbesetzung, Team- und Kostenprognose (Plotly, inline).
+Das Plotly-Bundle wird pro Worker einmal gelesen; index.html verlinkt alle
+Berichte.
+
+    python reports.py --data org.json --out reports/
+    python reports.py --synthetic 10k --products --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from planner import clock
+from planner.dataflow import Context, default_graph
+from planner.finance import cost_forecast
+from planner.forecast import headcount_forecast
+from planner.team import CRITICAL_EXIT_DAYS, critical_exits, team_kpis
+
+FORECAST_YEARS = 2
+CRITICAL_COLUMNS = ['name', 'role', 'components', 'planned_exit', 'days_until_exit', 'priority']
+
+_shared = None
+
+
+def _workers():
+    return max(1, int(os.environ.get("AURA_REPORT_WORKERS", os.cpu_count() or 1)))
+
+
+def slug(text):
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(text)).strip("_") or "leer"
+
+
+def report_groups(df, registry, assignments, teams=True, products=True):
+    """
+    (kind, name, member positions, component positions) per report: teams
+    with their members and the components these work on, products with their
+    components and the members assigned to them.
+    """
+    members = assignments["member"].to_numpy()
+    comps = assignments["comp"].to_numpy()
+    groups = []
+    if teams:
+        for team, positions in sorted(df.groupby("team", sort=False).indices.items()):
+            in_team = np.isin(members, positions)
+            groups.append(("Team", team, positions, np.unique(comps[in_team])))
+    if products:
+        for product in registry.products():
+            comp_positions = registry.components_of(product).index.to_numpy()
+            in_product = np.isin(comps, comp_positions)
+            groups.append(("Produkt", product, np.unique(members[in_product]), comp_positions))
+    return groups
+
+
+@lru_cache(maxsize=1)
+def _plotly_js():
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs().encode("utf-8")
+
+
+def _headcount_figure(frame):
+    import plotly.express as px
+    return px.line(frame, x='Monat', y=['Aktive Mitglieder', 'Geplante Austritte'],
+                   labels={'value': 'Anzahl', 'variable': 'Metrik'},
+                   title='Teamprognose: Aktive Mitglieder und Austritte pro Monat')
+
+
+def _cost_figure(frame):
+    import plotly.express as px
+    fig = px.line(frame, x='Datum', y='Quartalskosten', title='Kostenprognose (Quartalskosten)')
+    fig.update_layout(xaxis_title="Zeitraum", yaxis_title="Quartalskosten (€)")
+    return fig
+
+
+# Diagramm -> (x-Spalte, y-Spalten in Trace-Reihenfolge, Plotly-Express-Figur)
+CHARTS = {
+    "headcount": ("Monat", ["Aktive Mitglieder", "Geplante Austritte"], _headcount_figure),
+    "costs": ("Datum", ["Quartalskosten"], _cost_figure),
+}
+
+
+_chart_templates = {}
+
+
+def _chart_template(chart, frame):
+    """
+    Figure cache: traces (without x/y) and layout JSON of `chart`, built with
+    Plotly Express from the first frame drawn in this worker. Reports only
+    fill in their data, so Plotly's figure validation runs once per chart
+    instead of once per report.
+    """
+    template = _chart_templates.get(chart)
+    if template is None:
+        import plotly.io as pio
+        spec = json.loads(pio.to_json(CHARTS[chart][2](frame.head(2)), validate=False))
+        traces = [{key: value for key, value in trace.items() if key not in ("x", "y")} for trace in spec["data"]]
+        template = _chart_templates[chart] = (traces, json.dumps(spec["layout"], ensure_ascii=False))
+    return template
+
+
+def _chart_html(chart, frame, div_id):
+    x, columns, _ = CHARTS[chart]
+    traces, layout = _chart_template(chart, frame)
+    xs = pd.DatetimeIndex(frame[x]).strftime("%Y-%m-%d").tolist()
+    data = [{**trace, "x": xs, "y": frame[column].tolist()} for trace, column in zip(traces, columns)]
+    return (f'<div id="{div_id}" class="chart"></div><script>Plotly.newPlot("{div_id}", '
+            f'{json.dumps(data, ensure_ascii=False)}, {layout}, {{"displaylogo": false, "responsive": true}});'
+            '</script>')
+
+
+def _cell_texts(column):
+    if pd.api.types.is_datetime64_any_dtype(column):
+        texts = column.dt.strftime("%d.%m.%Y")
+    else:
+        texts = column.astype(str).where(column.notna())
+    return [escape(text) for text in texts.fillna("–")]
+
+
+def _table_html(df, empty_text):
+    """HTML table of `df` in one pass over preformatted columns (dates as dd.mm.YYYY)."""
+    if df.empty:
+        return f'<p class="empty">{escape(empty_text)}</p>'
+    header = "".join(f"<th>{escape(str(column))}</th>" for column in df.columns)
+    rows = zip(*(_cell_texts(df[column]) for column in df.columns))
+    body = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+    return f'<table class="table"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def _cards_html(kpis):
+    cards = [
+        ("Mitglieder", kpis["total"]),
+        (f"Kritische Austritte (< {CRITICAL_EXIT_DAYS} Tage)", kpis["critical"]),
+        ("WU abgeschlossen", kpis["completed_kt"]),
+        ("Ø Zugehörigkeit (Jahre)", kpis["avg_tenure_years"]),
+        ("Ø Tage bis Austritt", kpis["avg_days_until_exit"]),
+    ]
+    return "".join(f'<div class="card"><div class="value">{value}</div><div class="label">{escape(label)}</div></div>'
+                   for label, value in cards)
+
+
+_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; margin: 2rem; color: #1f2937; }
+h1 { color: #0e7490; } h2 { border-bottom: 2px solid #0e7490; padding-bottom: .3rem; margin-top: 2rem; }
+.cards { display: flex; flex-wrap: wrap; gap: 1rem; }
+.card { background: #ecfeff; border-left: 4px solid #0e7490; padding: .8rem 1.2rem; min-width: 10rem; }
+.card .value { font-size: 1.6rem; font-weight: 700; } .card .label { font-size: .85rem; color: #475569; }
+.table { border-collapse: collapse; width: 100%; font-size: .9rem; }
+.table th { background: #0e7490; color: white; text-align: left; padding: .4rem; }
+.table td { border-bottom: 1px solid #e2e8f0; padding: .35rem .4rem; }
+.empty { color: #475569; } footer { margin-top: 2rem; font-size: .8rem; color: #64748b; }
+"""
+
+
+def render_report(kind, name, df, costs, staffing, budget_data, as_of, intervals=None):
+    """
+    UTF-8 parts of the self-contained HTML report of the members `df` and
+    component staffing rows `staffing`. The Plotly bundle is a part of its
+    own, encoded once per worker and written without copying. `intervals`
+    are the members' cost intervals (planner.finance.cost_intervals).
+    """
+    end = as_of + pd.DateOffset(years=FORECAST_YEARS)
+    headcount = headcount_forecast(df, as_of, end, 'MS', 'Monat')
+    forecast = cost_forecast(df, costs, budget_data, as_of, end, 'Q', intervals=intervals)
+    forecast = forecast.rename(columns={'Periodenkosten': 'Quartalskosten'})
+
+    exits = critical_exits(df)[CRITICAL_COLUMNS]
+    title = f"{kind} {name} – Wochenbericht {as_of:%d.%m.%Y}"
+    head = f"""<!DOCTYPE html>
+<html lang="de"><head><meta charset="utf-8"><title>{escape(title)}</title>
+<style>{_STYLE}</style><script>"""
+    body = f"""</script></head>
+<body>
+<h1>{escape(title)}</h1>
+<div class="cards">{_cards_html(team_kpis(df))}</div>
+<h2>🚨 Kritische Austritte (&lt; {CRITICAL_EXIT_DAYS} Tage)</h2>
+{_table_html(exits, "Keine kritischen Austritte in den nächsten 6 Monaten.")}
+<h2>🧩 Komponentenbesetzung</h2>
+{_table_html(staffing, "Keine Komponenten zugeordnet.")}
+<h2>📈 Teamprognose</h2>
+{_chart_html("headcount", headcount, "headcount")}
+<h2>💰 Kostenentwicklung</h2>
+{_chart_html("costs", forecast, "costs")}
+<footer>Stichtag {as_of:%d.%m.%Y} · erstellt {pd.Timestamp.now():%d.%m.%Y %H:%M}</footer>
+</body></html>
+"""
+    return [head.encode("utf-8"), _plotly_js(), body.encode("utf-8")]
+
+
+def _init_worker(shared):
+    global _shared
+    warnings.filterwarnings("ignore")
+    _shared = shared
+
+
+def _render_group(group):
+    """Write the report of one group; returns (kind, name, file name, member count, ms)."""
+    t0 = time.perf_counter()
+    kind, name, members, comps = group
+    df, costs, staffing = _shared["df"], _shared["costs"], _shared["staffing"]
+    rows = staffing[staffing.index.isin(comps)]
+    intervals = _shared["intervals"]
+    intervals = intervals[intervals["member"].isin(df.index[members])]
+    parts = render_report(kind, name, df.iloc[members], costs.iloc[members], rows,
+                          _shared["budget_data"], _shared["as_of"], intervals)
+    file_name = f"{slug(kind).lower()}_{slug(name)}.html"
+    with open(os.path.join(_shared["out"], file_name), "wb") as f:
+        f.writelines(parts)
+    return kind, name, file_name, len(members), (time.perf_counter() - t0) * 1000
+
+
+def _index_html(results, as_of):
+    rows = "".join(f'<tr><td>{escape(kind)}</td><td><a href="{escape(file_name)}">{escape(str(name))}</a></td>'
+                   f'<td>{members}</td></tr>' for kind, name, file_name, members, _ in results)
+    return f"""<!DOCTYPE html>
+<html lang="de"><head><meta charset="utf-8"><title>Wochenberichte {as_of:%d.%m.%Y}</title>
+<style>{_STYLE}</style></head>
+<body><h1>Wochenberichte {as_of:%d.%m.%Y}</h1>
+<table class="table"><tr><th>Art</th><th>Name</th><th>Mitglieder</th></tr>{rows}</table></body></html>
+"""
+
+
+def generate(snapshot, out, as_of=None, teams=True, products=True, workers=None):
+    """Write all reports and index.html to `out`; returns the per-report results."""
+    as_of = clock.as_of(as_of)
+    os.makedirs(out, exist_ok=True)
+    graph = default_graph()
+    ctx = Context.from_snapshot(snapshot, today=as_of)
+    df = graph.get("team_frame", ctx)
+    registry = graph.get("component_registry", ctx)
+    groups = report_groups(df, registry, graph.get("assignments", ctx), teams, products)
+    shared = {
+        "df": df,
+        "costs": graph.get("costs", ctx),
+        "staffing": graph.get("staffing", ctx),
+        "intervals": graph.get("cost_intervals", ctx),
+        "budget_data": snapshot["budget_data"],
+        "as_of": as_of,
+        "out": out,
+    }
+
+    workers = min(workers or _workers(), len(groups))
+    if workers > 1:
+        # spawn wie in planner.simulation; die gemeinsamen Frames gehen einmal pro Worker über die Pipe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(shared,)) as pool:
+            results = list(pool.map(_render_group, groups, chunksize=max(1, len(groups) // (workers * 4))))
+    else:
+        _init_worker(shared)
+        results = [_render_group(group) for group in groups]
+
+    with open(os.path.join(out, "index.html"), "w", encoding="utf-8") as f:
+        f.write(_index_html(results, as_of))
+    return results
+
+
+def main(argv=None):
+    from api import load_store
+
+    parser = argparse.ArgumentParser(description="HTML-Wochenberichte pro Team und Produkt")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--data", help="JSON-Datei mit den Datensätzen ({dataset: Wert})")
+    source.add_argument("--synthetic", help="Synthetische Organisation (1k, 10k, 100k oder Anzahl)")
+    parser.add_argument("--out", default="reports", help="Zielverzeichnis (Standard: reports/)")
+    parser.add_argument("--as-of", help="Stichtag YYYY-MM-DD (Standard: heute)")
+    parser.add_argument("--teams", action="store_true", help="Nur Teamberichte")
+    parser.add_argument("--products", action="store_true", help="Nur Produktberichte")
+    parser.add_argument("--workers", type=int, help="Prozesse (Standard: AURA_REPORT_WORKERS oder Anzahl CPUs)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    both = not (args.teams or args.products)
+    t0 = time.perf_counter()
+    snapshot = load_store(args.data, args.synthetic).snapshot()
+    results = generate(snapshot, args.out, args.as_of, teams=both or args.teams, products=both or args.products,
+                       workers=args.workers)
+    print(f"{len(results)} Berichte in {time.perf_counter() - t0:.1f} s nach {os.path.abspath(args.out)}/index.html")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
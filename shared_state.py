@@ -0,0 +1,282 @@
+"""
+Streamlit-Anbindung des gemeinsamen Datenmodells (planner.store).
+
+Alle Sitzungen eines Prozesses lesen dieselbe DataStore-Instanz
+(st.cache_resource). attach() bindet die aktuellen, geteilten Werte an
+st.session_state, commit() schreibt Änderungen mit optimistischer
+Versionsprüfung zurück.
+
+Die Werte in st.session_state sind geteilt und dürfen nicht verändert werden:
+Änderungen immer als neue Liste/neues Dict über commit() schreiben.
+"""
+import time
+
+import streamlit as st
+
+from planner import clock
+from planner.conflicts import ConflictScanner
+from planner.dataflow import Context, default_graph
+from planner.jobs import JobRunner
+from planner.kpi import KpiCounters
+from planner.org import OrgRollup
+from planner.store import DataStore, VersionConflict
+from planner.views import MaterializedViews
+
+DATASET_LABELS = {
+    "team_data": "Teamdaten",
+    "org_units": "Organisation",
+    "components": "Komponenten",
+    "project_allocations": "Projekt-Allocations",
+    "budget_data": "Budget",
+    "employee_settings": "Stundenmodelle",
+    "rate_history": "Tarifhistorie",
+    "scenarios": "Szenarien",
+}
+
+
+@st.cache_resource
+def get_store():
+    """Process-wide store shared by all sessions."""
+    return DataStore()
+
+
+@st.cache_resource
+def get_kpi_counters():
+    """Header KPIs maintained on every team_data commit of any session."""
+    counters = KpiCounters()
+    get_store().subscribe(counters.on_commit, replay=True)
+    return counters
+
+
+@st.cache_resource
+def get_conflicts():
+    """Allocation conflict scanner, re-scanned on every allocation/team_data commit of any session."""
+    scanner = ConflictScanner()
+    get_store().subscribe(scanner.on_commit, replay=True)
+    return scanner
+
+
+@st.cache_resource
+def get_org_rollup():
+    """Subtree aggregates of the org tree, updated on every team_data/org_units/rate commit of any session."""
+    rollup = OrgRollup()
+    get_store().subscribe(rollup.on_commit, replay=True)
+    return rollup
+
+
+@st.cache_resource
+def get_dataflow():
+    """Derived artifacts cached by input versions, shared by all sessions."""
+    return default_graph()
+
+
+@st.cache_resource
+def get_jobs():
+    """Background jobs computing dataflow nodes, shared by all sessions."""
+    return JobRunner(get_dataflow())
+
+
+@st.cache_resource
+def get_views():
+    """Materialized default views (SQLite), refreshed after every commit and at midnight."""
+    views = MaterializedViews(get_dataflow(), get_store())
+    get_store().subscribe(views.on_commit, replay=True)
+    views.start_midnight_refresh()
+    return views
+
+
+def _context(params):
+    versions = st.session_state.get("_data_versions", {})
+    return Context(versions, {key: st.session_state[key] for key in versions}, params)
+
+
+def _trace():
+    recorder = st.session_state.get("_perf_recorder")
+    return recorder.dataflow if recorder is not None else None
+
+
+def derived(name, **params):
+    """
+    Derived artifact `name` for the datasets this session is bound to.
+
+    `params` are the non-store sources of the node (today, headcount_range, ...).
+    The result is shared and must not be mutated.
+    """
+    return get_dataflow().get(name, _context(params), trace=_trace())
+
+
+def derived_latest(name, wait=True, **params):
+    """
+    Like derived(), but for heavy views: when the data changed since the last
+    computation, returns the previous result at once, shows its age and
+    recomputes in the background. The page reruns when the new result is ready.
+    Without a previous result it waits, or with wait=False returns None while
+    the job runs.
+    """
+    result = get_jobs().latest(name, _context(params), trace=_trace(), wait=wait)
+    if result.computed_at is None:
+        st.caption("⏳ Wird im Hintergrund berechnet …")
+        _await_job(result.job)
+        return None
+    if result.stale:
+        st.caption(f"⏳ Stand von vor {_format_age(result.age)} – aktuelle Daten werden im Hintergrund berechnet …")
+        _await_job(result.job)
+    return result.value
+
+
+def materialized(name, latest=False, **params):
+    """
+    derived() (or derived_latest() with `latest`) for the views the
+    materialization job precomputes: when the node is not cached for this
+    data version, the stored view is read before computing live.
+    """
+    ctx = _context(params)
+    if get_dataflow().cached(name, ctx) is None:
+        t0 = time.perf_counter()
+        value = get_views().read(name, ctx)
+        if value is not None:
+            trace = _trace()
+            if trace is not None:
+                trace.append((name, "view", (time.perf_counter() - t0) * 1000))
+            return value
+    return derived_latest(name, **params) if latest else derived(name, **params)
+
+
+def _format_age(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+@st.fragment(run_every=1)
+def _await_job(job):
+    if job.done():
+        st.rerun()
+
+
+def _pin_as_of():
+    picked = st.session_state._as_of_input
+    st.session_state.as_of_pinned = None if picked == clock.today().date() else picked
+
+
+def as_of_date():
+    """
+    Sidebar "Stichtag" shared by all pages, resolved once per rerun.
+
+    Returns the normalized as-of Timestamp; without a pinned date this is today.
+    """
+    current = clock.as_of(st.session_state.get("as_of_pinned"))
+    st.sidebar.date_input("📆 Stichtag", value=current.date(), key="_as_of_input", on_change=_pin_as_of,
+                          help="Plan zu einem anderen Datum anzeigen. Alle Berechnungen verwenden diesen Stichtag.")
+    if clock.is_pinned(current):
+        st.sidebar.caption(f"Ansicht zum Stichtag {current:%d.%m.%Y}")
+        if st.sidebar.button("↩️ Zurück zu heute", key="_as_of_reset", use_container_width=True):
+            st.session_state.as_of_pinned = None
+            del st.session_state["_as_of_input"]
+            st.rerun()
+    return current
+
+
+def simulation_settings():
+    """
+    Sidebar settings of the Monte Carlo attrition bands, shared by all pages.
+
+    Returns (runs, seed) when the bands are switched on, otherwise None.
+    """
+    settings = st.session_state.get("simulation_settings", {"enabled": False, "runs": 1000, "seed": 0})
+    with st.sidebar.expander("🎲 Austrittsrisiko-Simulation", expanded=settings["enabled"]):
+        enabled = st.checkbox("Perzentilbänder anzeigen", value=settings["enabled"],
+                              help="Simuliert verschobene und ungeplante Austritte und zeigt P10–P90 in den Prognosen.")
+        runs = st.select_slider("Durchläufe", options=[250, 500, 1000, 2000, 5000], value=settings["runs"])
+        seed = st.number_input("Seed", min_value=0, value=settings["seed"], step=1)
+    st.session_state.simulation_settings = {"enabled": enabled, "runs": int(runs), "seed": int(seed)}
+    return (int(runs), int(seed)) if enabled else None
+
+
+def reset():
+    """Drop the shared store and everything derived from it (tests, benchmarks)."""
+    get_views().close()
+    get_views.clear()
+    get_jobs().shutdown()
+    get_jobs.clear()
+    get_dataflow.clear()
+    get_kpi_counters.clear()
+    get_conflicts.clear()
+    get_org_rollup.clear()
+    get_store.clear()
+
+
+def attach(defaults):
+    """
+    Bind the shared datasets to st.session_state for this rerun.
+
+    `defaults` maps dataset -> factory used to seed the store once. Values already
+    present in st.session_state (e.g. injected by benchmarks) seed the store
+    instead of the defaults; a None factory seeds only such values (datasets
+    owned by another page, e.g. team_data on the subpages). Shows a toast when another session changed data
+    since this session's last rerun.
+    """
+    store = get_store()
+    get_views()
+    for key, factory in defaults.items():
+        if key in store.snapshot():
+            continue
+        if key in st.session_state:
+            store.ensure(key, st.session_state[key])
+        elif factory is not None:
+            store.ensure(key, factory())
+
+    snapshot = store.snapshot()
+    seen = st.session_state.get("_data_versions", {})
+    changed = sorted({DATASET_LABELS.get(key, key) for key, version in seen.items()
+                      if snapshot.versions.get(key, version) != version})
+    if changed:
+        st.toast(f"🔄 {', '.join(changed)} wurden in einer anderen Sitzung geändert.")
+
+    # Versions the user saw when submitting forms of this rerun
+    st.session_state._data_base = {**snapshot.versions, **seen}
+    _bind(snapshot)
+    return snapshot
+
+
+def _bind(snapshot):
+    for key, value in snapshot.data.items():
+        st.session_state[key] = value
+    st.session_state._data_versions = dict(snapshot.versions)
+
+
+def commit(changes):
+    """
+    Commit {dataset: new value} based on the versions this session last showed.
+
+    Returns False and shows an error when another session changed one of the
+    datasets in the meantime.
+    """
+    base = st.session_state.get("_data_base", {})
+    expected = {key: base[key] for key in changes if key in base}
+    try:
+        snapshot = get_store().commit(changes, expected=expected)
+    except VersionConflict as exc:
+        label = DATASET_LABELS.get(exc.key, exc.key)
+        st.error(f"⚠️ {label} wurden zwischenzeitlich in einer anderen Sitzung geändert. "
+                 "Bitte Eingaben prüfen und erneut speichern.")
+        return False
+    st.session_state._data_base.update({key: snapshot.versions[key] for key in changes})
+    _bind(snapshot)
+    return True
+
+
+def refresh(key, fn):
+    """
+    Apply a derived, idempotent update (e.g. tenure classification) without a
+    version check. Does not invalidate forms of this session.
+    """
+    old_version = get_store().snapshot().versions.get(key, 0)
+    snapshot = get_store().update(key, fn)
+    base = st.session_state.get("_data_base", {})
+    if base.get(key) == old_version:
+        base[key] = snapshot.versions[key]
+    _bind(snapshot)
+    return snapshot